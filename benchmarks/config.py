@@ -0,0 +1,46 @@
+"""Config validation benchmark.
+
+Validates and compiles the config of a generated scenario (see scenarios.py), with its robots and walls
+as extraEntities, and with the same entities as template instances.
+
+Usage (from the repository root, with src in PYTHONPATH):
+    python benchmarks/config.py
+    python benchmarks/config.py --entities 100000
+"""
+import sys
+import time
+import pathlib
+
+import click
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent))
+
+from scenarios import ScenarioSize, generate_scenario  # noqa: E402
+from entities import TEMPLATES, as_instance  # noqa: E402
+
+
+def best_time(function, rounds: int) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@click.command()
+@click.option('--entities', default=10000, show_default=True, help='Entities in the config. Half robots, half walls.')
+@click.option('--rounds', default=10, show_default=True, help='The fastest round is reported.')
+def main(entities, rounds):
+    from simulator.utils.validators import compile_config
+
+    config = generate_scenario(ScenarioSize(entities // 2, entities - entities // 2, 0))
+    instances_config = {**config, 'templates': TEMPLATES, 'instances': [as_instance(d) for d in config['extraEntities']]}
+    del instances_config['extraEntities']
+    for name, case in [('extraEntities', config), ('instances', instances_config)]:
+        seconds = best_time(lambda: compile_config(case), rounds)
+        click.echo(f'{name:<14} {seconds * 1000:9.2f} ms {entities / seconds:12.0f} entities/s')
+
+
+if __name__ == '__main__':
+    main()
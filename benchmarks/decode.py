@@ -0,0 +1,84 @@
+"""Cell decoding microbenchmark.
+
+Decodes every untyped cell of the maps with mxCellDecoder.parse_mxCell, with the style caches cleared
+before every round (cold) and kept between rounds (warm). Style parsing alone is also timed.
+
+Usage (from the repository root, with src in PYTHONPATH):
+    python benchmarks/decode.py
+    python benchmarks/decode.py --rounds 50 examples/btSimulation/hospital_scenario.drawio
+"""
+import glob
+import time
+
+import click
+
+from simulator import mxCellDecoder
+from simulator.resources.load_resources import map_from_drawio
+from simulator.utils import helpers
+
+DEFAULT_MAPS = 'tests/bdd/data/*.drawio'
+
+
+def untyped_cells(files):
+    cells = []
+    for file in files:
+        _, content = map_from_drawio(file)
+        if len(content) > 0:
+            cells += [cell for cell in content[0] if cell.tag == 'mxCell' and 'style' in cell.attrib]
+    return cells
+
+
+def clear_caches():
+    helpers.style_mapping.cache_clear()
+    mxCellDecoder.model_for_style.cache_clear()
+
+
+def time_rounds(function, rounds: int, cold: bool) -> float:
+    """Best time of the rounds, in seconds."""
+    best = float('inf')
+    for _ in range(rounds):
+        if cold:
+            clear_caches()
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@click.command()
+@click.argument('maps', nargs=-1, type=click.Path(exists=True))
+@click.option('--rounds', default=20, show_default=True)
+def main(maps, rounds):
+    files = list(maps) if maps else sorted(glob.glob(DEFAULT_MAPS))
+    cells = untyped_cells(files)
+    styles = [cell.attrib['style'] for cell in cells]
+    window_options = ((500, 500), 10)
+    click.echo(f'{len(files)} maps, {len(cells)} untyped cells, {len(set(styles))} distinct styles')
+
+    def decode():
+        for cell in cells:
+            mxCellDecoder.parse_mxCell(cell, window_options)
+
+    def parse_styles():
+        for style in styles:
+            helpers.parse_style(style)
+
+    def parse_styles_uncached():
+        for style in styles:
+            helpers._parse_style(style)
+
+    results = [
+        ('style parse (no cache)', time_rounds(parse_styles_uncached, rounds, cold=True)),
+        ('style parse (cold)', time_rounds(parse_styles, rounds, cold=True)),
+        ('style parse (warm)', time_rounds(parse_styles, rounds, cold=False)),
+        ('decode (cold)', time_rounds(decode, rounds, cold=True)),
+        ('decode (warm)', time_rounds(decode, rounds, cold=False)),
+    ]
+    for name, seconds in results:
+        click.echo(f'{name:<24} {seconds * 1000:9.3f} ms {len(cells) / seconds:12.0f} cells/s')
+    info = helpers.style_mapping.cache_info()
+    click.echo(f'style cache: {info.hits} hits, {info.misses} misses, {info.currsize}/{info.maxsize} entries')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Entity creation benchmark.
+
+Adds the robots and walls of a generated scenario (see scenarios.py) to an empty simulation,
+one at a time with Simulator.add_entity, in bulk with Simulator.add_entities and as instances of
+a robot and a wall template with Simulator.add_instances. Memory is what the new entities allocate.
+
+Usage (from the repository root, with src in PYTHONPATH):
+    python benchmarks/entities.py
+    python benchmarks/entities.py --entities 50000 --rounds 3
+"""
+import sys
+import time
+import tracemalloc
+import logging
+import pathlib
+
+import click
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent))
+
+from scenarios import ScenarioSize, create_robot, create_wall, generate_scenario  # noqa: E402
+
+
+def empty_simulator():
+    from simulator.main import Simulator
+    return Simulator({'context': '.', 'FPS': 30, 'verbose': 40}, cleanup=lambda: None)
+
+
+TEMPLATES = {
+    'robot': {key: value for key, value in create_robot((0, 0), (0, 0), '').items() if key != 'entId'},
+    'wall': {key: value for key, value in create_wall((0, 0), '').items() if key != 'entId'},
+}
+
+
+def as_instance(definition):
+    """Instance of the robot or wall template with the same components as the definition."""
+    template = definition['type']
+    components = definition['components']
+    overrides = {'Position': components['Position'][:2], 'Skeleton': components['Skeleton'][:1]}
+    if 'Velocity' in components:
+        overrides['Velocity'] = components['Velocity']
+    return {'template': template, 'entId': definition['entId'], 'components': overrides}
+
+
+def one_at_a_time(simulator, definitions):
+    for idx, definition in enumerate(definitions):
+        simulator.add_entity(definition, definition.get('entId', f'extraEntity_{idx}'))
+
+
+def in_bulk(simulator, definitions):
+    simulator.add_entities(definitions)
+
+
+def from_templates(simulator, instances):
+    simulator.add_instances(instances, TEMPLATES)
+
+
+def measure(function, entities, rounds):
+    """Best time of the rounds, in seconds, and the memory allocated by the entities, in bytes."""
+    seconds = float('inf')
+    for _ in range(rounds):
+        simulator = empty_simulator()
+        start = time.perf_counter()
+        function(simulator, entities)
+        seconds = min(seconds, time.perf_counter() - start)
+    simulator = empty_simulator()
+    tracemalloc.start()
+    function(simulator, entities)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, allocated
+
+
+@click.command()
+@click.option('--entities', default=10000, show_default=True, help='Entities to add. Half robots, half walls.')
+@click.option('--rounds', default=5, show_default=True, help='The fastest round is reported.')
+def main(entities, rounds):
+    logging.disable(logging.CRITICAL)
+    definitions = generate_scenario(ScenarioSize(entities // 2, entities - entities // 2, 0))['extraEntities']
+    instances = [as_instance(definition) for definition in definitions]
+    cases = [
+        ('add_entity', one_at_a_time, definitions),
+        ('add_entities', in_bulk, definitions),
+        ('add_instances', from_templates, instances),
+    ]
+    for name, function, entities in cases:
+        seconds, allocated = measure(function, entities, rounds)
+        click.echo(f'{name:<14} {seconds * 1000:9.1f} ms {len(entities) / seconds:12.0f} entities/s '
+                   f'{allocated / 2 ** 20:8.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
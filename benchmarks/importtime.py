@@ -0,0 +1,93 @@
+"""Import time benchmark.
+
+Imports a module in a fresh interpreter with `python -X importtime` and reports its cumulative import time,
+the modules that take longest and the optional dependencies that were loaded with it.
+Rendering (pyglet), the HTTP bridge (fastapi, uvicorn), Firebase and ROS should only load when they are used.
+
+Usage (from the repository root, with src in PYTHONPATH):
+    python benchmarks/importtime.py
+    python benchmarks/importtime.py -m simulator.main -m simulator.batch --runs 10 --output importtime.json
+"""
+import sys
+import json
+import pathlib
+import subprocess
+
+from typing import Dict, List
+
+import click
+
+DEFAULT_MODULES = ['simulator.main']
+# Dependencies that a headless simulation doesn't need
+OPTIONAL_MODULES = ['pyglet', 'fastapi', 'uvicorn', 'colorama', 'yaml', 'pyrebase', 'rclpy']
+
+
+def parse_importtime(output: str, module: str) -> Dict[str, int]:
+    """Cumulative import time, in microseconds, of the module and of every module imported by it.
+
+    -X importtime prints a module after its imports, indented one level deeper.
+    Modules imported before (e.g. by site) are left out.
+    """
+    lines = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            lines.append((name.strip(), int(cumulative), len(name) - len(name.lstrip())))
+    top = max(idx for idx, (name, _, _) in enumerate(lines) if name == module)
+    level = lines[top][2]
+    times = {module: lines[top][1]}
+    for name, cumulative, indent in reversed(lines[:top]):
+        if indent <= level:
+            break
+        times[name] = cumulative
+    return times
+
+
+def measure(module: str, runs: int = 5, top: int = 10) -> dict:
+    """Imports the module in `runs` new interpreters. Times are of the fastest run."""
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise click.ClickException(f'Failed to import {module}:\n{proc.stderr}')
+        times = parse_importtime(proc.stderr, module)
+        if best is None or times[module] < best[module]:
+            best = times
+    slowest: List[tuple] = sorted(
+        ((name, t) for name, t in best.items() if name != module), key=lambda item: item[1], reverse=True
+    )
+    return {
+        'module': module,
+        'import_time': best[module] / 1e6,
+        'modules': len(best) - 1,
+        'optional_loaded': [name for name in OPTIONAL_MODULES if name in best],
+        'slowest': [{'module': name, 'import_time': t / 1e6} for name, t in slowest[:top]],
+    }
+
+
+@click.command()
+@click.option('--module', '-m', 'modules', multiple=True, help='Module to import. Can be repeated.')
+@click.option('--runs', default=5, show_default=True, help='Interpreters per module. The fastest is reported.')
+@click.option('--top', default=10, show_default=True, help='Slowest imported modules to report.')
+@click.option('--output', '-o', type=click.Path(), help='JSON file for the results.')
+def main(modules, runs, top, output):
+    results = []
+    for module in modules or DEFAULT_MODULES:
+        result = measure(module, runs, top)
+        results.append(result)
+        click.echo(f'{module}: {result["import_time"] * 1000:.1f} ms, {result["modules"]} modules')
+        for entry in result['slowest']:
+            click.echo(f'    {entry["module"]:<40} {entry["import_time"] * 1000:8.1f} ms')
+        if result['optional_loaded']:
+            click.echo(f'    optional dependencies loaded: {", ".join(result["optional_loaded"])}')
+    if output is not None:
+        pathlib.Path(output).parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w') as fd:
+            json.dump(results, fd, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""Benchmark runner.
+
+Each scenario size runs in its own process, so peak RSS and startup time aren't shared.
+
+Usage (from the repository root, with src in PYTHONPATH):
+    python benchmarks/run.py run --output benchmarks/results/current.json
+    python benchmarks/run.py run -s 100,500,20 -s 400,2000,50 --duration 5
+    python benchmarks/run.py compare benchmarks/results/baseline.json benchmarks/results/current.json
+
+Metrics per size:
+    startup -- Seconds to build the Simulator.
+    ticks_per_second -- Simulation loop ticks (Movement, Collision and Observer processors) per wall second.
+    events_per_second -- simpy events processed per wall second.
+    path_plans_per_second -- find_route calls between random POIs per wall second.
+    peak_rss_kb -- Peak resident memory of the process.
+
+The report also has the import time of simulator.main (see importtime.py), compared as `import_time`.
+"""
+import sys
+import json
+import time
+import random
+import pathlib
+import platform
+import resource
+import tempfile
+import subprocess
+
+import click
+
+BENCHMARKS_DIR = pathlib.Path(__file__).parent
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+from scenarios import DEFAULT_SIZES, ScenarioSize, generate_map, generate_scenario, world_dimensions  # noqa: E402
+from importtime import measure as measure_import  # noqa: E402
+
+# Metrics where higher is better. For the others lower is better.
+HIGHER_IS_BETTER = {'ticks_per_second', 'events_per_second', 'path_plans_per_second'}
+
+
+def run_case(size: ScenarioSize, duration: float, fps: int, path_plans: int, seed: int) -> dict:
+    from simulator.main import Simulator
+    from simulator.components.Map import Map
+    from simulator.components.Position import Position
+    from simulator.systems.MovementProcessor import MovementProcessor
+    from simulator.systems.CollisionProcessor import CollisionProcessor
+    from simulator.systems.Observer import ObserverProcessor
+    from simulator.systems.NavigationSystem import find_route
+    from simulator.utils.Navigation import PathNotFound
+
+    config = generate_scenario(size, fps, seed)
+    with tempfile.TemporaryDirectory() as context:
+        config['context'] = context
+        start = time.perf_counter()
+        simulator = Simulator(config, cleanup=lambda: None)
+        startup = time.perf_counter() - start
+
+    simulation_map = generate_map(size, seed)
+    simulator.world.add_component(1, simulation_map)
+    width, height = world_dimensions(size)
+    simulator.add_system(MovementProcessor(minx=0, miny=0, maxx=width, maxy=height))
+    simulator.add_system(CollisionProcessor())
+    simulator.add_system(ObserverProcessor([Position]))
+    simulator.DURATION = duration
+
+    ticks = 0
+    events = 0
+    env = simulator.ENV
+    env_step = env.step
+
+    def counting_step():
+        nonlocal events
+        events += 1
+        env_step()
+    env.step = counting_step
+
+    def tick_counter(kwargs):
+        nonlocal ticks
+        while True:
+            ticks += 1
+            yield env.timeout(1 / fps)
+    simulator.add_des_system((tick_counter,))
+
+    start = time.perf_counter()
+    simulator.run()
+    run_time = time.perf_counter() - start
+
+    rng = random.Random(seed)
+    pois = list(simulation_map.pois.values())
+    start = time.perf_counter()
+    for _ in range(path_plans):
+        source, target = rng.choice(pois), rng.choice(pois)
+        try:
+            find_route(simulation_map, source, target)
+        except PathNotFound:
+            pass
+    plan_time = time.perf_counter() - start
+
+    return {
+        'size': size._asdict(),
+        'startup': startup,
+        'ticks_per_second': ticks / run_time,
+        'events_per_second': events / run_time,
+        'path_plans_per_second': path_plans / plan_time if path_plans else 0.0,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def parse_size(ctx, param, values):
+    sizes = []
+    for value in values:
+        try:
+            sizes.append(ScenarioSize(*map(int, value.split(','))))
+        except (TypeError, ValueError):
+            raise click.BadParameter(f'{value} should be ROBOTS,WALLS,POIS')
+    return sizes if sizes else DEFAULT_SIZES
+
+
+@click.group()
+def main():
+    pass
+
+
+@main.command()
+@click.option('--size', '-s', multiple=True, callback=parse_size,
+              help='Scenario size as ROBOTS,WALLS,POIS. Can be repeated. Default is small, medium and large.')
+@click.option('--duration', default=2.0, show_default=True, help='Simulated seconds per scenario.')
+@click.option('--fps', default=30, show_default=True)
+@click.option('--path-plans', default=200, show_default=True, help='find_route calls per scenario.')
+@click.option('--seed', default=0, show_default=True)
+@click.option('--output', '-o', type=click.Path(), help='JSON file for the results.')
+def run(size, duration, fps, path_plans, seed, output):
+    """Runs the scenarios, each in its own process."""
+    results = []
+    for s in size:
+        cmd = [sys.executable, __file__, 'case', ','.join(map(str, s)),
+               '--duration', str(duration), '--fps', str(fps), '--path-plans', str(path_plans), '--seed', str(seed)]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise click.ClickException(f'Scenario {s} failed:\n{proc.stderr}')
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        results.append(result)
+        click.echo(
+            f'{s.robots:>5} robots {s.walls:>6} walls {s.pois:>4} pois | '
+            f'startup {result["startup"]:.3f}s | {result["ticks_per_second"]:9.1f} ticks/s | '
+            f'{result["events_per_second"]:9.1f} events/s | {result["path_plans_per_second"]:9.1f} plans/s | '
+            f'{result["peak_rss_kb"] / 1024:.1f} MB'
+        )
+    imports = measure_import('simulator.main', top=0)
+    click.echo(f'import simulator.main {imports["import_time"] * 1000:.1f} ms')
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'duration': duration,
+        'fps': fps,
+        'import': imports,
+        'results': results,
+    }
+    if output is not None:
+        pathlib.Path(output).parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w') as fd:
+            json.dump(report, fd, indent=2)
+
+
+@main.command(hidden=True)
+@click.argument('size')
+@click.option('--duration', type=float)
+@click.option('--fps', type=int)
+@click.option('--path-plans', type=int)
+@click.option('--seed', type=int)
+def case(size, duration, fps, path_plans, seed):
+    """Runs a single scenario and prints the result as JSON."""
+    result = run_case(ScenarioSize(*map(int, size.split(','))), duration, fps, path_plans, seed)
+    click.echo(json.dumps(result))
+
+
+@main.command()
+@click.argument('baseline', type=click.Path(exists=True))
+@click.argument('current', type=click.Path(exists=True))
+@click.option('--threshold', default=0.1, show_default=True, help='Relative change reported as regression.')
+def compare(baseline, current, threshold):
+    """Compares two result files. Exits with an error if any metric regressed."""
+    with open(baseline) as fd:
+        old_report = json.load(fd)
+    with open(current) as fd:
+        new_report = json.load(fd)
+    old = {tuple(r['size'].values()): r for r in old_report['results']}
+    new = {tuple(r['size'].values()): r for r in new_report['results']}
+    regressions = 0
+    if 'import' in old_report and 'import' in new_report:
+        # Older reports don't have the import time
+        old_value, value = old_report['import']['import_time'], new_report['import']['import_time']
+        change = (value - old_value) / old_value
+        status = 'REGRESSION' if change > threshold else ''
+        regressions += 1 if status else 0
+        click.echo(f'{"import":<20} {"import_time":<22} {old_value:>12.3f} -> {value:>12.3f} ({change:+.1%}) {status}')
+    for size, result in new.items():
+        if size not in old:
+            continue
+        for metric, value in result.items():
+            if metric == 'size' or old[size].get(metric, 0) == 0:
+                continue
+            change = (value - old[size][metric]) / old[size][metric]
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            status = 'REGRESSION' if worse > threshold else ''
+            regressions += 1 if status else 0
+            click.echo(f'{str(size):<20} {metric:<22} {old[size][metric]:>12.3f} -> {value:>12.3f} ({change:+.1%}) {status}')
+    if regressions:
+        raise click.ClickException(f'{regressions} metrics regressed more than {threshold:.0%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Synthetic scenarios for the benchmarks.
+
+A scenario has N robots moving around, M static walls and K POIs in a navigation Map.
+Like examples/swarmSimulation/generate_simulation_json.py, scenarios are config objects
+with the robots and walls as extra entities. The Map is built separately, because its
+nodes can't be written in json.
+"""
+import random
+
+from typing import List, NamedTuple, Tuple
+
+from simulator.components.Map import Map
+from simulator.typehints.component_types import Point, ShapeDefinition
+from simulator.typehints.dict_types import Config, EntityDefinition, LogLevel
+from simulator.utils.Navigation import POI
+
+ROBOT_SIZE = 10
+WALL_SIZE = 20
+GRID_SPACING = 60
+POINT_WIDTH = 20
+
+ScenarioSize = NamedTuple('ScenarioSize', [('robots', int), ('walls', int), ('pois', int)])
+
+# Sizes used by default, small to large
+DEFAULT_SIZES = [
+    ScenarioSize(10, 50, 10),
+    ScenarioSize(50, 200, 20),
+    ScenarioSize(200, 1000, 50),
+]
+
+
+def collidable_from_position(pos: Point, size: int) -> List[ShapeDefinition]:
+    center = (pos[0] + size / 2, pos[1] + size / 2)
+    points = [
+        (pos[0], pos[1]),
+        (pos[0] + size, pos[1]),
+        (pos[0] + size, pos[1] + size),
+        (pos[0], pos[1] + size)
+    ]
+    return [(center, points)]
+
+
+def create_robot(pos: Point, velocity: Point, robot_id: str) -> EntityDefinition:
+    return EntityDefinition(
+        entId='robot_' + robot_id,
+        name='',
+        isObject=True,
+        isInteractive=False,
+        type='robot',
+        components={
+            "Position": [pos[0], pos[1], 0, ROBOT_SIZE, ROBOT_SIZE],
+            "Velocity": [velocity[0], velocity[1]],
+            "Collidable": [collidable_from_position(pos, ROBOT_SIZE)],
+            "Skeleton": ['robot_' + robot_id, "ellipse;whiteSpace=wrap;html=1;aspect=fixed;"],
+        })
+
+
+def create_wall(pos: Point, wall_id: str) -> EntityDefinition:
+    return EntityDefinition(
+        entId='wall_' + wall_id,
+        name='',
+        isObject=False,
+        isInteractive=False,
+        type='wall',
+        components={
+            "Position": [pos[0], pos[1], 0, WALL_SIZE, WALL_SIZE, False],
+            "Collidable": [collidable_from_position(pos, WALL_SIZE)],
+            "Skeleton": ['wall_' + wall_id, "rounded=0;whiteSpace=wrap;html=1;fillColor=#000000;"],
+        })
+
+
+def world_dimensions(size: ScenarioSize) -> Tuple[int, int]:
+    """Square world with roughly 25% of its area covered by walls and robots."""
+    area = 4 * (size.walls * WALL_SIZE ** 2 + size.robots * ROBOT_SIZE ** 2)
+    side = max(200, int(area ** 0.5))
+    return side, side
+
+
+def generate_scenario(size: ScenarioSize, fps: int = 30, seed: int = 0) -> Config:
+    rng = random.Random(seed)
+    width, height = world_dimensions(size)
+    simulation = Config(
+        context=".",
+        FPS=fps,
+        DLW=10,
+        verbose=LogLevel.ERROR,
+        extraEntities=[]
+    )
+    for i in range(size.walls):
+        pos = (rng.uniform(0, width - WALL_SIZE), rng.uniform(0, height - WALL_SIZE))
+        simulation['extraEntities'].append(create_wall(pos, str(i)))
+    for i in range(size.robots):
+        pos = (rng.uniform(0, width - ROBOT_SIZE), rng.uniform(0, height - ROBOT_SIZE))
+        velocity = (rng.uniform(-2, 2), rng.uniform(-2, 2))
+        simulation['extraEntities'].append(create_robot(pos, velocity, str(i)))
+    return simulation
+
+
+def generate_map(size: ScenarioSize, seed: int = 0) -> Map:
+    """Navigation Map with a grid of nodes over the world and K random POIs."""
+    rng = random.Random(seed)
+    width, height = world_dimensions(size)
+    half = POINT_WIDTH // 2
+    xs = range(half, width, GRID_SPACING)
+    ys = range(half, height, GRID_SPACING)
+    nodes = {}
+    for x in xs:
+        for y in ys:
+            neighbours = [(x + dx, y + dy) for dx, dy in
+                          [(GRID_SPACING, 0), (-GRID_SPACING, 0), (0, GRID_SPACING), (0, -GRID_SPACING)]]
+            nodes[(x, y)] = [n for n in neighbours if n[0] in xs and n[1] in ys]
+    pois = [POI(f'poi_{i}', (rng.choice(xs), rng.choice(ys))) for i in range(size.pois)]
+    return Map(nodes, pois, point_width=POINT_WIDTH)
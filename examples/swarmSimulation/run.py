@@ -49,7 +49,7 @@ normal_processors = [
 ]
 # Defines DES processors
 des_processors = [
-    Seer.init([firebase.seer_consumer], 0.1, simulator.verbose),
+    Seer.init([firebase.batch_writer().as_consumer()], 0.1, simulator.verbose),
     (HoverDisturbance.init(max_disturbance=0.1, prob_disturbance=0.4, disturbance_interval=(1 / (fps / 3))),),
     (HoverSystem.init(max_fix_speed=0.2, hover_interval=(1.0 / fps), max_speed=2.5),),
     (ClockSystem.process, ClockSystem.clean)
@@ -0,0 +1,312 @@
+"""Batch runner for parameter sweeps and Monte Carlo replications.
+
+A batch is a base config, a parameter grid and a number of replications.
+Every combination of grid values is a run, repeated `replications` times with different seeds.
+Runs execute in parallel processes and their metrics are collected into one results file.
+
+Grid keys are dotted paths in the config, like `FPS` or `simulatorConfigOptions.fastForward`.
+Keys under `params.` aren't config options: they're handed to the setup hook.
+
+The setup hook, given as "module:function", is called as setup(simulator, run) before each run,
+to add the systems of the simulation. It can return a function that takes no arguments and
+returns a dict of extra metrics (or traces), called after the run.
+
+By default, the simulation of each distinct config is built once (map parsing, imports and builders).
+Where processes can fork, a process per distinct config builds it and forks its runs from the built simulation,
+sharing it copy-on-write. Builds and runs share the `workers` slots, so distinct configs build in parallel.
+Elsewhere, pool workers build each config once and run on clones (see Simulator.clone).
+Runs are seeded after the build, so builds should not depend on the seed.
+Each distinct config is validated once, before any run starts (see utils.validators.compile_config).
+"""
+import os
+import sys
+import multiprocessing
+import multiprocessing.connection
+import copy
+import json
+import time
+import hashlib
+import logging
+import importlib
+import itertools
+import traceback
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, List, Optional
+
+from simulator.typehints.dict_types import Config
+from simulator.utils.helpers import seed_generators
+from simulator.utils.validators import SimulationConfig, compile_config
+
+ParameterGrid = Dict[str, List[Any]]
+SetupHook = Callable[['Simulator', 'BatchRun'], Optional[Callable[[], dict]]]
+
+# How a run gets its simulator: built from the config, cloned from a worker template or the forked template itself
+BUILD, CLONE, TEMPLATE = 'build', 'clone', 'template'
+# Simulators built once per config, and the time it took to build them, by config key
+_TEMPLATES: Dict[str, 'Simulator'] = {}
+_BUILD_TIMES: Dict[str, float] = {}
+# Validated configs, by config key
+_CONFIGS: Dict[str, SimulationConfig] = {}
+
+
+@dataclass
+class BatchRun:
+    """A single simulation of a batch.
+
+    Arguments:
+        index -- Index of the grid point.
+        replication -- Replication number, from 0.
+        params -- Grid values of the run, by dotted key.
+        seed -- Seed of the python and numpy random generators for the run.
+        config -- Base config with the grid values applied.
+    """
+    index: int
+    replication: int
+    params: Dict[str, Any]
+    seed: int
+    config: dict = field(repr=False)
+
+
+def set_by_path(config: dict, path: str, value: Any):
+    keys = path.split('.')
+    node = config
+    for key in keys[:-1]:
+        node = node.setdefault(key, {})
+    node[keys[-1]] = value
+
+
+def expand_grid(grid: ParameterGrid) -> List[Dict[str, Any]]:
+    """All combinations of grid values, in a stable order."""
+    keys = list(grid.keys())
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def run_seed(base_seed: int, params: Dict[str, Any], replication: int) -> int:
+    """Deterministic seed of a run. It depends on the parameter values, not on the grid order."""
+    key = json.dumps([base_seed, params, replication], sort_keys=True, default=str)
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:4], 'big')
+
+
+def plan_batch(base_config: Config, grid: ParameterGrid, replications: int = 1, base_seed: int = 0) -> List[BatchRun]:
+    runs = []
+    for index, params in enumerate(expand_grid(grid)):
+        config = copy.deepcopy(base_config)
+        for path, value in params.items():
+            if not path.startswith('params.'):
+                set_by_path(config, path, value)
+        for replication in range(replications):
+            runs.append(BatchRun(index, replication, params, run_seed(base_seed, params, replication), config))
+    return runs
+
+
+def config_key(config: dict) -> str:
+    return json.dumps(config, sort_keys=True, default=str)
+
+
+def compiled_config(config: dict) -> SimulationConfig:
+    """The validated config. Each distinct config is validated once per process."""
+    key = config_key(config)
+    if key not in _CONFIGS:
+        _CONFIGS[key] = compile_config(copy.deepcopy(config))
+    return _CONFIGS[key]
+
+
+def build_simulator(config: dict):
+    from simulator.main import Simulator
+    # Components may keep (and change) their args, so each simulator gets its own copy
+    return Simulator(copy.deepcopy(compiled_config(config)), cleanup=lambda: None)
+
+
+def get_simulator(run: BatchRun, mode: str):
+    if mode == BUILD:
+        return build_simulator(run.config)
+    key = config_key(run.config)
+    if key not in _TEMPLATES:
+        start = time.perf_counter()
+        _TEMPLATES[key] = build_simulator(run.config)
+        _BUILD_TIMES[key] = time.perf_counter() - start
+    if mode == TEMPLATE:
+        # Forked process. The template is a private copy and the process runs a single simulation.
+        return _TEMPLATES[key]
+    return _TEMPLATES[key].clone()
+
+
+def load_hook(spec: Optional[str]) -> Optional[SetupHook]:
+    """Imports a "module:function" hook. The working directory is in the import path."""
+    if spec is None:
+        return None
+    module_name, _, function_name = spec.partition(':')
+    if not function_name:
+        raise ValueError(f'Setup hook {spec} should be in the "module:function" format')
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def simulator_metrics(simulator) -> dict:
+    metrics = {
+        'sim_time': simulator.ENV.now,
+        'entities': len(simulator.world._entities),
+    }
+    if simulator.FAST_FORWARD:
+        metrics['skipped_ticks'] = simulator.skipped_ticks
+    if simulator.REAL_TIME is not None:
+        metrics['max_lag'] = simulator.max_lag
+    if simulator.PROFILER is not None:
+        metrics['profile'] = simulator.PROFILER.to_dict()
+    return metrics
+
+
+def run_result(run: BatchRun, error: Optional[str] = None) -> dict:
+    result = {**asdict(run), 'metrics': {}, 'error': error}
+    del result['config']
+    return result
+
+
+def execute_run(run: BatchRun, setup: Optional[str] = None, mode: str = BUILD) -> dict:
+    """Gets the simulator of a BatchRun and runs it. Errors are reported in the result.
+    Runs on a forked template report the time it took to build the template.
+    """
+    result = run_result(run)
+    try:
+        start = time.perf_counter()
+        simulator = get_simulator(run, mode)
+        result['metrics']['build_time'] = time.perf_counter() - start
+        if mode == TEMPLATE:
+            result['metrics']['build_time'] = _BUILD_TIMES.get(config_key(run.config), 0.0)
+        seed_generators(run.seed)
+        hook = load_hook(setup)
+        collect = hook(simulator, run) if hook is not None else None
+        start = time.perf_counter()
+        simulator.run()
+        result['metrics']['wall_time'] = time.perf_counter() - start
+        result['metrics'].update(simulator_metrics(simulator))
+        if collect is not None:
+            result['metrics'].update(collect())
+    except Exception:
+        result['error'] = traceback.format_exc()
+    return result
+
+
+def forked_run(run: BatchRun, setup: Optional[str], connection):
+    connection.send(execute_run(run, setup, TEMPLATE))
+    connection.close()
+
+
+def receive(receiver, process) -> Optional[Any]:
+    """What a forked process sent, or None if it exited without sending it."""
+    try:
+        value = receiver.recv()
+    except EOFError:
+        value = None
+    receiver.close()
+    process.join()
+    return value
+
+
+def fork_runs(runs: List[BatchRun], setup: Optional[str], slots) -> List[dict]:
+    """Runs each BatchRun in a process forked from this one. Each process holds one of the slots."""
+    context = multiprocessing.get_context('fork')
+    results: List[Optional[dict]] = [None] * len(runs)
+    pending = list(enumerate(runs))
+    active = {}
+    while pending or active:
+        # Only waits for a slot if no run is active. Otherwise tries again when a run finishes
+        while pending and slots.acquire(block=not active):
+            idx, run = pending.pop(0)
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=forked_run, args=(run, setup, sender), daemon=True)
+            process.start()
+            sender.close()
+            active[receiver] = (idx, process)
+        for receiver in multiprocessing.connection.wait(list(active.keys()), timeout=0.1 if pending else None):
+            idx, process = active.pop(receiver)
+            result = receive(receiver, process)
+            slots.release()
+            results[idx] = result or run_result(runs[idx], f'Worker process exited with code {process.exitcode}')
+    return results
+
+
+def forked_group(runs: List[BatchRun], setup: Optional[str], slots, connection):
+    """Builds the simulation of runs with the same config, then forks the runs from it."""
+    with slots:
+        try:
+            get_simulator(runs[0], TEMPLATE)
+        except Exception as err:
+            # The runs build it again, and report the error
+            logging.getLogger(__name__).error(f'Failed to build simulation of run {runs[0].index}: {err}')
+    connection.send(fork_runs(runs, setup, slots))
+    connection.close()
+
+
+def fork_groups(runs: List[BatchRun], setup: Optional[str], workers: int) -> List[dict]:
+    """Runs each group of BatchRuns with the same config in a process forked from this one (see forked_group).
+    At most `workers` builds and runs execute at a time.
+    """
+    context = multiprocessing.get_context('fork')
+    slots = context.Semaphore(workers)
+    groups: Dict[str, List[int]] = {}
+    for idx, run in enumerate(runs):
+        groups.setdefault(config_key(run.config), []).append(idx)
+    results: List[Optional[dict]] = [None] * len(runs)
+    pending = list(groups.values())
+    active = {}
+    while pending or active:
+        while pending and len(active) < workers:
+            indices = pending.pop(0)
+            receiver, sender = context.Pipe(duplex=False)
+            # Not a daemon, so it can fork the runs
+            process = context.Process(target=forked_group, args=([runs[i] for i in indices], setup, slots, sender))
+            process.start()
+            sender.close()
+            active[receiver] = (indices, process)
+        for receiver in multiprocessing.connection.wait(list(active.keys())):
+            indices, process = active.pop(receiver)
+            group_results = receive(receiver, process)
+            for position, idx in enumerate(indices):
+                results[idx] = group_results[position] if group_results is not None else \
+                    run_result(runs[idx], f'Worker process exited with code {process.exitcode}')
+    return results
+
+
+def run_batch(
+        base_config: Config,
+        grid: ParameterGrid,
+        replications: int = 1,
+        workers: Optional[int] = None,
+        base_seed: int = 0,
+        setup: Optional[str] = None,
+        reuse_build: bool = True) -> dict:
+    """Runs every BatchRun in parallel. Returns the batch results, with runs in plan order.
+
+    If reuse_build is True, each distinct config is built once. Otherwise every run builds its simulation.
+    Raises ConfigParseError, before running, if a config of the batch isn't valid.
+    """
+    logger = logging.getLogger(__name__)
+    runs = plan_batch(base_config, grid, replications, base_seed)
+    for run in runs:
+        compiled_config(run.config)
+    workers = workers or os.cpu_count()
+    logger.info(f'Running {len(runs)} simulations with {workers} workers')
+    start = time.perf_counter()
+    if reuse_build and 'fork' in multiprocessing.get_all_start_methods():
+        results = fork_groups(runs, setup, workers)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            mode = CLONE if reuse_build else BUILD
+            results = list(executor.map(execute_run, runs, itertools.repeat(setup), itertools.repeat(mode)))
+    _CONFIGS.clear()
+    failed = sum(1 for r in results if r['error'] is not None)
+    if failed:
+        logger.error(f'{failed} of {len(runs)} simulations failed')
+    return {
+        'base_config': base_config,
+        'grid': grid,
+        'replications': replications,
+        'base_seed': base_seed,
+        'setup': setup,
+        'wall_time': time.perf_counter() - start,
+        'runs': results,
+    }
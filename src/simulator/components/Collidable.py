@@ -1,10 +1,38 @@
 from typing import List
-from collision import Poly
+from collision import Poly, Vector
 
 from simulator.typehints.component_types import Component, Point, ShapeDefinition
 from simulator.utils.helpers import tuple2vector, get_rel_points
 
 
+class SharedPoly(Poly):
+    """Poly that shares its points, edges and normals with the Poly it was copied from.
+    They are copied before the first change (e.g. rotating the shape), so the other Polys don't change.
+    Setting the angle to its current value (as CollisionProcessor does every tick) doesn't change them.
+    """
+
+    def __setattr__(self, key, value):
+        if key == 'angle' and value == self.__dict__.get('angle', None):
+            return
+        super().__setattr__(key, value)
+
+    @classmethod
+    def copy_of(cls, poly: Poly, pos: Vector) -> 'SharedPoly':
+        shared = cls.__new__(cls)
+        shared.__dict__.update(poly.__dict__)
+        shared.__dict__['pos'] = pos
+        shared.__dict__['_shared'] = True
+        return shared
+
+    def _recalc(self):
+        if self.__dict__.get('_shared', False):
+            self.__dict__['rel_points'] = [Vector(p.x, p.y) for p in self.rel_points]
+            self.__dict__['edges'] = list(self.edges)
+            self.__dict__['normals'] = list(self.normals)
+            self.__dict__['_shared'] = False
+        super()._recalc()
+
+
 class Collidable(Component):
     def __init__(self, shape_definitions: List[ShapeDefinition], collision_tag='genericCollision'):
         self.shapes = []
@@ -13,5 +41,12 @@ class Collidable(Component):
 
         self.event_tag = collision_tag
 
+    def translated(self, offset: Point) -> 'Collidable':
+        """Copy with the shapes moved by offset. The shapes' geometry is shared with this Collidable."""
+        copy = type(self).__new__(type(self))
+        copy.__dict__.update(self.__dict__)
+        copy.shapes = [SharedPoly.copy_of(s, Vector(s.pos.x + offset[0], s.pos.y + offset[1])) for s in self.shapes]
+        return copy
+
     def __str__(self):
         return f"Collidable[{len(self.shapes)} shapes. Tag={self.event_tag}]"
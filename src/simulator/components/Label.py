@@ -1,10 +1,10 @@
-import pyglet
 from simulator.typehints.component_types import Component
 
 
 class Label(Component):
 
     def __init__(self, label, pos, batch):
+        import pyglet
         self.labelTag = pyglet.text.HTMLLabel(label,
                                               batch=batch,
                                               x=pos[0], y=pos[1],
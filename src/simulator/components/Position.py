@@ -1,9 +1,9 @@
 import math
 import simulator.utils.helpers as helpers
-from simulator.typehints.component_types import Component, Point
+from simulator.typehints.component_types import TrackedComponent, Point
 
 
-class Position(Component):
+class Position(TrackedComponent):
     """Position components hold the position of an Entity in the esper World.
     """
     def __init__(self, x: float = 0.0, y: float = 0.0, angle: float = 0.0, w: float = 0.0, h: float = 0.0, movable=True):
@@ -31,5 +31,5 @@ class Position(Component):
         center = (x + width // 2, y + height // 2)
         points = [(x, y), (x+width, y), (x+width, y+height), (x, y+height)]
         if self.angle != 0:
-            points = map(lambda x: helpers.rotate_around_point(x, math.radians( -self.angle), center), points)
+            points = helpers.rotate_points(points, math.radians(-self.angle), center)
         return points
\ No newline at end of file
@@ -1,7 +1,7 @@
-from simulator.typehints.component_types import Component
+from simulator.typehints.component_types import TrackedComponent
 
 
-class Skeleton(Component):
+class Skeleton(TrackedComponent):
 
     def __init__(self, id: str, style="", value="", relative=None, model=False):
         self.id = id
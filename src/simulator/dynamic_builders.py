@@ -1,14 +1,11 @@
-from simulator.utils.helpers import list_folder
-from typing import List
+from simulator.utils.discovery import LazyModules, tagged_modules
+from typing import List, Optional
 from pathlib import Path
 
-def export_available_builders(extra_paths: List[Path] = []) -> dict:
+def export_available_builders(extra_paths: Optional[List[Path]] = None) -> LazyModules:
+    """Builders by TYPE. Builders in the simulator's folder replace the ones with the same TYPE in extra_paths."""
     root_builders = __file__.replace('dynamic_builders.py', 'builders')
-    extra_paths.append(root_builders)
-    available_builders = {}
-    for f in extra_paths:
-        modules = list_folder(Path(f))
-        for _, module in modules.items():
-            tag = module.__dict__['TYPE']
-            available_builders[tag] = module
+    available_builders = LazyModules()
+    for f in list(extra_paths or []) + [root_builders]:
+        tagged_modules(Path(f), 'TYPE', available_builders)
     return available_builders
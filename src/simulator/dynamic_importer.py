@@ -1,26 +1,26 @@
 """Extracts components that can be imported dynamically into the simulation.
 
    EXPORTS:
-   available_components: dict -- dict of components that can be dynamically imported.
-                                 key is component file name. value is the module.
+   available_components: LazyModules -- components that can be dynamically imported.
+                                        key is component file name. value is the module, imported on first use.
    init_component -- instantiate a component and return it.
+   component_constructor -- the class of a component, to instantiate many of them.
 
 """
 import logging
 import typing
 
 from pathlib import Path
-from simulator.utils.helpers import import_components_from_folder
+from simulator.utils.discovery import package_modules
 
 root_components = Path(__file__.replace('dynamic_importer.py', 'components'))
-available_components = import_components_from_folder(root_components, 'simulator.components')
+available_components = package_modules(root_components, 'simulator.components')
 
 
 def expand_available_components(paths: typing.List[Path]):
     logger = logging.getLogger(__name__)
-    global available_components
     for p in paths:
-        available_components.update(import_components_from_folder(p, 'components'))
+        package_modules(p, 'components', available_components)
     logger.debug(f'Available components updated: {available_components}')
 
 
@@ -41,5 +41,12 @@ def init_component(component_name: str, args: typing.List[typing.Any]):
     return module.__dict__[component_name](*args)
 
 
+def component_constructor(component_name: str) -> typing.Callable:
+    """The class of an available component, looked up once to instantiate many components."""
+    if component_name not in available_components:
+        raise Exception(f"Component {component_name} is not available")
+    return available_components[component_name].__dict__[component_name]
+
+
 class ComponentInitError(Exception):
     pass
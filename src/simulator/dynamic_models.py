@@ -1,12 +1,6 @@
-from simulator.utils.helpers import list_folder
+from simulator.utils.discovery import LazyModules, tagged_modules
 from pathlib import Path
 
-def export_available_models():
+def export_available_models() -> LazyModules:
     root_models = Path(__file__.replace('dynamic_models.py', 'models'))
-    available_models = {}
-
-    modules = list_folder(root_models)
-    for _, module in modules.items():
-        tag = module.__dict__['MODEL']
-        available_models[tag] = module
-    return available_models
+    return tagged_modules(root_models, 'MODEL')
@@ -4,7 +4,7 @@ import re
 import os
 from simulator.typehints.build_types import ConfigParseError
 
-from simulator.utils.validators import validate_config
+from simulator.utils.validators import check_config, load_config
 
 
 @click.group()
@@ -36,7 +36,7 @@ def configtest(file, json):
     """Tests a config object for HMRsim simulation."""
     config = json if json is not None else file
     try:
-        resp = validate_config(config)
+        _, resp = check_config(load_config(config))
     except ConfigParseError as err:
         click.echo('Analysis aborted:')
         click.echo(err)
@@ -63,5 +63,57 @@ def create_project(path):
 
 
 
+def parse_grid_option(ctx, param, value):
+    grid = {}
+    for item in value:
+        key, sep, values = item.partition('=')
+        if not sep or not key:
+            raise click.BadParameter(f'{item} should be KEY=VALUE1,VALUE2,...')
+        grid[key] = []
+        for v in values.split(','):
+            try:
+                grid[key].append(json.loads(v))
+            except json.JSONDecodeError:
+                grid[key].append(v)
+    return grid
+
+
+@click.command()
+@click.argument('config', type=click.Path(exists=True))
+@click.option('--grid', '-g', multiple=True, callback=parse_grid_option,
+    help='Parameter values as KEY=VALUE1,VALUE2. KEY is a dotted path in the config. Can be repeated.')
+@click.option('--grid-file', type=click.Path(exists=True),
+    help='JSON file with the parameter grid, as {"KEY": [VALUES]}.')
+@click.option('--replications', '-r', default=1, show_default=True, help='Runs of each grid point.')
+@click.option('--workers', '-w', type=int, help='Worker processes. Default is the CPU count.')
+@click.option('--seed', default=0, show_default=True, help='Base seed. Each run gets a seed derived from it.')
+@click.option('--setup', help='Hook that adds systems to each simulator, as "module:function".')
+@click.option('--rebuild', is_flag=True,
+    help='Build the simulation in every run, instead of building each config once and forking from it.')
+@click.option('--output', '-o', default='batch_results.json', type=click.Path(), show_default=True)
+def batch(config, grid, grid_file, replications, workers, seed, setup, rebuild, output):
+    """Runs a config many times, over a parameter grid, in parallel."""
+    from simulator.batch import run_batch
+    with open(config) as fd:
+        base_config = json.load(fd)
+    if grid_file is not None:
+        with open(grid_file) as fd:
+            grid = {**json.load(fd), **grid}
+    try:
+        results = run_batch(base_config, grid, replications, workers, seed, setup, reuse_build=not rebuild)
+    except ConfigParseError as err:
+        click.echo(f'Batch aborted: {err}')
+        click.echo('\n- '.join(err.errors))
+        return
+    with open(output, 'w') as fd:
+        json.dump(results, fd, indent=2, default=str)
+    failed = [r for r in results['runs'] if r['error'] is not None]
+    click.echo(f'{len(results["runs"])} runs in {results["wall_time"]:.2f}s. Results in {output}')
+    if failed:
+        click.echo(f'{len(failed)} runs failed. First error:')
+        click.echo(failed[0]['error'])
+
+
 main.add_command(configtest)
 main.add_command(create_project)
+main.add_command(batch)
@@ -3,9 +3,12 @@ Entrypoint for a simulator.
 Defines Simulator class.
 """
 
+import copy
 import json
-import yaml
+import math
+import time
 import simpy
+import simpy.rt
 import pathlib
 import esper
 from logging import getLogger
@@ -16,11 +19,13 @@ from typing import List, Tuple
 import typing
 from simulator import map_parser
 
-from datetime import datetime, timedelta
 from pathlib import Path
 
 from simulator.components.Inventory import Inventory
-from simulator.typehints.build_types import SimulationParseError
+from simulator.components.Path import Path as PathComponent
+from simulator.components.Velocity import Velocity
+from simulator.typehints.build_types import ConfigParseError, SimulationParseError
+from simulator.dynamic_importer import component_constructor
 from simulator.utils.create_components import (
     initialize_components,
     import_external_component,
@@ -30,8 +35,16 @@ from simulator.typehints.dict_types import (
     SystemArgs,
     Config,
     EntityDefinition,
+    EntityInstance,
+    EntityTemplate,
 )
-from simulator.utils.validators import validate_config
+from simulator.utils.validators import SimulationConfig, compile_config
+from simulator.utils.Profiler import Profiler, system_name
+from simulator.utils.Timers import Timers
+from simulator.utils import Snapshot
+from simulator.utils.TrackedWorld import TrackedWorld
+from simulator.utils.templates import TemplateBuilder, instance_id
+from simulator.utils.map_cache import DEFAULT_CACHE_DIR as DEFAULT_MAP_CACHE_DIR
 
 logging.config.dictConfig(logger_config)
 logger = getLogger(__name__)
@@ -45,7 +58,32 @@ Arguments:
 """
 
 CleanupFunction = typing.Optional[typing.Callable[[], None]]
-ConfigFormat = typing.Optional[typing.Union[str, Config]]
+ConfigFormat = typing.Optional[typing.Union[str, Config, SimulationConfig]]
+
+# Systems due within this many simulated seconds are executed in the current tick
+TICK_TOLERANCE = 1e-9
+
+RealTimeOptions = typing.TypedDict(
+    "RealTimeOptions",
+    {"factor": float, "strict": bool, "lagCheckInterval": float, "lagTolerance": float},
+)
+"""Options of the real-time mode.
+
+Arguments:
+    factor -- Wall-clock seconds per simulated second. Default is 1.
+    strict -- If True, the simulation aborts when it falls behind the wall clock by more than `factor` seconds.
+    lagCheckInterval -- Simulated seconds between lag measures. Default is 1.
+    lagTolerance -- Lag, in wall-clock seconds, above which a warning is logged. Default is 0.1.
+"""
+DEFAULT_REAL_TIME: RealTimeOptions = {
+    "factor": 1.0, "strict": False, "lagCheckInterval": 1.0, "lagTolerance": 0.1
+}
+
+# Simulator attributes, from the config and the build, saved in snapshots
+SNAPSHOT_SETTINGS = [
+    "build_report", "CONFIG", "verbose", "FPS", "DEFAULT_LINE_WIDTH", "DURATION", "simulator_extra_config",
+    "FAST_FORWARD", "REAL_TIME", "PROFILER", "profile_output", "simulation_name", "window_dimensions", "entities",
+]
 
 SimpyEvent = typing.Generator[simpy.Event, typing.Any, typing.Any]
 SystemProcessFunction = typing.Callable[[SystemArgs], SimpyEvent]
@@ -60,6 +98,7 @@ class Simulator:
 
     Keyword Arguments:
         config: Optional[Union[str, dict]] -- Defines the configuration for the simulator. Either a dict or a path to a json file
+                                             A SimulationConfig (see utils.validators.compile_config) isn't validated again.
         cleanup: Optional[Callable[[], None]] -- Function that can be passed. It's executed after the simulator exits.
 
     Attributes:
@@ -70,6 +109,11 @@ class Simulator:
                          After DURATION seconds the simulation loops exits, but events in the queue are still processed,
                          so final clock on the simulation might be bigger than DURATION seconds.
         EXIT: bool -- Controls if the simulation should exit
+        FAST_FORWARD: bool -- If True, FPS ticks in which nothing moves are skipped.
+                              Set with the `fastForward` simulatorConfigOptions.
+        REAL_TIME: Optional[RealTimeOptions] -- If set, simulated time advances at a fixed factor of wall time.
+                                                Set with the `realTime` simulatorConfigOptions.
+        PROFILER: Optional[Profiler] -- If set, times every system. Set with the `profile` simulatorConfigOptions.
     """
 
     def __init__(
@@ -90,22 +134,22 @@ class Simulator:
         else:
             self.CONFIG = "dict object"
         self.build_report.append(f"Validating config...")
-        config_errors = validate_config(config)
-        if len(config_errors) > 0:
-            self.build_report += config_errors
+        try:
+            config = compile_config(config)
+        except ConfigParseError as err:
+            self.build_report += err.errors
             logger.error(f"Failed to parse config from {self.CONFIG}")
-            logger.error(f"{len(config_errors)} errors found in config:")
-            logger.error("\n- ".join(config_errors))
+            logger.error(f"{len(err.errors)} errors found in config:")
+            logger.error("\n- ".join(err.errors))
             logger.error("Simulation execution aborted")
             raise SimulationParseError(
                 f"Config from {self.CONFIG} could not be parsed."
             )
-        else:
-            self.build_report.append("Config OK ✔")
+        self.build_report.append("Config OK ✔")
         self.build_report.append(f"Loading simulation from {self.CONFIG}")
         # Parse level of verbosity.
         # Can be an int or a LogLevel
-        self.verbose: LogLevel = config.get("verbose", LogLevel.ERROR)
+        self.verbose: LogLevel = config.verbose
         if isinstance(self.verbose, LogLevel):
             logger.root.setLevel(self.verbose.value)
             logger.setLevel(self.verbose.value)
@@ -113,21 +157,19 @@ class Simulator:
             logger.root.setLevel(self.verbose)
             logger.setLevel(self.verbose)
 
-        self.FPS = config.get("FPS", 0) if config is not None else 0
+        self.FPS = config.FPS
         if self.FPS < 0:
             logger.warning(f"WARNING: FPS value should not be negative")
             self.build_report.append(f"WARNING: FPS value should not be negative")
             self.FPS = 0
-        self.DEFAULT_LINE_WIDTH = config.get("DLW", 10) if config is not None else 10
-        self.DURATION = config.get("duration", -1) if config is not None else -1
-        simulation_components = (
-            config.get("simulationComponents", None) if config is not None else None
-        )
+        self.DEFAULT_LINE_WIDTH = config.DLW
+        self.DURATION = config.duration
+        simulation_components = config.simulationComponents
 
-        context = config.get("context", ".") if config is not None else "."
+        context = config.context
         self.build_report.append(f"Context is {context} ({Path(context).absolute()})")
         # Check for extra config options
-        self.simulator_extra_config = config.get("simulatorConfigOptions", {})
+        self.simulator_extra_config = config.simulatorConfigOptions
         if "loggerConfig" in self.simulator_extra_config:
             logger_config_file = (
                 Path(context) / self.simulator_extra_config["loggerConfig"]
@@ -139,6 +181,7 @@ class Simulator:
                 self.build_report.append(
                     f"Loading logger config file {logger_config_file.absolute()}"
                 )
+                import yaml
                 with open(logger_config_file) as fd:
                     logger_config = yaml.safe_load(fd)
                     logging.config.dictConfig(logger_config)
@@ -149,13 +192,36 @@ class Simulator:
                 self.build_report.append(
                     f"ERROR: Logger config file {logger_config_file.absolute()} not found"
                 )
+        self.FAST_FORWARD: bool = self.simulator_extra_config["fastForward"]
+        if self.FAST_FORWARD:
+            self.build_report.append("Fast-forward enabled. Idle FPS ticks are skipped.")
+        self.REAL_TIME: typing.Optional[RealTimeOptions] = None
+        real_time = self.simulator_extra_config["realTime"]
+        if real_time:
+            self.REAL_TIME = {**DEFAULT_REAL_TIME, **(real_time if isinstance(real_time, dict) else {})}
+            self.build_report.append(
+                f"Real-time mode: 1 simulated second takes {self.REAL_TIME['factor']} seconds"
+                f" ({'strict' if self.REAL_TIME['strict'] else 'non-strict'})"
+            )
+        self.PROFILER: typing.Optional[Profiler] = None
+        self.profile_output: typing.Optional[Path] = None
+        profile = self.simulator_extra_config["profile"]
+        if profile:
+            self.PROFILER = Profiler()
+            if isinstance(profile, dict) and "output" in profile:
+                self.profile_output = Path(context) / profile["output"]
+            self.build_report.append("Profiling enabled")
 
+        map_cache_dir = None
+        map_cache = self.simulator_extra_config["mapCache"]
+        if map_cache:
+            map_cache_dir = Path(context) / (map_cache if isinstance(map_cache, str) else DEFAULT_MAP_CACHE_DIR)
         import_external_component(context)
-        if "map" in config:
-            file = pathlib.Path(context) / config.get("map")
+        if config.map is not None:
+            file = pathlib.Path(context) / config.map
             self.build_report.append(f"Using simulation map {file}")
             simulation = map_parser.build_simulation_from_map(
-                file, simulation_components
+                file, simulation_components, cache_dir=map_cache_dir
             )
         else:
             self.build_report.append(
@@ -174,17 +240,34 @@ class Simulator:
         self.interactive = self.world.component_for_entity(1, Inventory).objects
 
         self.entities: List[Tuple[int, str]] = []
-        extra_entities = config.get("extraEntities", None)
+        extra_entities = config.extraEntities
         if extra_entities is not None:
             self.build_report.append(f"Loading extra entities from config")
-            extras = 0
-            for entity_definition in extra_entities:
-                ent_id = entity_definition.get("entId", f"extraEntity_{extras}")
-                extras += 1
-                self.add_entity(entity_definition, ent_id)
+            self.add_entities(extra_entities)
+        instances = config.instances
+        if instances is not None:
+            self.build_report.append(f"Loading {len(instances)} template instances from config")
+            self.add_instances(instances, config.templates)
 
+        self.context = context
+        self.init_runtime(cleanup)
+        self.build_report.append("========== SIMULATION LOADING COMPLETE ==========")
+        self.generate_simulation_build_report()
+        if LogLevel.WARN >= self.verbose:
+            print("\n".join(map(str.strip, self.build_report)))
+
+    def init_runtime(self, cleanup: CleanupFunction, initial_time: float = 0):
+        """
+        Creates the simulation environment and the state of the execution.
+        Everything that isn't built from the map and the config.
+        """
         self.EXIT: bool = False
-        self.ENV = simpy.Environment()
+        if self.REAL_TIME is not None:
+            self.ENV = simpy.rt.RealtimeEnvironment(
+                initial_time=initial_time, factor=self.REAL_TIME["factor"], strict=self.REAL_TIME["strict"]
+            )
+        else:
+            self.ENV = simpy.Environment(initial_time=initial_time)
         self.EXIT_EVENT = self.ENV.event()
         self.KWARGS: SystemArgs = {
             "ENV": self.ENV,
@@ -195,12 +278,114 @@ class Simulator:
             "_KILL_SWITCH": self.EXIT_EVENT,
             "EVENT_STORE": simpy.FilterStore(self.ENV),
             "WINDOW_OPTIONS": (self.window_dimensions, self.DEFAULT_LINE_WIDTH),
+            "TIMERS": Timers(self.ENV),
         }
         self.cleanups: typing.List[CleanupFunction] = [cleanup]
-        self.build_report.append("========== SIMULATION LOADING COMPLETE ==========")
-        self.generate_simulation_build_report()
-        if LogLevel.WARN >= self.verbose:
-            print("\n".join(map(str.strip, self.build_report)))
+        # Processors with always_tick need every tick, e.g. to poll external inputs
+        self.always_tick = False
+        self.skipped_ticks = 0
+        # Execution rate of the systems that don't run at FPS
+        self.system_rates: typing.Dict[esper.Processor, float] = {}
+        self.max_lag = 0.0
+        self.lagging_checks = 0
+        if self.PROFILER is not None:
+            self.PROFILER = Profiler()
+        # Schedule of the running simulation loop, and next execution times of a restored one
+        self.schedule: typing.List[list] = []
+        self.resume_ticks: typing.Optional[typing.List[float]] = None
+
+    def clone(self, cleanup: CleanupFunction = lambda: None) -> "Simulator":
+        """
+        Copy of the simulator as it was built, with its own world and environment.
+        The map isn't parsed again, so it's a cheap way to replicate a simulation.
+        Clone before adding systems: systems are not copied.
+        """
+        if len(self.world.processors) > 0 or self.ENV.peek() != math.inf:
+            raise RuntimeError("Simulator can only be cloned before systems are added")
+        simulator = copy.copy(self)
+        simulator.world, simulator.draw2ent, simulator.objects = copy.deepcopy(
+            (self.world, self.draw2ent, self.objects)
+        )
+        simulator.interactive = simulator.world.component_for_entity(1, Inventory).objects
+        simulator.entities = list(self.entities)
+        simulator.build_report = list(self.build_report)
+        simulator.init_runtime(cleanup)
+        return simulator
+
+    def snapshot(self, file: typing.Union[str, Path]):
+        """
+        Saves the state of the simulation to a file: the world (without its processors), draw2ent, objects,
+        the clock, the events in the EVENT_STORE, the next execution time of the esper systems
+        and the time left on the TIMERS of DES systems.
+        Systems are not saved. Take snapshots between ticks, e.g. from a DES process or after `run`.
+        See `Simulator.restore`.
+        """
+        header = {
+            "context": str(self.context),
+            "time": self.ENV.now,
+            "entities": len(self.world._entities),
+        }
+        state = {
+            "world": Snapshot.world_state(self.world),
+            "draw2ent": self.draw2ent,
+            "objects": self.objects,
+            "events": list(self.KWARGS["EVENT_STORE"].items),
+            "ticks": [entry[0] for entry in self.schedule],
+            "skipped_ticks": self.skipped_ticks,
+            "timers": self.KWARGS["TIMERS"].state(),
+        }
+        settings = {key: getattr(self, key) for key in SNAPSHOT_SETTINGS}
+        Snapshot.dump(file, header, settings, state, self.snapshot_shared())
+        logger.info(f"Snapshot of the simulation at {self.ENV.now} saved to {file}")
+
+    def snapshot_shared(self) -> typing.Dict[str, typing.Any]:
+        """Objects of the runtime that are saved by reference in snapshots."""
+        return {
+            "ENV": self.ENV,
+            "EVENT_STORE": self.KWARGS["EVENT_STORE"],
+            "_KILL_SWITCH": self.EXIT_EVENT,
+        }
+
+    @classmethod
+    def restore(
+        cls, file: typing.Union[str, Path], cleanup: CleanupFunction = lambda: print("Simulator Exited")
+    ) -> "Simulator":
+        """
+        Creates a simulator from a snapshot, with the clock where it was saved.
+        Systems have to be added again, as when the simulation was built. Their own state isn't saved:
+        What's in the world and the EVENT_STORE resumes exactly. Systems that only wait for events or act on components
+        (e.g. ScriptEventsDES, GotoDESProcessor, ManageObjects) continue where they stopped, and esper systems keep
+        their tick times. DES systems that sleep with TIMERS (ClockSystem, EnergyConsumptionDESProcessor, Seer and
+        SeerPlugin) wake up when they would have, if they are added in the same order. Other state kept by systems
+        (e.g. PathProcessor's velocity before a Path) starts empty, so simulations that depend on it diverge
+        from an uninterrupted run.
+        """
+        header, settings, compressed = Snapshot.read(file)
+        import_external_component(header["context"])
+        simulator = cls.__new__(cls)
+        for key, value in settings.items():
+            setattr(simulator, key, value)
+        simulator.context = header["context"]
+        simulator.world = simulator.draw2ent = simulator.objects = simulator.interactive = None
+        simulator.init_runtime(cleanup, header["time"])
+        state = Snapshot.load_state(compressed, simulator.snapshot_shared())
+        simulator.world = Snapshot.build_world(state["world"])
+        simulator.draw2ent = state["draw2ent"]
+        simulator.objects = state["objects"]
+        simulator.interactive = simulator.world.component_for_entity(1, Inventory).objects
+        simulator.KWARGS.update({
+            "WORLD": simulator.world,
+            "OBJECTS": simulator.objects,
+            "DRAW2ENT": simulator.draw2ent,
+            "INTERACTIVE": simulator.interactive,
+        })
+        simulator.skipped_ticks = state["skipped_ticks"]
+        simulator.resume_ticks = state["ticks"] or None
+        simulator.KWARGS["TIMERS"].resume.update(state.get("timers", {}))
+        simulator.KWARGS["EVENT_STORE"].items.extend(state["events"])
+        simulator.build_report.append(f"Restored from snapshot {file} at {header['time']}")
+        logger.info(f"Simulation restored from {file} at {header['time']}")
+        return simulator
 
     def generate_simulation_build_report(self):
         self.build_report.append(f"Simulation {self.simulation_name}\n")
@@ -238,23 +423,37 @@ class Simulator:
         DES systems can also inform a cleanup function. It will be executed when the simulator exits.
         """
         process_function: SystemProcessFunction = system[0]
-        self.ENV.process(process_function(self.KWARGS))
+        process = process_function(self.KWARGS)
+        if self.PROFILER is not None:
+            process = self.PROFILER.profile_process(system_name(process_function), process)
+        self.ENV.process(process)
         if len(system) == 2:
             self.cleanups.append(system[1])
 
-    def add_system(self, system):
+    def add_system(self, system, hz: typing.Optional[float] = None):
         """
         Adds an esper system to the simulation environment.
         These events inherit from esper.Processor and are executed at every simulation step.
         An argument kwargs: SystemArgs will be passed to these processors.
+        Processors with an `always_tick = True` attribute disable fast-forward.
+
+        Keyword Arguments:
+            hz: Optional[float] -- Rate, in executions per simulated second, of the system.
+                                   Default is the simulation FPS.
         """
-        if self.FPS == 0:
+        if hz is not None and hz <= 0:
+            raise ValueError(f"System rate should be positive. {hz} found for {system}.")
+        if self.FPS == 0 and hz is None:
             logger.warning(
                 f"Adding non-DES system {system}, but FPS was not given. System is useless."
             )
             self.build_report.append(
                 f"WARNING: Useless non-DES system {system} because no FPS was provided."
             )
+        if getattr(system, "always_tick", False):
+            self.always_tick = True
+        if hz is not None:
+            self.system_rates[system] = hz
         self.world.add_processor(system)
 
     def add_entity(self, entity_definition: EntityDefinition, ent_id: str):
@@ -269,32 +468,207 @@ class Simulator:
         if entity_definition.get("isObject", False):
             self.objects.append((ent, ent_id))
 
+    def add_entities(
+        self, entity_definitions: typing.List[EntityDefinition]
+    ) -> typing.List[int]:
+        """Adds many entities from json to world, in order. Returns the new entities.
+
+        Entities without an entId are named extraEntity_<index in the list>.
+        Component classes are looked up once per set of component names and the entities are inserted together.
+        """
+        constructors: typing.Dict[tuple, list] = {}
+        entity_components = []
+        for entity_definition in entity_definitions:
+            components = entity_definition.get("components", {})
+            signature = tuple(components.keys())
+            if signature not in constructors:
+                constructors[signature] = [component_constructor(name) for name in signature]
+            entity_components.append(
+                [constructor(*args) for constructor, args in zip(constructors[signature], components.values())]
+            )
+        ent_ids = [
+            entity_definition.get("entId", f"extraEntity_{idx}")
+            for idx, entity_definition in enumerate(entity_definitions)
+        ]
+        return self.insert_entities(entity_definitions, ent_ids, entity_components)
+
+    def add_instances(
+        self,
+        instances: typing.List[EntityInstance],
+        templates: typing.Dict[str, EntityTemplate],
+    ) -> typing.List[int]:
+        """Adds entities built from templates to world, in order. Returns the new entities.
+        See simulator.utils.templates.
+        """
+        builder = TemplateBuilder(templates, component_constructor)
+        entity_definitions, ent_ids, entity_components = [], [], []
+        for idx, instance in enumerate(instances):
+            ent_id = instance_id(instance, idx)
+            entity_definition, components = builder.build(instance, ent_id)
+            entity_definitions.append(entity_definition)
+            ent_ids.append(ent_id)
+            entity_components.append(components)
+        return self.insert_entities(entity_definitions, ent_ids, entity_components)
+
+    def insert_entities(
+        self,
+        entity_definitions: typing.List[EntityDefinition],
+        ent_ids: typing.List[str],
+        entity_components: typing.List[list],
+    ) -> typing.List[int]:
+        if isinstance(self.world, TrackedWorld):
+            ents = self.world.create_entities(entity_components)
+        else:
+            ents = [self.world.create_entity(*components) for components in entity_components]
+        for ent, ent_id, entity_definition in zip(ents, ent_ids, entity_definitions):
+            self.draw2ent[ent_id] = [ent, {"type": entity_definition["type"]}]
+            if entity_definition.get("isInteractive", False):
+                self.interactive[entity_definition.get("name", ent_id)] = ent
+            if entity_definition.get("isObject", False):
+                self.objects.append((ent, ent_id))
+        return ents
+
+    def is_idle(self) -> bool:
+        """
+        True if the esper systems have nothing to do in the next ticks.
+        That is, no entity has a non-zero Velocity, no Path is being followed
+        and no system needs to always be ticked.
+        """
+        if self.always_tick:
+            return False
+        for _ in self.world.get_component(PathComponent):
+            return False
+        for _, velocity in self.world.get_component(Velocity):
+            if velocity.x != 0 or velocity.y != 0 or velocity.alpha != 0:
+                return False
+        return True
+
+    def tick_schedule(self, previous: typing.Optional[typing.List[list]] = None) -> typing.List[list]:
+        """
+        Schedule of the esper systems, in priority order.
+        Each entry is [next execution time, period, process function, processor].
+        Systems without rate nor FPS never execute.
+        Systems in the previous schedule keep their next execution time, new ones start now.
+        Restored simulations continue with the execution times of the snapshot, if the same systems were added.
+        """
+        next_times = {id(entry[3]): entry[0] for entry in previous or []}
+        schedule = []
+        for processor in self.world.processors:
+            hz = self.system_rates.get(processor, self.FPS)
+            if hz <= 0:
+                continue
+            process = processor.process
+            if self.PROFILER is not None:
+                process = self.PROFILER.profile_function(type(processor).__name__, process)
+            schedule.append([next_times.get(id(processor), self.ENV.now), 1.0 / hz, process, processor])
+        if self.resume_ticks is not None:
+            if len(self.resume_ticks) == len(schedule):
+                for entry, next_time in zip(schedule, self.resume_ticks):
+                    entry[0] = max(next_time, self.ENV.now)
+            else:
+                logger.warning(
+                    f"Snapshot had {len(self.resume_ticks)} scheduled systems, but {len(schedule)} were added. "
+                    f"All systems start at {self.ENV.now}."
+                )
+            self.resume_ticks = None
+        return schedule
+
+    def skip_idle_ticks(self, schedule: typing.List[list]):
+        """
+        Moves every system to its first tick at or after the next scheduled simpy event.
+        Events in between ticks run before the tick, as they would without fast-forward.
+        The jump counts as the ticks skipped by the fastest system.
+        """
+        next_event = self.ENV.peek()
+        if next_event == math.inf:
+            return
+        skipped = 0
+        for entry in schedule:
+            if entry[0] < next_event:
+                ticks = math.ceil((next_event - entry[0]) / entry[1] - TICK_TOLERANCE)
+                entry[0] += ticks * entry[1]
+                skipped = max(skipped, ticks)
+        self.skipped_ticks += skipped
+
     def simulation_loop(self):
         """
-        The simulation loop
+        The simulation loop.
+        Systems share a common timeline. At each step, the systems whose time has come
+        are executed in priority order, and the loop sleeps until the next system is due.
+        Systems added or removed while running (e.g. by a DES system) are scheduled again on the next step.
         """
         # Local ref most used vars
-        process_esper_systems = self.world.process
+        world = self.world
+        clear_dead_entities = world.clear_dead_entities
         kill_switch = self.KWARGS["_KILL_SWITCH"]
         sleep = self.ENV.timeout
-        sleep_interval = 1.0 / self.FPS if self.FPS > 0 else None
+        schedule = self.schedule = self.tick_schedule()
+        version = world.processors_version
         # Collect info
         # Other processors
         while not self.EXIT:
-            start = datetime.now()
-            if sleep_interval:
-                process_esper_systems(self.KWARGS)
-            # # ticks on the clock
-            if sleep_interval:
-                switch = yield kill_switch | sleep(sleep_interval, False)
+            if world.processors_version != version:
+                version = world.processors_version
+                schedule = self.schedule = self.tick_schedule(schedule)
+            if schedule:
+                now = self.ENV.now
+                clear_dead_entities()
+                for entry in schedule:
+                    if entry[0] <= now + TICK_TOLERANCE:
+                        entry[2](self.KWARGS)
+                        entry[0] += entry[1]
+                if self.FAST_FORWARD and self.is_idle():
+                    self.skip_idle_ticks(schedule)
+                # # ticks on the clock
+                next_tick = min(entry[0] for entry in schedule)
+                switch = yield kill_switch | sleep(next_tick - now, False)
+            elif self.FPS > 0:
+                # Systems can still be added
+                switch = yield kill_switch | sleep(1.0 / self.FPS, False)
             else:
                 switch = yield kill_switch
             if kill_switch in switch:
                 break
+        if self.FAST_FORWARD:
+            logger.info(f"Fast-forward skipped {self.skipped_ticks} idle ticks")
         logger.debug(f"simulation loop exited")
 
+    def lag_monitor(self):
+        """
+        Measures how far behind the wall clock the simulation is, every lagCheckInterval simulated seconds.
+        Warns the first time the lag is above lagTolerance.
+        """
+        env: simpy.rt.RealtimeEnvironment = self.ENV
+        interval = self.REAL_TIME["lagCheckInterval"]
+        tolerance = self.REAL_TIME["lagTolerance"]
+        while True:
+            lag = time.monotonic() - (env.real_start + (env.now - env.env_start) * env.factor)
+            self.max_lag = max(self.max_lag, lag)
+            if lag > tolerance:
+                if self.lagging_checks == 0:
+                    logger.warning(f"Simulation is {lag:.3f}s behind real time at {env.now:.3f}")
+                self.lagging_checks += 1
+            yield env.timeout(interval)
+
+    def report_lag(self):
+        if self.lagging_checks > 0:
+            logger.warning(
+                f"Simulation could not keep up with real time: {self.lagging_checks} lag checks above "
+                f"{self.REAL_TIME['lagTolerance']}s. Max lag was {self.max_lag:.3f}s."
+            )
+        else:
+            logger.info(f"Simulation kept up with real time. Max lag was {self.max_lag:.3f}s.")
+
+    def report_profile(self):
+        logger.info(f"Systems profile:\n{self.PROFILER.table()}")
+        if self.profile_output is not None:
+            self.PROFILER.dump(self.profile_output)
+            logger.info(f"Systems profile saved to {self.profile_output.absolute()}")
+
     def gracious_exit(self):
         logger.info(f"Exiting gracefully")
+        if self.PROFILER is not None:
+            self.report_profile()
         while self.cleanups:
             next_function = self.cleanups.pop()
             logger.info(f"Executing clean-up function {next_function}")
@@ -310,6 +684,10 @@ class Simulator:
         """
         try:
             logger.info("============ SIMULATION EXECUTION ============")
+            if self.REAL_TIME is not None:
+                # Build and setup time doesn't count as lag
+                self.ENV.sync()
+                self.ENV.process(self.lag_monitor())
             if self.DURATION > 0:
                 self.ENV.process(self.simulation_loop())
                 self.ENV.run(until=self.DURATION)
@@ -317,6 +695,8 @@ class Simulator:
                 self.ENV.process(self.simulation_loop())
                 self.ENV.run(until=self.EXIT_EVENT)
             logger.info("============ SIMULATION EXECUTION FINISHED ============")
+            if self.REAL_TIME is not None:
+                self.report_lag()
             logger.info(f"{len(self.cleanups)} Clean up functions to execute")
         except RuntimeError as err:
             logger.error(f"Simulation aborted with critical error.")
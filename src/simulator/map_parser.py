@@ -12,33 +12,53 @@ from simulator.dynamic_builders import export_available_builders
 from simulator.utils.create_components import initialize_components
 from simulator.components.Inventory import Inventory
 from simulator.components.Skeleton import Skeleton
+from simulator.utils.TrackedWorld import TrackedWorld
+from simulator.utils import map_cache
 from xml.etree.ElementTree import Element
 from simulator.typehints.build_types import SimulationParseError, WindowOptions, DependencyNotFound
-from typing import List, Tuple
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
+# Attributes of cells that reference other cells
+DEPENDENCY_ATTRIBUTES = ['source', 'target', 'parent']
 
-def build_simulation_from_map(file: pathlib.Path, simulation_components=None, skip_map=False, line_width=10):
+
+def build_simulation_from_map(
+        file: pathlib.Path,
+        simulation_components=None,
+        skip_map=False,
+        line_width=10,
+        cache_dir: Optional[pathlib.Path] = None):
     """Creates the base for the simulation.
 
         If a map is provided, the simulation comes from the map.
         Otherwise, and empty simulation is created.
+        If cache_dir is given, maps are loaded from the compiled cache when possible (see utils.map_cache).
     """
     logger = logging.getLogger(__name__)
+    if cache_dir is not None and os.path.isfile(file) and not skip_map:
+        file = pathlib.Path(file)
+        simulation = map_cache.load(cache_dir, file, simulation_components, line_width)
+        if simulation is None:
+            simulation = build_simulation_from_map(file, simulation_components, skip_map, line_width)
+            map_cache.store(cache_dir, file, simulation_components, line_width, simulation)
+        return simulation
     if os.path.isfile(file) and not skip_map:
-        window_name, map_content = loader.map_from_drawio(file)
+        # Cells are parsed while the simulation objects are built
+        window_name, map_attributes, cells = loader.stream_drawio(file)
     else:
         if not skip_map:
             logger.error(f'Map file {file} does not exist. Creating empty simulation instead')
         window_name = 'Default'
-        map_content = Element('', attrib={})
+        map_attributes = {}
+        cells = None
 
-    width = int(map_content.attrib.get('pageWidth', 500))
-    height = int(map_content.attrib.get('pageHeight', 500))
+    width = int(map_attributes.get('pageWidth', 500))
+    height = int(map_attributes.get('pageHeight', 500))
 
     background_color = '#FFFFFF'
-    if 'background' in map_content.attrib:
-        background_color = map_content.attrib['background']
-    content_root = map_content[0] if len(map_content) > 0 else None
+    if 'background' in map_attributes:
+        background_color = map_attributes['background']
     # Create pyglet window
     # window = pyglet.window.Window(width=width,
     #                               height=height,
@@ -50,18 +70,18 @@ def build_simulation_from_map(file: pathlib.Path, simulation_components=None, sk
     # pyglet.gl.glClearColor(background_color[0], background_color[1], background_color[2], background_color[3])
     # pyglet.gl.glClear(pyglet.gl.GL_COLOR_BUFFER_BIT | pyglet.gl.GL_DEPTH_BUFFER_BIT)
 
-    world = esper.World()
+    world = TrackedWorld()
     simulation = world.create_entity(Inventory())  # Simulation is always the first entity
     if simulation_components is not None:
         initialized_components = initialize_components(simulation_components)
         for c in initialized_components:
             world.add_component(1, c)
 
-    if content_root:
+    if cells is not None:
         context = (file.parent if not skip_map else file) / 'builders'
         available_builders = export_available_builders([context])
         draw_map, objects, interactive = build_simulation_objects(
-            content_root,
+            cells,
             world,
             ((width, height), line_width),
             available_builders
@@ -83,13 +103,14 @@ def build_simulation_from_map(file: pathlib.Path, simulation_components=None, sk
 
 
 def build_simulation_objects(
-        content_root: Element,
+        content_root: Iterable[Element],
         world: esper.World,
         window_options: WindowOptions,
         available_builders: dict):
     """ Parses the XML Elements into esper entities.
 
         Parsing is done by transforming Element's attributes and annotations into components.
+        content_root can be the root Element of the map or an iterator over its cells (see load_resources.stream_drawio).
         There are 2 types of objects:
             1. Untyped objects -- Do not possess any type annotation. Used for building walls, for example.
                                   They have only basic components (e.g. Collision, Position, ...)
@@ -108,49 +129,123 @@ def build_simulation_objects(
     draw2entity = {}
     objects: List[Tuple[int, str]] = []
     interactive = {}
-    # If any object in the XML has dependencies that appear after it in the XML
-    # The builder can return a DependencyNotFound error, causing the cell to be deferred.
-    # Deferred cells are re-evaluated after the first pass is complete.
+    # Cells are built as soon as the cells they reference (see cell_dependencies) are built.
+    # Cells that reference cells not built yet wait for them, by the id of the missing cells.
+    built: Set[str] = set()
+    missing: Dict[int, Set[str]] = {}
+    waiting: Dict[str, List[Element]] = {}
+    parked: List[Element] = []
+    # Builders can still raise DependencyNotFound for dependencies that aren't references.
+    # Those cells are re-evaluated after all others.
     deferred: List[Element] = []
-    # 1st pass
-    for cell in content_root:
+
+    def build_cell(cell: Element, last_try=False) -> List[str]:
+        """Builds a cell. Returns the ids that can now be referenced, none if the cell wasn't built."""
+        ids = [cell.attrib['id']] if 'id' in cell.attrib else []
         if cell.tag == 'mxCell' and 'style' in cell.attrib:
             (components, style) = mxCellDecoder.parse_mxCell(cell, window_options)
             ent = world.create_entity()
             for c in components:
                 world.add_component(ent, c)
             draw2entity[style['id']] = [ent, style]
+            ids.append(style['id'])
         if cell.tag == 'object':
             cell_type = cell.attrib['type']
             try:
                 pending_updates = \
                     available_builders[cell_type].__dict__['build_object'](cell, world, window_options, draw2entity)
                 draw2entity.update(pending_updates[0])
-                objects += pending_updates[1]
+                objects.extend(pending_updates[1])
                 interactive.update(pending_updates[2])
+                ids.extend(pending_updates[0].keys())
             except DependencyNotFound as err:
-                deferred.append(cell)
-                logger.debug(f'Cell {cell.tag} deferred - {err}')
+                if last_try:
+                    logger.error(f'Cell {cell.tag} failed processing - {err}')
+                else:
+                    deferred.append(cell)
+                    logger.debug(f'Cell {cell.tag} deferred - {err}')
+                return []
             except KeyError as err:
                 logger.error(f'Builder for type {err} not found. Check that you have that builder imported.')
                 raise SimulationParseError(f'Failed to create simulation object. Missing builder {err}')
-    # 2nd pass
+        return ids
+
+    def build_ready(cell: Element, last_try=False):
+        """Builds the cell, then the cells that were only waiting for it (and so on).
+        last_try only applies to the cell itself: the cells it releases can still be deferred.
+        """
+        ready = deque([(cell, last_try)])
+        while ready:
+            cell, last_try = ready.popleft()
+            for cell_id in build_cell(cell, last_try):
+                if cell_id in built:
+                    continue
+                built.add(cell_id)
+                for waiter in waiting.pop(cell_id, []):
+                    waiter_missing = missing[id(waiter)]
+                    waiter_missing.discard(cell_id)
+                    if not waiter_missing:
+                        del missing[id(waiter)]
+                        ready.append((waiter, False))
+
+    for cell in content_root:
+        dependencies = cell_dependencies(cell) - built
+        if not dependencies:
+            build_ready(cell)
+            continue
+        missing[id(cell)] = dependencies
+        parked.append(cell)
+        for dependency in dependencies:
+            waiting.setdefault(dependency, []).append(cell)
+
+    # Deferred cells release the cells waiting for them once they are built.
+    # Cells deferred during the retries are appended, and retried too.
     for cell in deferred:
-        if cell.tag == 'mxCell' and 'style' in cell.attrib:
-            (components, style) = mxCellDecoder.parse_mxCell(cell, window_options)
-            ent = world.create_entity()
-            for c in components:
-                world.add_component(ent, c)
-            draw2entity[style['id']] = [ent, style]
-        if cell.tag == 'object':
-            cell_type = cell.attrib['type']
-            try:
-                pending_updates = \
-                    available_builders[cell_type].__dict__['build_object'](cell, world, window_options, draw2entity)
-                draw2entity.update(pending_updates[0])
-                objects += pending_updates[1]
-                interactive.update(pending_updates[2])
-            except DependencyNotFound as err:
-                logger.error(f'Cell {cell.tag} failed processing - {err}')
+        build_ready(cell, last_try=True)
+    # Cells still waiting are in cycles or reference cells that don't exist
+    unresolved = [cell for cell in parked if id(cell) in missing]
+    if unresolved:
+        cycle = find_dependency_cycle(unresolved, missing)
+        if cycle:
+            logger.error(f'Dependency cycle between cells {" -> ".join(cycle)}')
+        for cell in unresolved:
+            logger.warning(f'Cell {cell.attrib.get("id", cell.tag)} references missing cells {missing[id(cell)]}')
+            build_cell(cell, last_try=True)
 
     return draw2entity, objects, interactive
+
+
+def cell_dependencies(cell: Element) -> Set[str]:
+    """Ids of the cells a cell references (source, target and parent), in itself or in its mxCell."""
+    references = set()
+    for element in [cell] + cell.findall('mxCell'):
+        for attribute in DEPENDENCY_ATTRIBUTES:
+            if attribute in element.attrib:
+                references.add(element.attrib[attribute])
+    references.discard(cell.attrib.get('id', None))
+    return references
+
+
+def find_dependency_cycle(cells: List[Element], missing: Dict[int, Set[str]]) -> Optional[List[str]]:
+    """A cycle of cell ids in the dependencies of the cells, if there's one."""
+    graph = {cell.attrib['id']: sorted(missing[id(cell)]) for cell in cells if 'id' in cell.attrib}
+    done: Set[str] = set()
+    for start in graph:
+        if start in done:
+            continue
+        # Depth first search. The stack has the path from start, with the next dependency to visit of each node.
+        path = [start]
+        stack = [(start, iter(graph[start]))]
+        while stack:
+            node, dependencies = stack[-1]
+            dependency = next(dependencies, None)
+            if dependency is None:
+                done.add(node)
+                stack.pop()
+                path.pop()
+            elif dependency in path:
+                return path[path.index(dependency):] + [dependency]
+            elif dependency in graph and dependency not in done:
+                path.append(dependency)
+                stack.append((dependency, iter(graph[dependency])))
+    return None
@@ -2,6 +2,7 @@
    TODO: Complete description with exported functions...
 """
 import typing
+import functools
 from simulator import dynamic_models
 import simulator.utils.helpers as helpers
 
@@ -12,18 +13,21 @@ from xml.etree.ElementTree import Element
 available_models = dynamic_models.export_available_models()
 
 
+@functools.lru_cache(maxsize=helpers.STYLE_CACHE_SIZE)
+def model_for_style(style: str) -> typing.Callable:
+    """The from_mxCell function of the model for cells with a style string. Unknown shapes use the default model."""
+    shape = helpers.style_mapping(style).get('shape', '')
+    model = available_models.get(shape, available_models['default'])
+    return model.__dict__['from_mxCell']
+
+
 def parse_mxCell(el: Element, window_options: WindowOptions):
     """Parses an mxCell extracted from .drawio XML"""
     if el.tag != 'mxCell':
         raise Exception(f"Element {el.tag} is not mxCell.")
 
     window_size, line_width = window_options
-    cell_style = helpers.parse_style(el.attrib['style'])
-    style = cell_style.get('shape', '')
-    if style in available_models:
-        obj = available_models[style].__dict__['from_mxCell'](el, line_width)
-    else:
-        obj = available_models['default'].__dict__['from_mxCell'](el, line_width)
+    obj = model_for_style(el.attrib['style'])(el, line_width)
     # Adds the cell id before returning
     obj[1]['id'] = el.attrib['id']
     pos = obj[0][0]
@@ -1,4 +1,3 @@
-import pyglet
 import math
 import simulator.utils.helpers as helpers
 
@@ -53,6 +52,7 @@ class Rectangle:
             points_print.append(int(p[1]))
             colors += color[:3]
 
+        import pyglet
         return batch.add(4, pyglet.gl.GL_QUADS, None,
                          ('v2f', points_print),
                          ('c3B', colors)
@@ -99,6 +99,7 @@ class Line:
             points.append(t[1])
             color_array += color[0:3]
 
+        import pyglet
         return batch.add(
             len(points) // 2,
             pyglet.gl.GL_LINES,
@@ -148,6 +149,7 @@ class Ellipse():
             v.append(p[0])
             v.append(p[1])
 
+        import pyglet
         return batch.add(
             len(v) // 2,
             pyglet.gl.GL_POLYGON,
@@ -1,17 +1,14 @@
-import pyglet
 import os
 import zlib
 import base64
 
-from urllib.parse import unquote
+from urllib.parse import unquote, unquote_to_bytes
+from typing import Iterator, Optional, Tuple
 import xml.etree.ElementTree as ET
 
 working_dir = os.path.dirname(os.path.realpath(__file__))
 images_dir = os.path.join(working_dir, 'images')
 
-pyglet.resource.path = [working_dir, images_dir]
-pyglet.resource.reindex()
-
 
 def inflate(b, b64=False):
     """~2016 draw.io started compressing 'using standard deflate'
@@ -30,6 +27,111 @@ def inflate(b, b64=False):
 #                                 batch=batch)
 
 
+def inflate_chunks(text: str, chunk_size: int = 1 << 16) -> Iterator[bytes]:
+    """Incremental inflate(text, True). Yields the utf8 encoded XML in chunks."""
+    text = ''.join(text.split())
+    decompressor = zlib.decompressobj(-15)
+    # Percent escapes split between chunks are kept for the next one
+    pending = b''
+    step = chunk_size - chunk_size % 4 or 4
+    for start in range(0, len(text), step):
+        data = pending + decompressor.decompress(base64.b64decode(text[start:start + step]))
+        cut = data.rfind(b'%', max(0, len(data) - 2))
+        if cut >= 0:
+            data, pending = data[:cut], data[cut:]
+        else:
+            pending = b''
+        yield unquote_to_bytes(data)
+    yield unquote_to_bytes(pending + decompressor.flush())
+
+
+def stream_drawio(drawioxml, chunk_size: int = 1 << 16) -> Tuple[str, dict, Iterator[ET.Element]]:
+    """Streaming version of map_from_drawio.
+       Cells of the map are parsed as they are consumed, and dropped from the tree after,
+       so the whole (decompressed) diagram is never in memory.
+
+       RETURNS:
+           (window_name, attributes, cells) -- Window Name, default is "Window 1".
+                                               Attributes of the map content element (e.g. pageWidth).
+                                               Iterator over the cells (mxCell and object Elements) of the map.
+    """
+    stream = _stream_drawio(drawioxml, chunk_size)
+    window_name, attributes = next(stream)
+    return window_name, attributes, stream
+
+
+def _pull_events(parser: ET.XMLPullParser, chunks) -> Iterator[Tuple[str, ET.Element]]:
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+
+def _file_chunks(drawioxml, chunk_size: int) -> Iterator[bytes]:
+    with open(drawioxml, 'rb') as fd:
+        while True:
+            chunk = fd.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _stream_drawio(drawioxml, chunk_size: int):
+    """Yields (window_name, attributes) of the map, then its cells."""
+    events = _pull_events(ET.XMLPullParser(['start', 'end']), _file_chunks(drawioxml, chunk_size))
+    window_name = "Window 1"
+    depth = 0
+    for event, elem in events:
+        if event == 'end':
+            depth -= 1
+            if depth == 1 and elem.tag == 'diagram':
+                # Compressed diagram. Content is in the text.
+                text, elem.text = elem.text, None
+                inner = _pull_events(ET.XMLPullParser(['start', 'end']), inflate_chunks(text, chunk_size))
+                yield from _content_cells(inner, window_name, 0)
+                return
+            continue
+        depth += 1
+        if depth == 2:
+            window_name = elem.attrib.get('name', window_name)
+            if elem.tag != 'diagram':
+                yield from _content_cells(events, window_name, depth, elem)
+                return
+        elif depth == 3:
+            # Uncompressed diagram
+            yield from _content_cells(events, window_name, depth, elem)
+            return
+    yield window_name, {}
+
+
+def _content_cells(events, window_name: str, depth: int, content: Optional[ET.Element] = None):
+    """Yields (window_name, attributes) of the content element, then the children of its first child.
+       If content is None, it's the first element of the events.
+    """
+    if content is None:
+        for event, elem in events:
+            depth += 1
+            content = elem
+            break
+    base = depth
+    yield window_name, dict(content.attrib) if content is not None else {}
+    root: Optional[ET.Element] = None
+    for event, elem in events:
+        if event == 'start':
+            depth += 1
+            if depth == base + 1 and root is None:
+                root = elem
+            continue
+        depth -= 1
+        if depth == base + 1 and root is not None and elem is not root:
+            yield elem
+            # Processed cells don't stay in the tree
+            root.remove(elem)
+        elif depth < base:
+            return
+
+
 def map_from_drawio(drawioxml):
     """Retrieve expanded XML from .drawio file in ET
 
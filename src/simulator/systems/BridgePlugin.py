@@ -1,11 +1,9 @@
 import esper
-import uvicorn
 import logging
 import threading
 import collections
 
 from simpy import FilterStore
-from fastapi import FastAPI
 from queue import Queue
 from typing import Any, Dict, Type, Optional
 
@@ -14,14 +12,27 @@ from simulator.typehints.component_types import Component, EVENT
 from simulator.components.Map import Map
 from simulator.components.Position import Position
 from simulator.components.Velocity import Velocity
+from simulator.utils.Recorder import InputFeed
 
 
 logging.getLogger("uvicorn").setLevel(logging.CRITICAL)
 
 
 class BridgeProcessor(esper.Processor):
-    def __init__(self, exposed_components: dict[str, Type[Component]] = None):
+    # Events from the API are polled every tick, so ticks can't be skipped
+    always_tick = True
+
+    def __init__(self, exposed_components: dict[str, Type[Component]] = None, feed: Optional[InputFeed] = None):
+        """
+        Keyword Arguments:
+            feed -- InputFeed the triggered events go through, to record or replay them.
+                    The API server isn't started if the feed isn't live.
+        """
+        # FastAPI and uvicorn are only needed by the bridge, don't load them with the simulator
+        from fastapi import FastAPI
+
         self.started = False
+        self.feed = feed if feed is not None else InputFeed()
         self.logger = logging.getLogger(__name__)
         self.api_thread = None
         self.event_queue = Queue()  # Queue for events
@@ -84,6 +95,8 @@ class BridgeProcessor(esper.Processor):
         """Start the FastAPI server in a separate thread."""
 
         def run_server():
+            import uvicorn
+
             log_config = (
                 uvicorn.config.LOGGING_CONFIG
             )  # Get Uvicorn's default log config
@@ -187,12 +200,14 @@ class BridgeProcessor(esper.Processor):
         """Process method to handle events from the queue."""
         event_store = self._get_event_store(kwargs)
 
-        if not self.started:
+        if not self.started and self.feed.live:
             self.start()
 
         # Consume events from the queue
+        received = []
         while not self.event_queue.empty():
-            event_data = self.event_queue.get_nowait()
+            received.append(self.event_queue.get_nowait())
+        for event_data in self.feed.inputs(kwargs["ENV"].now, received):
             self.logger.info(f"Processing event: {event_data}")
 
             event = self._parse_event(event_data)
@@ -202,4 +217,5 @@ class BridgeProcessor(esper.Processor):
             # Handle the event in your ECS logic
 
     def clean(self):
-        self.api_thread.join(timeout=1)
+        if self.api_thread is not None:
+            self.api_thread.join(timeout=1)
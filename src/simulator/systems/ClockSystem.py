@@ -1,6 +1,7 @@
 import logging
 from datetime import datetime, timedelta
 from simulator.typehints.dict_types import SystemArgs
+from simulator.utils.Timers import timeout_function
 
 from queue import Queue
 traces = []
@@ -9,7 +10,7 @@ traces = []
 def process(kwargs: SystemArgs):
     env = kwargs['ENV']
     event_store = kwargs['EVENT_STORE']
-    sleep = env.timeout
+    sleep = timeout_function(kwargs, 'ClockSystem')
     total = timedelta()
     traces.append('env_time,total_time,avg_simulation_second,event_store_size\n')
     while True:
@@ -8,14 +8,8 @@ from simulator.components.Position import Position
 from typing import NamedTuple
 from simulator.typehints.dict_types import SystemArgs
 from simulator.typehints.component_types import EVENT
-from datetime import timedelta
 
-from colorama import init, Fore
 
-init()
-
-
-COLORS = [Fore.BLUE, Fore.CYAN, Fore.RED, Fore.GREEN, Fore.YELLOW, Fore.WHITE]
 CollisionPayload = NamedTuple('CollisionEvent', [('ent', int), ('other_ent', int)])
 
 
@@ -23,11 +17,8 @@ class CollisionProcessor(esper.Processor):
     def __init__(self):
         super().__init__()
         self.logger = logging.getLogger(__name__)
-        self.total = timedelta()
-        self.runs = 0
 
     def process(self, kwargs: SystemArgs):
-        # start = datetime.now()
         eventStore = kwargs.get('EVENT_STORE', None)
         all_collidables = self.world.get_components(Collidable, Position)
         for ent, (col, pos, vel) in self.world.get_components(Collidable, Position, Velocity):
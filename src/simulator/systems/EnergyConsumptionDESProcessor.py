@@ -5,6 +5,7 @@ from simpy import Environment
 from esper import World
 
 from simulator.components.BatteryComponent import Battery
+from simulator.utils.Timers import timeout_function
 
 # Clock independente do tick da simulação - 1s
 # Buscar no mundo as entidades que tem componente Battery
@@ -25,10 +26,11 @@ def process(kwargs: SystemArgs):
         raise Exception("Can't find eventStore")
     if env is None:
         raise Exception("Can't find env")
+    sleep = timeout_function(kwargs, 'EnergyConsumption')
 
     while True:
         item = event_store.get(lambda ev: ev.type == CHANGE_ACTION_TAG)
-        timeout = env.timeout(1)
+        timeout = sleep(1)
         event = yield item | timeout
         if item in event:
             # Event
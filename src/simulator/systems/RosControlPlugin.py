@@ -2,6 +2,7 @@ from simulator.typehints.dict_types import SystemArgs
 from simulator.typehints.component_types import EVENT, ERROR
 from simulator.typehints.ros_types import RosActionServer
 from simulator.typehints.ros_types import RosTopicServer
+from simulator.utils.Recorder import InputFeed
 
 import logging
 
@@ -27,13 +28,22 @@ class RosControlPlugin(object):
     This object deals with the Ros integration with HMRSim
     """
 
-    def __init__(self, scan_interval: float):
+    def __init__(self, scan_interval: float, feed: InputFeed = None):
+        """
+        Keyword Arguments:
+            feed -- InputFeed the topic messages go through, to record or replay them.
+                    Action goals are not recorded. The node isn't spun if the feed isn't live.
+        """
         super().__init__()
         self.logger = logging.getLogger(__name__)
         self.logger.info("Initialized rclpy.")
         self.node = RosControlNode()
         self.scan_interval = scan_interval
         self.services = []
+        self.feed = feed if feed is not None else InputFeed()
+        # Topic messages received in the last spin, as [topic, data], and the callbacks of each topic
+        self.received = []
+        self.listeners = {}
     
     def create_action_server(self, service: RosActionServer):
         """
@@ -56,7 +66,9 @@ class RosControlPlugin(object):
         Also adds the service to the services used in this plugin.
         """
         self.services.append(service)
-        self.node.create_subscription(String, service.get_name(), service.get_listener_callback(), 10)
+        topic = service.get_name()
+        self.listeners[topic] = service.get_listener_callback()
+        self.node.create_subscription(String, topic, lambda msg: self.received.append([topic, msg.data]), 10)
 
     def process(self, kwargs: SystemArgs):
         """
@@ -65,7 +77,13 @@ class RosControlPlugin(object):
         while True:
             env: Environment = kwargs.get('ENV', None)
             sleep = env.timeout
-            rclpy.spin_once(self.node, timeout_sec=0.1)
+            if self.feed.live:
+                rclpy.spin_once(self.node, timeout_sec=0.1)
+            received, self.received = self.received, []
+            for topic, data in self.feed.inputs(env.now, received):
+                msg = String()
+                msg.data = data
+                self.listeners[topic](msg)
 
             # notifying the services
             for service in self.services:
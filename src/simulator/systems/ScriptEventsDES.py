@@ -30,8 +30,12 @@ def init(extra_instructions: List[ExtraInstruction], watch_list: List[str]):
         env: Environment = kwargs.get('ENV', None)
         if __event_store is None:
             raise Exception("Can't find eventStore")
-        # On the first run, we put all the scripts in the world in the event queue
+        # On the first run, we put all the ready scripts in the world in the event queue.
+        # Scripts already in the queue (e.g. in a restored simulation) are not added again
+        queued = {e.payload.ent for e in __event_store.items if e.type == ExecuteInstructionTag}
         for ent, Script in __world.get_component(scriptComponent.Script):
+            if Script.state != scriptComponent.States.READY or ent in queued:
+                continue
             payload = ExecutePayload(ent=ent)
             new_event = EVENT(ExecuteInstructionTag, payload)
             __event_store.put(new_event)
@@ -1,6 +1,7 @@
 from simulator.typehints.dict_types import SystemArgs
 from simulator.components.Position import Position
 from simulator.components.Skeleton import Skeleton
+from simulator.utils.Timers import timeout_function
 
 from simpy import FilterStore, Environment
 from typing import List, Callable
@@ -38,6 +39,7 @@ class Seer:
         self.world = self._get_world(kwargs)
         self.event_store = self._get_event_store(kwargs)
         self.env = self._get_environment(kwargs)
+        sleep = timeout_function(kwargs, 'Seer')
 
         self.start()
 
@@ -50,7 +52,7 @@ class Seer:
 
             self.send_message(message)
 
-            yield self.env.timeout(self.scan_interval)
+            yield sleep(self.scan_interval)
 
     def _get_world(self, kwargs: SystemArgs) -> World:
         world = kwargs.get("WORLD")
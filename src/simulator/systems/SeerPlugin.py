@@ -1,8 +1,24 @@
+"""Seer plugin. Periodically reports the Skeleton and Position of changed entities to consumers.
+
+In a TrackedWorld, only the entities marked as dirty or deleted since the last scan are visited,
+so a frame costs O(changed + deleted) instead of a scan of the whole world.
+
+The simulation thread only produces messages. Each consumer has its own bounded buffer
+and worker thread, so a slow consumer (e.g. network sinks) doesn't hold back the others.
+What happens when a buffer is full is defined by its BackpressurePolicy.
+
+Consumers that fall behind can have their backlog coalesced: once more than
+`coalesce_threshold` messages are queued, the queued frames are merged into one
+with the latest state of each entity. Live viewers stay real-time this way,
+while lossless consumers (e.g. replay files) get every frame.
+"""
 import threading
 import logging
 import json
-from queue import Queue
-from typing import Callable, List
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
 from simulator.typehints.dict_types import SystemArgs
 
 from simpy import Environment
@@ -10,33 +26,245 @@ from esper import World
 
 from simulator.components.Skeleton import Skeleton
 from simulator.components.Position import Position
+from simulator.utils.TrackedWorld import ChangeTracker, TrackedWorld
+from simulator.utils.Timers import timeout_function
+
+SeerMessage = Tuple[dict, int]
+
+
+class BackpressurePolicy(Enum):
+    """What a full consumer buffer does with a new message."""
+    BLOCK = 'block'  # The simulation waits for the consumer
+    DROP_OLDEST = 'drop-oldest'  # The oldest queued message is discarded
+    COALESCE = 'coalesce'  # The new frame is merged into the newest queued frame
+
+
+@dataclass
+class SeerConsumer:
+    """Delivery options for a Seer consumer.
+
+    Plain callables passed to `init` are wrapped with the default options.
+
+    Arguments:
+        callback -- Called as callback(message, msg_idx), or callback(list_of_(message, msg_idx)) if batch is True.
+        batch -- Deliver lists of messages, so I/O heavy consumers can amortize round-trips.
+        max_batch -- Maximum number of messages delivered at once.
+        buffer_size -- Size of the consumer buffer. Default is the one passed to `init`.
+        policy -- BackpressurePolicy of the consumer buffer. Default is the one passed to `init`.
+        coalesce_threshold -- Backlog size above which queued frames are merged. Default is the one passed to `init`.
+        lossless -- Deliver every frame. The buffer blocks when full and is never coalesced.
+        idle_timeout -- Batch consumers are called with an empty list after idle_timeout seconds without messages
+                        (e.g. to flush pending writes). Default is None, never.
+    """
+    callback: Callable
+    batch: bool = False
+    max_batch: int = 32
+    buffer_size: Optional[int] = None
+    policy: Optional[BackpressurePolicy] = None
+    coalesce_threshold: Optional[int] = None
+    lossless: bool = False
+    idle_timeout: Optional[float] = None
+
+
+def merge_frames(older: dict, newer: dict, known: Optional[Set[str]] = None) -> dict:
+    """Merges two Seer frames into one with the latest state of each entity.
+
+    Skeletons are keyed by id, so the newer data wins.
+    Deleted lists are joined, except for entities that the newer frame reports again.
+    known are the ids the consumer will have seen before the older frame. Entities created in the older frame
+    and deleted in the newer one are dropped, since the consumer never sees them.
+    """
+    merged = dict(older)
+    deleted = list(merged.pop('deleted', []))
+    for key, value in newer.items():
+        if key == 'deleted':
+            continue
+        merged[key] = value
+        if key in deleted:
+            deleted.remove(key)
+    for skeleton_id in newer.get('deleted', []):
+        created = known is not None and skeleton_id in older and skeleton_id not in known
+        merged.pop(skeleton_id, None)
+        if not created and skeleton_id not in deleted:
+            deleted.append(skeleton_id)
+    if len(deleted) > 0:
+        merged['deleted'] = deleted
+    return merged
+
+
+def track_ids(ids: Set[str], message: dict):
+    """Updates the ids a consumer has seen with the ones reported and deleted by a message."""
+    ids.update(key for key in message if key != 'deleted')
+    ids.difference_update(message.get('deleted', []))
+
 
-message_buffer = Queue()
+def is_pinned(item: SeerMessage) -> bool:
+    """The window message, the first full frame and the end message are never dropped or merged."""
+    return item[1] <= 1
 
 
-def consumer_manager(consumers: List[Callable], also_log: bool):
+class MessageBuffer:
+    """Bounded ring buffer between the simulation thread and a consumer worker."""
+
+    def __init__(self, size: int, policy: BackpressurePolicy, coalesce_threshold: Optional[int] = None):
+        if size < 1:
+            raise ValueError(f'Seer buffer size must be positive. {size} found.')
+        self.size = size
+        self.policy = policy
+        self.coalesce_threshold = coalesce_threshold
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.dropped = 0
+        self.coalesced = 0
+        # Ids in the messages taken from the buffer
+        self.delivered: Set[str] = set()
+
+    def put(self, item: SeerMessage):
+        with self.condition:
+            if len(self.items) >= self.size and not is_pinned(item):
+                if self.policy == BackpressurePolicy.BLOCK:
+                    self.condition.wait_for(lambda: len(self.items) < self.size)
+                elif self.policy == BackpressurePolicy.DROP_OLDEST:
+                    self._drop_oldest()
+                elif self._coalesce(item):
+                    return
+            self.items.append(item)
+            self.condition.notify_all()
+
+    def get_batch(self, max_items: int, timeout: Optional[float] = None) -> List[SeerMessage]:
+        """Blocks until there are messages. Returns at most max_items of them, oldest first.
+        Returns an empty list if there are no messages after timeout seconds.
+        """
+        with self.condition:
+            if not self.condition.wait_for(lambda: len(self.items) > 0, timeout):
+                return []
+            if self.coalesce_threshold is not None and len(self.items) > self.coalesce_threshold:
+                self._coalesce_backlog()
+            batch = []
+            while self.items and len(batch) < max_items:
+                batch.append(self.items.popleft())
+                track_ids(self.delivered, batch[-1][0])
+            self.condition.notify_all()
+            return batch
+
+    def _drop_oldest(self):
+        for idx, queued in enumerate(self.items):
+            if not is_pinned(queued):
+                del self.items[idx]
+                self.dropped += 1
+                return
+
+    def _coalesce_backlog(self):
+        """Merges each run of queued frames into a single frame. Pinned messages are kept in place."""
+        backlog = deque()
+        known = set(self.delivered)
+        for item in self.items:
+            if backlog and not is_pinned(item) and not is_pinned(backlog[-1]):
+                backlog[-1] = (merge_frames(backlog[-1][0], item[0], known), item[1])
+                self.coalesced += 1
+            else:
+                if backlog:
+                    track_ids(known, backlog[-1][0])
+                backlog.append(item)
+        self.items = backlog
+
+    def _coalesce(self, item: SeerMessage) -> bool:
+        newest = self.items[-1]
+        if is_pinned(newest):
+            return False
+        known = set(self.delivered)
+        if 'deleted' in item[0]:
+            for idx in range(len(self.items) - 1):
+                track_ids(known, self.items[idx][0])
+        self.items[-1] = (merge_frames(newest[0], item[0], known), item[1])
+        self.coalesced += 1
+        return True
+
+
+def scan_world(world: World, reported: Dict[int, str]) -> Tuple[List[int], Set[int]]:
+    """Finds changed and deleted entities by going through the entire world.
+
+    Changed entities are the ones not reported yet or with the `changed` flag set.
+    Deleted entities are reported ones that no longer have a Skeleton and a Position.
+    """
+    present = set()
+    changed = []
+    for ent, (skeleton, position) in world.get_components(Skeleton, Position):
+        present.add(ent)
+        if ent not in reported or position.changed or skeleton.changed:
+            changed.append(ent)
+    deleted = set(ent for ent in reported if ent not in present)
+    return changed, deleted
+
+
+def consumer_worker(consumer: SeerConsumer, buffer: MessageBuffer):
     logger = logging.getLogger(__name__ + '.consumer')
-    logging.addLevelName(15, 'SEER')
+    timeout = consumer.idle_timeout if consumer.batch else None
     while True:
-        message, msg_idx = message_buffer.get()  # Blocking function
-        # print(message)
-        if also_log:
-            logger.log(15, message)
-        for c in consumers:
-            c(message, msg_idx)
-        message_buffer.task_done()
-        if 'theEnd' in message:
+        batch = buffer.get_batch(consumer.max_batch, timeout)
+        # A failing delivery is logged and skipped. The worker keeps draining the buffer until the end message,
+        # otherwise the simulation would block on a full buffer.
+        if consumer.batch:
+            try:
+                consumer.callback(batch)
+            except Exception:
+                logger.exception(f'Seer consumer {consumer.callback} failed to deliver {len(batch)} messages')
+        else:
+            for message, msg_idx in batch:
+                try:
+                    consumer.callback(message, msg_idx)
+                except Exception:
+                    logger.exception(f'Seer consumer {consumer.callback} failed to deliver message {msg_idx}')
+        if batch and 'theEnd' in batch[-1][0]:
             break
-    logger.log(15, f'Exiting consumer manager')
+    logger.log(15, f'Exiting consumer worker {consumer.callback}')
     return
 
 
-def init(consumers: List[Callable], scan_interval: float, also_log=False):
-    # Init consumer thread
-    thread = threading.Thread(target=consumer_manager, args=[consumers, also_log])
-    thread.start()
+def init(
+        consumers: List[Union[Callable, SeerConsumer]],
+        scan_interval: float,
+        also_log=False,
+        buffer_size: int = 256,
+        policy: BackpressurePolicy = BackpressurePolicy.BLOCK,
+        coalesce_threshold: Optional[int] = None):
+    logging.addLevelName(15, 'SEER')
+    consumers = [c if isinstance(c, SeerConsumer) else SeerConsumer(c) for c in consumers]
+    if also_log:
+        consumer_logger = logging.getLogger(__name__ + '.consumer')
+        consumers.append(SeerConsumer(lambda message, _: consumer_logger.log(15, message), lossless=True))
+    for consumer in consumers:
+        if consumer.lossless:
+            if consumer.policy not in [None, BackpressurePolicy.BLOCK] or consumer.coalesce_threshold is not None:
+                raise ValueError(f'Lossless Seer consumer {consumer.callback} can only use the BLOCK policy')
+    # Init one buffer and worker thread per consumer
+    # Threads are started once every buffer is created, so invalid options don't leave workers waiting forever
+    buffers: List[MessageBuffer] = []
+    threads: List[threading.Thread] = []
+    for consumer in consumers:
+        if consumer.lossless:
+            buffer = MessageBuffer(
+                consumer.buffer_size if consumer.buffer_size is not None else buffer_size,
+                BackpressurePolicy.BLOCK
+            )
+        else:
+            buffer = MessageBuffer(
+                consumer.buffer_size if consumer.buffer_size is not None else buffer_size,
+                consumer.policy if consumer.policy is not None else policy,
+                consumer.coalesce_threshold if consumer.coalesce_threshold is not None else coalesce_threshold
+            )
+        buffers.append(buffer)
+        threads.append(threading.Thread(target=consumer_worker, args=[consumer, buffer]))
+    for thread in threads:
+        thread.start()
+    # ChangeTrackers subscribed by the process, unsubscribed on cleanup
+    trackers: List[Tuple[TrackedWorld, ChangeTracker]] = []
+
+    def publish(message: dict, msg_idx: int):
+        for buffer in buffers:
+            buffer.put((message, msg_idx))
 
-    # The producer thread
+    # The producer
 
     def process(kwargs: SystemArgs):
         event_store = kwargs.get('EVENT_STORE', None)
@@ -57,27 +285,40 @@ def init(consumers: List[Callable], scan_interval: float, also_log=False):
             "window_name": simulation_skeleton.id,
             "dimensions": size
         }
-        message_buffer.put((base, msg_idx))
+        publish(base, msg_idx)
         msg_idx += 1
         # Scan simulation situation every scan_interval seconds and report
-        last_round: dict = {}
+        # TrackedWorlds report what changed, other worlds are scanned in full
+        tracker = world.track() if isinstance(world, TrackedWorld) else None
+        if tracker is not None:
+            trackers.append((world, tracker))
+        reported: Dict[int, str] = {}
         # Local ref most used functions
-        get_components = world.get_components
-        sleep = env.timeout
+        has_components = world.has_components
+        component_for_entity = world.component_for_entity
+        sleep = timeout_function(kwargs, 'SeerPlugin')
         while True:
 
             new_message = {
                 "timestamp": round(float(env.now), 3)
             }
-            for ent, (skeleton, position) in get_components(Skeleton, Position):
+            if tracker is None or msg_idx == 1:
+                changed, deleted = scan_world(world, reported)
+                if tracker is not None:
+                    tracker.drain()
+            else:
+                dirty, deleted = tracker.drain()
+                changed = []
+                for ent in sorted(dirty):
+                    if has_components(ent, Skeleton, Position):
+                        changed.append(ent)
+                    elif ent in reported:  # Lost its Skeleton or Position
+                        deleted.add(ent)
+            for ent in changed:
                 if ent == 1:  # Entity 1 is the entire model
                     continue
-                elif last_round.get(ent, (0, None))[0] != 0 and not position.changed and not skeleton.changed:
-                    # if ent == 2:
-                    #     print(position.x, position.y, position.w, position.h, position.changed)
-                    last_round[ent] = (2, skeleton.id)
-                    continue
-
+                skeleton = component_for_entity(ent, Skeleton)
+                position = component_for_entity(ent, Position)
                 data = {
                     'value': skeleton.value,
                     'x': position.x,
@@ -87,29 +328,33 @@ def init(consumers: List[Callable], scan_interval: float, also_log=False):
                     'style': skeleton.style
                 }
                 new_message[skeleton.id] = data
-                last_round[ent] = (2, skeleton.id)
+                reported[ent] = skeleton.id
                 position.changed = False
                 skeleton.changed = False
 
             # Check for deleted entities
-            deleted = []
-            for k, v in last_round.items():
-                if v[0] == 2:
-                    last_round[k] = (1, v[1])
-                elif v[0] == 1:
-                    deleted.append(v[1])
-                    last_round[k] = (0, v[1])
+            deleted = [reported.pop(ent) for ent in sorted(deleted) if ent in reported]
             if len(deleted) > 0:
                 new_message['deleted'] = deleted
 
-            # Add message to queue
-            message_buffer.put((new_message, msg_idx))
+            # Add message to the consumer buffers
+            publish(new_message, msg_idx)
             msg_idx += 1
             yield sleep(scan_interval)
 
     def clean():
-        message_buffer.put(({"theEnd": True}, -1))
-        logging.getLogger(__name__).debug(f'Executing Seer cleanup function')
-        thread.join(timeout=1)
+        logger = logging.getLogger(__name__)
+        logger.debug(f'Executing Seer cleanup function')
+        publish({"theEnd": True}, -1)
+        for world, tracker in trackers:
+            world.untrack(tracker)
+        trackers.clear()
+        for consumer, buffer, thread in zip(consumers, buffers, threads):
+            thread.join(timeout=1)
+            if buffer.dropped or buffer.coalesced:
+                logger.info(
+                    f'Seer consumer {consumer.callback} fell behind: '
+                    f'{buffer.dropped} messages dropped, {buffer.coalesced} frames coalesced'
+                )
 
     return process, clean
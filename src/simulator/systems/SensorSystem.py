@@ -1,6 +1,5 @@
 import logging
 
-from datetime import datetime, timedelta
 from simulator.typehints.dict_types import SystemArgs
 from simulator.typehints.component_types import EVENT
 from typing import NamedTuple, List
@@ -31,10 +30,7 @@ def init(sensor_type, frequency):
         # Local ref most used variables
         get_components = world.get_components
         sleep = env.timeout
-        total = timedelta()
-        runs = 0
         while True:
-            start = datetime.now()
             for ent, (pos, vel, sensor) in get_components(Position, Velocity, sensor_type):
                 # logger.debug(f'Analysing ent {ent}')
                 center_x, center_y = pos.center
@@ -58,10 +54,5 @@ def init(sensor_type, frequency):
                     event = EVENT('SensorEvent', SensorPayload(ent, pos, vel, closeEntities))
                     sensor.reply_channel.put(event)
             yield sleep(frequency)
-            end = datetime.now()
-            runs += 1
-            total += end - start
-            if runs % 50 == 0:
-                logger.debug(f'runs: {runs}; total: {total}; avg = {total / runs}')
 
     return process
@@ -11,5 +11,6 @@ class SimulationParseError(Exception):
         super().__init__(*args)
 
 class ConfigParseError(Exception):
-    def __init__(self, *args: object) -> None:
-        super().__init__(*args)
\ No newline at end of file
+    def __init__(self, *args: object, errors: typing.Optional[typing.List[str]] = None) -> None:
+        super().__init__(*args)
+        self.errors = errors if errors is not None else []
\ No newline at end of file
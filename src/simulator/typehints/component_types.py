@@ -1,3 +1,5 @@
+import copy
+
 from typing import Tuple, Union, List, NamedTuple
 from dataclasses import dataclass
 from enum import Enum
@@ -14,6 +16,41 @@ class Component:
         return vars(self) == vars(other)
 
 
+class TrackedComponent(Component):
+    """Component with a `changed` flag.
+
+    In a TrackedWorld, setting the flag marks the entity as dirty for every ChangeTracker of the world.
+    The flag is kept in the instance dict, so `vars` and equality are the same as for plain components.
+    Copies aren't tracked: they aren't in the world. Copies of a TrackedWorld track their own components.
+    """
+    __slots__ = ('_tracking',)  # (ChangeDispatcher, entity), set by the TrackedWorld
+
+    def __copy__(self):
+        component = type(self).__new__(type(self))
+        component.__dict__.update(self.__dict__)
+        return component
+
+    def __deepcopy__(self, memo):
+        component = type(self).__new__(type(self))
+        memo[id(self)] = component
+        component.__dict__.update(copy.deepcopy(self.__dict__, memo))
+        return component
+
+    @property
+    def changed(self) -> bool:
+        return self.__dict__['changed']
+
+    @changed.setter
+    def changed(self, value: bool):
+        self.__dict__['changed'] = value
+        if value:
+            try:
+                dispatcher, entity = self._tracking
+            except AttributeError:
+                return
+            dispatcher.mark(entity)
+
+
 # Payloads and tags convention related to Goto events
 GotoPoiPayload = NamedTuple("GotoPoiPayload", [("entity", int), ("target", str)])
 GotoPosPayload = NamedTuple("GotoPosPayload", [("entity", int), ("target", list)])
@@ -5,6 +5,9 @@ import enum
 
 from simulator.typehints.build_types import WindowOptions
 
+if typing.TYPE_CHECKING:
+    from simulator.utils.Timers import Timers
+
 
 class SystemArgs(typing.TypedDict):
     """Type of Keyword Arguments passed to systems in the process method."""
@@ -13,6 +16,7 @@ class SystemArgs(typing.TypedDict):
     _KILL_SWITCH: typing.Union[simpy.Event, None]
     EVENT_STORE: simpy.FilterStore
     WINDOW_OPTIONS: WindowOptions
+    TIMERS: 'Timers'
 
 
 class EntityDefinition(typing.TypedDict):
@@ -23,6 +27,24 @@ class EntityDefinition(typing.TypedDict):
     name: typing.Optional[str]
     type: typing.Optional[str]
 
+class EntityTemplate(typing.TypedDict):
+    """EntityDefinition shared by many entities, without entId. See simulator.utils.templates"""
+    components: typing.Dict[str, list]
+    isObject: bool
+    isInteractive: bool
+    name: typing.Optional[str]
+    type: typing.Optional[str]
+
+class EntityInstance(typing.TypedDict):
+    """Entity built from a template. Keys replace the template's, component args replace the template args."""
+    template: str
+    entId: typing.Optional[str]
+    components: typing.Optional[typing.Dict[str, list]]
+    isObject: typing.Optional[bool]
+    isInteractive: typing.Optional[bool]
+    name: typing.Optional[str]
+    type: typing.Optional[str]
+
 class LogLevel(enum.Enum):
     DEBUG = 10
     INFO  = 20
@@ -47,7 +69,24 @@ class LogLevel(enum.Enum):
             raise TypeError(f"'>=' not supported between instances of 'LogLevel' and {type(other)}")
 
 class SimulatorOptions(typing.TypedDict):
+    """Extra options for the Simulator
+
+        Arguments:
+            loggerConfig: str -- Path to a yaml logging config, relative to the context.
+            fastForward: bool -- Skip the FPS ticks in which nothing moves. Default is False.
+            realTime: Union[bool, dict] -- Advance simulated time at a fixed factor of wall time.
+                                           See simulator.main.RealTimeOptions. Default is False.
+            profile: Union[bool, dict] -- Time every system and report it on exit.
+                                          A dict {"output": file} also saves the report as json. Default is False.
+            mapCache: Union[bool, str] -- Load the parsed map from a compiled cache, when the map didn't change.
+                                          A str is the cache directory, relative to the context.
+                                          True uses .map_cache. Default is False.
+    """
     loggerConfig: typing.Optional[str]
+    fastForward: typing.Optional[bool]
+    realTime: typing.Optional[typing.Union[bool, dict]]
+    profile: typing.Optional[typing.Union[bool, dict]]
+    mapCache: typing.Optional[typing.Union[bool, str]]
 
 class Config(typing.TypedDict):
     """Options for the Simulation config
@@ -55,6 +94,8 @@ class Config(typing.TypedDict):
         Arguments:
             context: str -- Change the base directory for simulation assets. Default is .
             map: str -- Name of simulation map file. Must be under assets folder. Default is 'map.drawio'
+            templates: dict -- EntityTemplates by name. See simulator.utils.templates
+            instances: list -- Entities built from the templates.
     """
     context: str
     map: typing.Optional[str]
@@ -64,4 +105,6 @@ class Config(typing.TypedDict):
     verbose: typing.Optional[typing.Union[LogLevel, int]]
     simulationComponents: typing.Optional[typing.Dict[str, list]]
     extraEntities: typing.Optional[typing.List[EntityDefinition]]
+    templates: typing.Optional[typing.Dict[str, EntityTemplate]]
+    instances: typing.Optional[typing.List[EntityInstance]]
     simulatorConfigOptions: typing.Optional[SimulatorOptions]
@@ -1,8 +1,14 @@
-from typing import List
-import pyrebase
+from typing import List, Optional, Union
+import threading
+import logging
+import time
+import json
 import dotenv
 import os
 
+from pathlib import Path
+from simulator.systems.SeerPlugin import SeerConsumer
+
 dotenv.load_dotenv()
 
 FIREBASE_KEY = os.environ.get("FIREBASE_KEY")
@@ -15,10 +21,184 @@ demo_config = {
     "storageBucket": f"{FIREBASE_PROJECT}.appspot.com"
 }
 
+
+def seer_message_paths(namespace: str, message: dict, msg_idx: int) -> dict:
+    """Database paths written for a Seer message. Same layout as Firebase_conn.seer_consumer."""
+    if msg_idx < 0:
+        return {}
+    base = f'{namespace}/live_report/{msg_idx}'
+    if msg_idx == 1:
+        return {f'{base}/{idx}': {key: message[key]} for idx, key in enumerate(message)}
+    return {base: message}
+
+
+def split_path(*args) -> List[str]:
+    """Keys of a database path given as parts, e.g. ('sim/live_report', 2) -> ['sim', 'live_report', '2']."""
+    return [p for arg in args for p in str(arg).split('/') if p != '']
+
+
+class LocalReference:
+    """Path in a LocalFirebaseDB. Like pyrebase, each call to child returns a new reference,
+    so references can be used from many threads.
+    """
+
+    def __init__(self, database: 'LocalFirebaseDB', path: List[str]):
+        self.database = database
+        self.path = path
+
+    def child(self, *args) -> 'LocalReference':
+        return LocalReference(self.database, self.path + split_path(*args))
+
+    def set(self, data):
+        self.database._request('set', self.path, data)
+
+    def update(self, data: dict):
+        self.database._request('update', self.path, data)
+
+    def remove(self):
+        self.database._request('remove', self.path, None)
+
+    def get(self):
+        return self.database._get(self.path)
+
+
+class LocalFirebaseDB:
+    """File-backed stand-in for the pyrebase database.
+
+    Supports the calls the simulator makes: child(...).set/update/remove/get, and multi-path updates.
+    Every write is a request, appended as a json line to the log file.
+    So throughput can be measured without network, and the log replayed with `load`.
+    Unlike pyrebase, `get` returns the value itself.
+    """
+
+    def __init__(self, log_file: Optional[Union[str, Path]] = None):
+        self.data = {}
+        self.requests = 0
+        self.log = open(log_file, 'a') if log_file is not None else None
+        self.lock = threading.Lock()
+
+    def child(self, *args) -> LocalReference:
+        return LocalReference(self, split_path(*args))
+
+    def set(self, data):
+        self._request('set', [], data)
+
+    def update(self, data: dict):
+        self._request('update', [], data)
+
+    def remove(self):
+        self._request('remove', [], None)
+
+    def get(self):
+        return self._get([])
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+
+    @classmethod
+    def load(cls, log_file: Union[str, Path]) -> 'LocalFirebaseDB':
+        """Rebuilds the database state from a log file. New writes are not logged."""
+        db = cls()
+        with open(log_file) as fd:
+            for line in fd:
+                request = json.loads(line)
+                db._apply(request['op'], request['path'], request['data'])
+        return db
+
+    def _get(self, path: List[str]):
+        with self.lock:
+            node = self.data
+            for key in path:
+                if not isinstance(node, dict) or key not in node:
+                    return None
+                node = node[key]
+            return node
+
+    def _request(self, op: str, path: List[str], data):
+        with self.lock:
+            self.requests += 1
+            self._apply(op, path, data)
+            if self.log is not None:
+                self.log.write(json.dumps({'op': op, 'path': path, 'data': data}) + '\n')
+
+    def _apply(self, op: str, path: List[str], data):
+        if op == 'update':
+            for key, value in data.items():
+                self._apply('set', path + [p for p in key.split('/') if p != ''], value)
+            return
+        if len(path) == 0:
+            self.data = data if op == 'set' and isinstance(data, dict) else {}
+            return
+        node = self.data
+        for key in path[:-1]:
+            if not isinstance(node.get(key, None), dict):
+                if op == 'remove':
+                    return
+                node[key] = {}
+            node = node[key]
+        if op == 'remove':
+            node.pop(path[-1], None)
+        else:
+            node[path[-1]] = data
+
+
+class FirebaseBatchWriter:
+    """Sends Seer messages to firebase in batches, using multi-path updates.
+
+    Pending writes are sent as a single request when there are `flush_size` of them,
+    or when `flush_interval` seconds passed since the last request.
+    Use it as a batch Seer consumer, so writes happen in the consumer worker thread, not in the simulation.
+    The consumer is also called after `flush_interval` seconds without messages, so writes aren't left pending:
+
+        writer = firebase.batch_writer()
+        simulator.add_des_system(Seer.init([writer.as_consumer()], 0.1))
+    """
+
+    def __init__(self, database, namespace: str, flush_interval: float = 0.5, flush_size: int = 64):
+        self.database = database
+        self.namespace = namespace
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.pending = {}
+        self.last_flush = time.monotonic()
+        self.requests = 0
+        self.logger = logging.getLogger(__name__)
+
+    def as_consumer(self, **options):
+        """SeerConsumer for this writer. Options are passed to the SeerConsumer."""
+        options.setdefault('max_batch', self.flush_size)
+        options.setdefault('idle_timeout', self.flush_interval)
+        return SeerConsumer(self.seer_consumer, batch=True, **options)
+
+    def seer_consumer(self, batch: List[tuple]):
+        """Batch Seer consumer. Receives a list of (message, msg_idx), empty if the consumer is idle."""
+        end = False
+        for message, msg_idx in batch:
+            self.pending.update(seer_message_paths(self.namespace, message, msg_idx))
+            end = end or 'theEnd' in message
+        if end or len(self.pending) >= self.flush_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if len(self.pending) == 0:
+            return
+        pending = self.pending
+        self.pending = {}
+        self.database.update(pending)
+        self.requests += 1
+        self.logger.debug(f'Sent {len(pending)} paths to firebase in one request')
+
+
 class Firebase_conn():
-    def __init__(self, namespace: str, config=demo_config):
-        self.firebase = pyrebase.initialize_app(config)
-        self.__db = self.firebase.database()
+    def __init__(self, namespace: str, config=demo_config, database=None):
+        """Connects to firebase. A database, like a LocalFirebaseDB, can be given instead of the config."""
+        if database is None:
+            import pyrebase
+            self.firebase = pyrebase.initialize_app(config)
+            database = self.firebase.database()
+        self.__db = database
         self.namespace = namespace
 
     def clean_old_simulation(self):
@@ -36,6 +216,10 @@ class Firebase_conn():
             else:
                 self.__db.child(self.namespace).child('live_report').child(msg_idx).set(message)
 
+    def batch_writer(self, flush_interval: float = 0.5, flush_size: int = 64) -> FirebaseBatchWriter:
+        """Batched alternative to seer_consumer. See FirebaseBatchWriter."""
+        return FirebaseBatchWriter(self.__db, self.namespace, flush_interval, flush_size)
+
     def send_build_report(self, build_report: List[str]):
         """Sends the simulator build report to firebase"""
         self.__db.child(self.namespace).child('logs').set(build_report)
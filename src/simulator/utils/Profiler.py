@@ -0,0 +1,126 @@
+"""Per-system profiler for the simulation.
+
+Times every call of esper processors and every resume of DES processes.
+Times are aggregated per system, in a histogram with one bucket per decade.
+"""
+import json
+import bisect
+
+from time import perf_counter
+from pathlib import Path
+from typing import Callable, Dict, Generator, List, Optional, Union
+
+BUCKET_LIMITS = [1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0]
+BUCKET_LABELS = ['<10us', '<100us', '<1ms', '<10ms', '<100ms', '<1s', '>=1s']
+
+
+class SystemStats:
+    """Timing statistics of a single system."""
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram: List[int] = [0] * len(BUCKET_LABELS)
+
+    def record(self, seconds: float):
+        self.calls += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.histogram[bisect.bisect_right(BUCKET_LIMITS, seconds)] += 1
+
+    def to_dict(self) -> dict:
+        return {
+            'calls': self.calls,
+            'total': self.total,
+            'mean': self.total / self.calls if self.calls else 0.0,
+            'max': self.max,
+            'histogram': dict(zip(BUCKET_LABELS, self.histogram))
+        }
+
+
+def system_name(function: Callable) -> str:
+    """Readable name of a system function, like SeerPlugin.init.process."""
+    module = getattr(function, '__module__', None) or ''
+    name = getattr(function, '__qualname__', None) or repr(function)
+    name = name.replace('<locals>.', '')
+    return f'{module.split(".")[-1]}.{name}' if module else name
+
+
+class Profiler:
+
+    def __init__(self):
+        self.stats: Dict[str, SystemStats] = {}
+
+    def register(self, name: str) -> SystemStats:
+        """Creates the stats of a new system. Repeated names get a numeric suffix."""
+        unique_name = name
+        suffix = 1
+        while unique_name in self.stats:
+            suffix += 1
+            unique_name = f'{name}#{suffix}'
+        stats = SystemStats()
+        self.stats[unique_name] = stats
+        return stats
+
+    def profile_function(self, name: str, function: Callable) -> Callable:
+        """Wraps a function (e.g. an esper processor's process) to time every call."""
+        record = self.register(name).record
+
+        def profiled(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(perf_counter() - start)
+
+        return profiled
+
+    def profile_process(self, name: str, process: Generator) -> Generator:
+        """Wraps a DES process generator to time every resume.
+        Values sent and exceptions thrown (e.g. simpy interrupts) are forwarded to the process.
+        """
+        record = self.register(name).record
+        send_value = None
+        error: Optional[BaseException] = None
+        while True:
+            start = perf_counter()
+            try:
+                if error is not None:
+                    event = process.throw(error)
+                else:
+                    event = process.send(send_value)
+            except StopIteration as stop:
+                record(perf_counter() - start)
+                return stop.value
+            finally:
+                error = None
+            record(perf_counter() - start)
+            try:
+                send_value = yield event
+            except GeneratorExit:
+                process.close()
+                raise
+            except BaseException as err:
+                error = err
+
+    def table(self) -> str:
+        """Systems sorted by total time, as a text table."""
+        header = f'{"System":<50} {"calls":>8} {"total(s)":>10} {"mean(ms)":>10} {"max(ms)":>10}  ' + \
+            ' '.join(f'{label:>7}' for label in BUCKET_LABELS)
+        lines = [header, '-' * len(header)]
+        for name, stats in sorted(self.stats.items(), key=lambda item: item[1].total, reverse=True):
+            mean = stats.total / stats.calls if stats.calls else 0.0
+            lines.append(
+                f'{name[:50]:<50} {stats.calls:>8} {stats.total:>10.4f} {mean * 1000:>10.4f} {stats.max * 1000:>10.4f}  ' +
+                ' '.join(f'{count:>7}' for count in stats.histogram)
+            )
+        return '\n'.join(lines)
+
+    def to_dict(self) -> dict:
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
+
+    def dump(self, file: Union[str, Path]):
+        with open(file, 'w') as fd:
+            json.dump(self.to_dict(), fd, indent=2)
@@ -1,63 +1,153 @@
-import rclpy
-from rclpy.node import Node
+"""Seer consumer that publishes messages in the `live_report` ROS2 topic.
+
+Consumers only serialize and queue the messages. A publisher thread wakes up every
+`1 / publish_rate` seconds and publishes one ROS message, with up to `frames_per_message`
+of the queued frames as {"frames": [...]}. The rest wait for the next wake.
+With `frames_per_message=1` (the default) every frame is its own message, as before.
+At most `qos_depth * frames_per_message` frames are queued: the consumer blocks when the queue is full,
+so the Seer buffer policy decides what happens to frames produced faster than they are published.
+What is queued when the simulation ends is published at once.
+
+MockNode can replace the rclpy node, so the publisher can be benchmarked without ROS.
+"""
+import threading
 import json
 import time
 
-from std_msgs.msg import String
+from collections import deque
+from typing import List, Optional
+
+
+class MockString:
+    """Stand-in for std_msgs.msg.String."""
 
-class ROS2_conn():
-    # start_time = 0
     def __init__(self):
+        self.data = ''
+
+
+class MockPublisher:
+    """Records published messages. `publish_time` simulates a slow transport."""
+
+    def __init__(self, topic: str, qos_depth: int, publish_time: float = 0.0):
+        self.topic = topic
+        self.qos_depth = qos_depth
+        self.publish_time = publish_time
+        self.published: List[str] = []
+
+    def publish(self, msg):
+        if self.publish_time > 0:
+            time.sleep(self.publish_time)
+        self.published.append(msg.data)
+
+
+class MockNode:
+    """Stand-in for rclpy.node.Node with only what ROS2_conn needs."""
+
+    def __init__(self, name: str, publish_time: float = 0.0):
+        self.name = name
+        self.publish_time = publish_time
+        self.publishers: List[MockPublisher] = []
 
-        self.seer_node = Node('seer_publisher')
-        self.seer_node.publisher_ = self.seer_node.create_publisher(String, 'live_report', 10)
+    def create_publisher(self, msg_type, topic: str, qos_depth: int) -> MockPublisher:
+        publisher = MockPublisher(topic, qos_depth, self.publish_time)
+        self.publishers.append(publisher)
+        return publisher
 
-    def seer_consumer(self, message, msg_idx):  
-        msg = String()
+    def destroy_node(self):
+        pass
 
+
+class ROS2_conn():
+
+    def __init__(self, publish_rate: float = 50.0, frames_per_message: int = 1, qos_depth: int = 100, node=None):
+        """Creates the `seer_publisher` node. rclpy must be initialized, unless a (mock) node is given."""
+        if frames_per_message < 1:
+            raise ValueError(f'frames_per_message must be positive. {frames_per_message} found.')
+        if node is None:
+            from rclpy.node import Node
+            from rclpy.qos import QoSProfile
+            from std_msgs.msg import String
+            self.seer_node = Node('seer_publisher')
+            self.message_type = String
+            qos = QoSProfile(depth=qos_depth)
+            self.owns_node = True
+        else:
+            self.seer_node = node
+            self.message_type = MockString
+            qos = qos_depth
+            self.owns_node = False
+        self.seer_node.publisher_ = self.seer_node.create_publisher(self.message_type, 'live_report', qos)
+        self.frames_per_message = frames_per_message
+        self.period = 1 / publish_rate
+        self.pending = deque()
+        self.max_pending = qos_depth * frames_per_message
+        self.pending_changed = threading.Condition()
+        self.published = 0
+        self.stop_event = threading.Event()
+        self.publisher_thread: Optional[threading.Thread] = None
+
+    def seer_consumer(self, message, msg_idx):
         # Formating the message that send construct scenario information
         if msg_idx == 1:
             scenario = []
-            data = {}
-
             for _, j in enumerate(message):
                 scenario.append({j: message[j]})
+            message = {"scenario": scenario}
 
-            data["scenario"] = scenario
-            msg.data = json.dumps(data)
+        if self.publisher_thread is None:
+            self.publisher_thread = threading.Thread(target=self._publisher_loop, daemon=True)
+            self.publisher_thread.start()
+        with self.pending_changed:
+            self.pending_changed.wait_for(lambda: len(self.pending) < self.max_pending or self.stop_event.is_set())
+            self.pending.append(json.dumps(message))
+        if 'theEnd' in message:
+            # Publish what is left before the simulation shuts rclpy down
+            self.stop_event.set()
+            self.publisher_thread.join()
 
-        else:
-            msg.data = json.dumps(message)
-        
-        # if 'timestamp' in message and message['timestamp'] != -1:
-        #     timestamp = message['timestamp']
-        #     if timestamp == 0:
-        #         self.start_time = time.time()
-        #     else:
-        #         send_time = self.start_time + timestamp
-        #         sleep_time = send_time - time.time()
-        #         sleep_time = sleep_time if sleep_time > 0 else 0
-        #         time.sleep(sleep_time)
-
-        # Delay to control the publish rate because the subscriber is more slow 
-        # and message may be lost
-        time.sleep(0.02)
+    def _publisher_loop(self):
+        while not self.stop_event.wait(self.period):
+            self.publish_next()
+        while self.pending:
+            self.publish_next()
 
+    def publish_next(self):
+        """Publishes the oldest queued frames, up to frames_per_message, in one ROS message."""
+        with self.pending_changed:
+            frames = []
+            while self.pending and len(frames) < self.frames_per_message:
+                frames.append(self.pending.popleft())
+            self.pending_changed.notify_all()
+        if not frames:
+            return
+        msg = self.message_type()
+        if self.frames_per_message == 1:
+            msg.data = frames[0]
+        else:
+            msg.data = '{"frames": [' + ', '.join(frames) + ']}'
         self.seer_node.publisher_.publish(msg)
+        self.published += 1
 
     def close(self):
+        with self.pending_changed:
+            self.stop_event.set()
+            self.pending_changed.notify_all()
+        if self.publisher_thread is not None:
+            self.publisher_thread.join()
         self.seer_node.destroy_node()
-        rclpy.shutdown()
-        
+        if self.owns_node:
+            import rclpy
+            rclpy.shutdown()
+
+
 def main():
+    import rclpy
+    rclpy.init()
     ros2 = ROS2_conn()
     msg = {'data' : 'Hello ROS2!'}
     ros2.seer_consumer(msg, 0)
     ros2.close()
-    
+
+
 if __name__ == '__main__':
     main()
-        
-        
-        
-        
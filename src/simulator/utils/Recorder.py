@@ -0,0 +1,219 @@
+"""Deterministic record and replay of simulations.
+
+A simulation is deterministic given its config, its systems, the random seed and the external inputs.
+The Recorder saves the seed and every external input, with the simulated time it entered the simulation.
+The Replayer drives a Simulator built with the same config and systems with the recorded inputs instead of the
+live ones, reaching the same state. Inputs enter the simulation through InputFeeds, given to the input systems
+(e.g. BridgeProcessor, RosControlPlugin): live feeds pass received inputs through, recording feeds also save them
+and replay feeds ignore them and return the recorded inputs instead.
+
+A recording is a directory with:
+    inputs.jsonl -- header line with the seed, then one line per input {"t", "source", "data"}
+                    and per state digest {"t", "digest"}. Inputs must be json serializable.
+    frames.seer -- Seer frames (if the Recorder is a Seer consumer), in the SeerStream format.
+
+State digests are hashes of some components of every entity, taken every `digest_interval` simulated seconds.
+The Replayer compares them to its own, to detect runs that diverged.
+`replay_frames` streams the recorded Seer frames to consumers, without simulating.
+
+Usage:
+    recorder = Recorder('recordings/run1', seed=42, digest_interval=1)
+    simulator.add_system(BridgeProcessor(feed=recorder.feed('bridge')))
+    simulator.add_des_system(Seer.init([SeerConsumer(recorder.seer_consumer, lossless=True)], 0.05))
+    recorder.attach(simulator)
+    simulator.run()
+"""
+import json
+import time
+import hashlib
+import logging
+
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type, Union
+
+import esper
+
+from simulator.components.Position import Position
+from simulator.components.Velocity import Velocity
+from simulator.utils.helpers import seed_generators
+from simulator.utils.SeerStream import SeerStreamWriter, read_stream
+
+INPUTS_FILE = 'inputs.jsonl'
+FRAMES_FILE = 'frames.seer'
+DEFAULT_DIGEST_COMPONENTS = [Position, Velocity]
+# Inputs recorded up to this many simulated seconds later are replayed now, as in the simulation loop
+TIME_TOLERANCE = 1e-9
+
+SeerConsumerFunction = Callable[[dict, int], None]
+
+
+def world_digest(world: esper.World, component_types: List[Type]) -> str:
+    """Hash of the attributes of the given components, for every entity."""
+    digest = hashlib.sha256()
+    for ent in sorted(world._entities.keys()):
+        components = world._entities[ent]
+        for component_type in component_types:
+            component = components.get(component_type, None)
+            if component is not None:
+                digest.update(f'{ent}:{component_type.__name__}:{sorted(vars(component).items())!r};'.encode())
+    return digest.hexdigest()
+
+
+class InputFeed:
+    """Passes live inputs of an external source to the simulation."""
+    # False if the source shouldn't be started (e.g. replays)
+    live = True
+
+    def inputs(self, now: float, received: Iterable[Any]) -> List[Any]:
+        """Inputs to apply at simulated time `now`, given the ones received from the source since the last call."""
+        return list(received)
+
+
+class RecordingFeed(InputFeed):
+
+    def __init__(self, recorder: 'Recorder', source: str):
+        self.recorder = recorder
+        self.source = source
+
+    def inputs(self, now: float, received: Iterable[Any]) -> List[Any]:
+        received = list(received)
+        for data in received:
+            self.recorder.write({'t': now, 'source': self.source, 'data': data})
+        return received
+
+
+class ReplayFeed(InputFeed):
+    live = False
+
+    def __init__(self, recorded: List[tuple]):
+        self.recorded = recorded
+        self.next = 0
+
+    def inputs(self, now: float, received: Iterable[Any]) -> List[Any]:
+        due = []
+        while self.next < len(self.recorded) and self.recorded[self.next][0] <= now + TIME_TOLERANCE:
+            due.append(self.recorded[self.next][1])
+            self.next += 1
+        return due
+
+
+class Recorder:
+
+    def __init__(
+            self,
+            directory: Union[str, Path],
+            seed: int = 0,
+            digest_interval: Optional[float] = None,
+            digest_components: Optional[List[Type]] = None
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.seed = seed
+        self.digest_interval = digest_interval
+        self.digest_components = digest_components if digest_components is not None else DEFAULT_DIGEST_COMPONENTS
+        self.fd = open(self.directory / INPUTS_FILE, 'w')
+        self.write({'header': {'seed': seed, 'digest_interval': digest_interval,
+                               'digest_components': [c.__name__ for c in self.digest_components]}})
+        self.frames: Optional[SeerStreamWriter] = None
+
+    def write(self, record: dict):
+        self.fd.write(json.dumps(record) + '\n')
+        # Recordings are most useful for runs that crash
+        self.fd.flush()
+
+    def feed(self, source: str) -> RecordingFeed:
+        return RecordingFeed(self, source)
+
+    def attach(self, simulator):
+        """Seeds the random generators and starts recording state digests. Call it right before `run`."""
+        seed_generators(self.seed)
+        if self.digest_interval is not None:
+            simulator.add_des_system((self.digest_process,))
+        simulator.cleanups.append(self.close)
+
+    def digest_process(self, kwargs):
+        env = kwargs['ENV']
+        world = kwargs['WORLD']
+        while True:
+            self.write({'t': env.now, 'digest': world_digest(world, self.digest_components)})
+            yield env.timeout(self.digest_interval)
+
+    def seer_consumer(self, message: dict, msg_idx: int):
+        if self.frames is None:
+            self.frames = SeerStreamWriter(self.directory / FRAMES_FILE)
+        self.frames.seer_consumer(message, msg_idx)
+
+    def close(self):
+        if not self.fd.closed:
+            self.fd.close()
+        if self.frames is not None:
+            self.frames.close()
+
+
+class Replayer:
+
+    def __init__(self, directory: Union[str, Path], digest_components: Optional[List[Type]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.directory = Path(directory)
+        self.inputs: Dict[str, List[tuple]] = {}
+        self.digests: List[tuple] = []
+        with open(self.directory / INPUTS_FILE) as fd:
+            self.header = json.loads(fd.readline())['header']
+            for line in fd:
+                record = json.loads(line)
+                if 'digest' in record:
+                    self.digests.append((record['t'], record['digest']))
+                else:
+                    self.inputs.setdefault(record['source'], []).append((record['t'], record['data']))
+        self.seed: int = self.header['seed']
+        self.digest_components = digest_components if digest_components is not None else DEFAULT_DIGEST_COMPONENTS
+        # (time, expected digest, replayed digest) of the digests that didn't match
+        self.divergences: List[tuple] = []
+
+    def feed(self, source: str) -> ReplayFeed:
+        """Feed with the inputs recorded from `source`. Unknown sources have no inputs."""
+        return ReplayFeed(self.inputs.get(source, []))
+
+    def attach(self, simulator):
+        """Seeds the random generators and starts checking state digests. Call it right before `run`."""
+        seed_generators(self.seed)
+        if self.header['digest_interval'] is not None:
+            simulator.add_des_system((self.digest_process,))
+
+    def digest_process(self, kwargs):
+        env = kwargs['ENV']
+        world = kwargs['WORLD']
+        interval = self.header['digest_interval']
+        for recorded_time, expected in self.digests:
+            if abs(recorded_time - env.now) > TIME_TOLERANCE:
+                self.logger.warning(f'Replay digest at {env.now} but recorded at {recorded_time}')
+            digest = world_digest(world, self.digest_components)
+            if digest != expected:
+                if not self.divergences:
+                    self.logger.error(f'Replay diverged from the recording at {env.now}')
+                self.divergences.append((env.now, expected, digest))
+            yield env.timeout(interval)
+
+
+def replay_frames(
+        directory: Union[str, Path],
+        consumers: List[SeerConsumerFunction],
+        speed: Optional[float] = None
+) -> int:
+    """Streams the recorded Seer frames to the consumers, without simulating. Returns the number of messages.
+
+    Keyword Arguments:
+        speed -- Simulated seconds per wall second. Default is as fast as possible.
+    """
+    start = time.monotonic()
+    messages = 0
+    for message, msg_idx in read_stream(Path(directory) / FRAMES_FILE):
+        timestamp = message.get('timestamp', -1)
+        if speed is not None and timestamp > 0:
+            delay = start + timestamp / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        for consumer in consumers:
+            consumer(message, msg_idx)
+        messages += 1
+    return messages
@@ -0,0 +1,322 @@
+"""Compact binary stream format for Seer messages.
+
+Seer frames repeat the full `style` and `value` strings of every changed Skeleton.
+The stream format interns those strings once, in an entity dictionary,
+and encodes frames as binary records with only the fields that changed.
+
+Stream layout:
+    MAGIC (5 bytes) + VERSION (1 byte), followed by records.
+    Every record is TAG (1 byte) + payload length + payload.
+    Integers are unsigned LEB128 varints; signed ones are zigzag encoded first.
+
+Records:
+    ENTITY -- index, then id, value and style as length-prefixed utf-8 strings.
+              Sent the first time an entity appears and whenever its value or style change.
+    FRAME  -- msg_idx gap to the previous message (signed, 0 for consecutive messages),
+              timestamp (float64), record count, then per record: entity index,
+              field mask (1 byte) and one float64 for each field set in the mask (x, y, width, height).
+              Deleted entities follow as a count and entity indexes.
+    JSON   -- msg_idx (signed) and an utf-8 json message.
+              Used for messages that are not frames, like the window message and the end of simulation.
+
+Decoded messages are equal to the encoded ones, except that positions are always floats.
+"""
+import json
+import struct
+
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+from pathlib import Path
+
+MAGIC = b'HSEER'
+VERSION = 1
+
+TAG_ENTITY = b'E'
+TAG_FRAME = b'F'
+TAG_JSON = b'J'
+
+FIELDS = ('x', 'y', 'width', 'height')
+ENTITY_KEYS = {'value', 'style'}.union(FIELDS)
+
+_float64 = struct.Struct('<d')
+
+SeerMessage = Tuple[dict, int]
+
+
+class SeerStreamError(Exception):
+    pass
+
+
+def _pack_varint(value: int) -> bytes:
+    data = bytearray()
+    while value > 0x7F:
+        data.append((value & 0x7F) | 0x80)
+        value >>= 7
+    data.append(value)
+    return bytes(data)
+
+
+def _unpack_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise IndexError('Incomplete varint')
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+
+def _pack_str(value: str) -> bytes:
+    data = str(value).encode('utf8')
+    return _pack_varint(len(data)) + data
+
+
+def _unpack_str(data: bytes, offset: int) -> Tuple[str, int]:
+    size, offset = _unpack_varint(data, offset)
+    return data[offset:offset + size].decode('utf8'), offset + size
+
+
+def _record(tag: bytes, payload: bytes) -> bytes:
+    return tag + _pack_varint(len(payload)) + payload
+
+
+def _is_frame(message: dict) -> bool:
+    if message.get('timestamp', -1) < 0:
+        return False
+    for key, value in message.items():
+        if key == 'timestamp':
+            continue
+        if key == 'deleted':
+            if not isinstance(value, list):
+                return False
+        elif not isinstance(value, dict) or value.keys() != ENTITY_KEYS:
+            return False
+    return True
+
+
+class SeerStreamEncoder:
+    """Encodes Seer messages into the binary stream format.
+
+    The encoder is stateful: it remembers the entity dictionary and the last
+    values sent for each entity. The first encoded message carries the stream header.
+    """
+
+    def __init__(self):
+        self.entity_index: Dict[str, int] = {}
+        # Last (value, style, x, y, width, height) sent for each entity index
+        self.last_sent: List[list] = []
+        self.last_msg_idx = -1
+        self.header_sent = False
+
+    def header(self) -> bytes:
+        return MAGIC + bytes([VERSION])
+
+    def encode(self, message: dict, msg_idx: int) -> bytes:
+        chunks = []
+        if not self.header_sent:
+            chunks.append(self.header())
+            self.header_sent = True
+        if not _is_frame(message):
+            payload = _pack_varint(_zigzag(msg_idx)) + json.dumps(message).encode('utf8')
+            chunks.append(_record(TAG_JSON, payload))
+            return b''.join(chunks)
+
+        body = []
+        count = 0
+        for key, data in message.items():
+            if key == 'timestamp' or key == 'deleted':
+                continue
+            index = self.entity_index.get(key, None)
+            if index is None:
+                index = len(self.last_sent)
+                self.entity_index[key] = index
+                self.last_sent.append([None] * 6)
+            last = self.last_sent[index]
+            if last[0] != data['value'] or last[1] != data['style']:
+                last[0] = data['value']
+                last[1] = data['style']
+                entity = _pack_varint(index) + _pack_str(key) + _pack_str(data['value']) + _pack_str(data['style'])
+                chunks.append(_record(TAG_ENTITY, entity))
+            mask = 0
+            fields = []
+            for bit, field in enumerate(FIELDS):
+                value = data[field]
+                if last[2 + bit] != value:
+                    last[2 + bit] = value
+                    mask |= 1 << bit
+                    fields.append(_float64.pack(value))
+            body.append(_pack_varint(index))
+            body.append(bytes([mask]))
+            body += fields
+            count += 1
+
+        deleted = message.get('deleted', [])
+        body.append(_pack_varint(len(deleted)))
+        for skeleton_id in deleted:
+            index = self.entity_index.get(skeleton_id, None)
+            if index is None:
+                raise SeerStreamError(f'Entity {skeleton_id} deleted before being sent')
+            body.append(_pack_varint(index))
+            # A deleted entity that comes back must be sent in full again
+            self.last_sent[index] = [None] * 6
+
+        head = _pack_varint(_zigzag(msg_idx - self.last_msg_idx - 1)) + \
+            _float64.pack(message['timestamp']) + _pack_varint(count)
+        self.last_msg_idx = msg_idx
+        chunks.append(_record(TAG_FRAME, head + b''.join(body)))
+        return b''.join(chunks)
+
+
+class SeerStreamDecoder:
+    """Reference decoder for the binary stream format.
+
+    Bytes can be fed in chunks of any size, which makes the decoder usable for live feeds.
+    Each call to `feed` returns the Seer messages completed by the new data.
+    """
+
+    def __init__(self):
+        self.buffer = b''
+        self.header_read = False
+        # Entity dictionary: index -> [id, value, style]
+        self.entities: Dict[int, list] = {}
+        # Last known position of each entity: index -> [x, y, width, height]
+        self.positions: Dict[int, list] = {}
+        self.last_msg_idx = -1
+
+    def feed(self, data: bytes) -> List[SeerMessage]:
+        self.buffer += data
+        messages = []
+        offset = 0
+        if not self.header_read:
+            header_size = len(MAGIC) + 1
+            if len(self.buffer) < header_size:
+                return messages
+            if self.buffer[:len(MAGIC)] != MAGIC:
+                raise SeerStreamError('Data is not a Seer stream')
+            if self.buffer[len(MAGIC)] != VERSION:
+                raise SeerStreamError(f'Unsupported Seer stream version {self.buffer[len(MAGIC)]}')
+            self.header_read = True
+            offset = header_size
+        while offset < len(self.buffer):
+            tag = self.buffer[offset:offset + 1]
+            try:
+                size, start = _unpack_varint(self.buffer, offset + 1)
+            except IndexError:
+                break
+            if len(self.buffer) - start < size:
+                break
+            payload = self.buffer[start:start + size]
+            offset = start + size
+            message = self._decode_record(tag, payload)
+            if message is not None:
+                messages.append(message)
+        self.buffer = self.buffer[offset:]
+        return messages
+
+    def _decode_record(self, tag: bytes, payload: bytes) -> Optional[SeerMessage]:
+        if tag == TAG_ENTITY:
+            index, offset = _unpack_varint(payload, 0)
+            skeleton_id, offset = _unpack_str(payload, offset)
+            value, offset = _unpack_str(payload, offset)
+            style, offset = _unpack_str(payload, offset)
+            self.entities[index] = [skeleton_id, value, style]
+            return None
+        if tag == TAG_JSON:
+            msg_idx, offset = _unpack_varint(payload, 0)
+            return json.loads(payload[offset:].decode('utf8')), _unzigzag(msg_idx)
+        if tag == TAG_FRAME:
+            return self._decode_frame(payload)
+        raise SeerStreamError(f'Unknown record tag {tag}')
+
+    def _decode_frame(self, payload: bytes) -> SeerMessage:
+        gap, offset = _unpack_varint(payload, 0)
+        msg_idx = self.last_msg_idx + 1 + _unzigzag(gap)
+        self.last_msg_idx = msg_idx
+        (timestamp,) = _float64.unpack_from(payload, offset)
+        count, offset = _unpack_varint(payload, offset + _float64.size)
+        message = {'timestamp': timestamp}
+        for _ in range(count):
+            index, offset = _unpack_varint(payload, offset)
+            mask = payload[offset]
+            offset += 1
+            position = self.positions.setdefault(index, [0.0, 0.0, 0.0, 0.0])
+            for bit in range(len(FIELDS)):
+                if mask & (1 << bit):
+                    (position[bit],) = _float64.unpack_from(payload, offset)
+                    offset += _float64.size
+            skeleton_id, value, style = self.entities[index]
+            message[skeleton_id] = {
+                'value': value,
+                'x': position[0],
+                'y': position[1],
+                'width': position[2],
+                'height': position[3],
+                'style': style
+            }
+        deleted_count, offset = _unpack_varint(payload, offset)
+        if deleted_count > 0:
+            deleted = []
+            for _ in range(deleted_count):
+                index, offset = _unpack_varint(payload, offset)
+                deleted.append(self.entities[index][0])
+            message['deleted'] = deleted
+        return message, msg_idx
+
+
+def read_stream(source: Union[str, Path, BinaryIO], chunk_size: int = 1 << 16) -> Iterator[SeerMessage]:
+    """Decodes a Seer stream file, yielding (message, msg_idx) tuples in order."""
+    if isinstance(source, (str, Path)):
+        with open(source, 'rb') as fd:
+            yield from read_stream(fd, chunk_size)
+        return
+    decoder = SeerStreamDecoder()
+    while True:
+        data = source.read(chunk_size)
+        if not data:
+            break
+        yield from decoder.feed(data)
+    if decoder.buffer:
+        raise SeerStreamError(f'Seer stream ended with {len(decoder.buffer)} incomplete bytes')
+
+
+class SeerStreamWriter:
+    """Seer consumer that writes messages to a binary stream file.
+
+    Replay files need every frame, so register it as a lossless consumer.
+
+    Usage:
+        writer = SeerStreamWriter('replay.seer')
+        simulator.add_des_system(Seer.init([SeerConsumer(writer.seer_consumer, lossless=True)], 0.05))
+    """
+
+    def __init__(self, destination: Union[str, Path, BinaryIO]):
+        if isinstance(destination, (str, Path)):
+            self.fd = open(destination, 'wb')
+            self.owns_fd = True
+        else:
+            self.fd = destination
+            self.owns_fd = False
+        self.encoder = SeerStreamEncoder()
+
+    def seer_consumer(self, message: dict, msg_idx: int):
+        self.fd.write(self.encoder.encode(message, msg_idx))
+        if 'theEnd' in message:
+            self.close()
+
+    def close(self):
+        if self.fd.closed:
+            return
+        self.fd.flush()
+        if self.owns_fd:
+            self.fd.close()
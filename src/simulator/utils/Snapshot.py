@@ -0,0 +1,147 @@
+"""Binary snapshots of a simulation.
+
+A snapshot file is a short json header followed by two zlib compressed pickles:
+the simulator settings (from the config and the build) and the simulation state.
+The header has what is needed before unpickling (e.g. the context, to import external components).
+
+The esper world is saved without its processors, and the simpy environment isn't saved at all:
+the simulation clock and the events waiting in the EVENT_STORE are.
+References to the environment, the EVENT_STORE and the kill switch (e.g. in components or events)
+are saved by name and restored as references to the new ones. Other simpy objects can't be saved.
+"""
+import io
+import sys
+import json
+import zlib
+import pickle
+import struct
+import importlib
+
+import esper
+import simpy
+
+from typing import Any, Dict, Tuple
+from simulator.utils.TrackedWorld import ChangeDispatcher, TrackedWorld
+
+MAGIC = b'HMRSNAP'
+VERSION = 1
+HEADER_FORMAT = '>BI'
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class SnapshotPickler(pickle.Pickler):
+    """Pickles the state of a simulation. Shared simulation objects are saved by name."""
+
+    def __init__(self, file, shared: Dict[str, Any]):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.shared_ids = {id(obj): name for name, obj in shared.items()}
+
+    def persistent_id(self, obj):
+        name = self.shared_ids.get(id(obj), None)
+        if name is not None:
+            return name
+        if isinstance(obj, ChangeDispatcher):
+            # Components are attached to the new world's dispatcher when it's built
+            return 'DISPATCHER'
+        if isinstance(obj, (esper.World, simpy.Environment, simpy.Event, simpy.resources.base.BaseResource)):
+            raise SnapshotError(f'Simulation state has a reference to {obj}, that can not be saved')
+        return None
+
+    def reducer_override(self, obj):
+        # NamedTuples like EVENT = NamedTuple("Event", ...) can't be found by their type name.
+        # They are saved with the name of the module attribute instead.
+        cls = type(obj)
+        if not isinstance(obj, tuple) or not hasattr(cls, '_fields'):
+            return NotImplemented
+        module = sys.modules.get(cls.__module__, None)
+        if module is None or getattr(module, cls.__qualname__, None) is cls:
+            return NotImplemented
+        for name, value in vars(module).items():
+            if value is cls:
+                return named_tuple, (cls.__module__, name, tuple(obj))
+        return NotImplemented
+
+
+def named_tuple(module: str, name: str, values: tuple) -> tuple:
+    return getattr(importlib.import_module(module), name)(*values)
+
+
+class SnapshotUnpickler(pickle.Unpickler):
+
+    def __init__(self, file, shared: Dict[str, Any]):
+        super().__init__(file)
+        self.shared = shared
+
+    def persistent_load(self, pid):
+        if pid == 'DISPATCHER':
+            return None
+        try:
+            return self.shared[pid]
+        except KeyError:
+            raise SnapshotError(f'Snapshot references unknown object {pid}')
+
+
+def world_state(world: esper.World) -> tuple:
+    world._clear_dead_entities()
+    return type(world), world._next_entity_id, world._entities
+
+
+def build_world(state: tuple) -> esper.World:
+    """Creates a world from its state. Components are indexed again and TrackedComponents point to the new world."""
+    world_type, next_entity_id, entities = state
+    world = world_type()
+    world._next_entity_id = next_entity_id
+    world._entities = entities
+    for entity, components in entities.items():
+        for component_type in components:
+            world._components.setdefault(component_type, set()).add(entity)
+    if isinstance(world, TrackedWorld):
+        for entity, components in entities.items():
+            for component in components.values():
+                if hasattr(component, '_tracking'):
+                    component._tracking = (world.dispatcher, entity)
+    world.clear_cache()
+    return world
+
+
+def dump(file, header: dict, settings: dict, state: Any, shared: Dict[str, Any]):
+    buffer = io.BytesIO()
+    try:
+        SnapshotPickler(buffer, shared).dump(state)
+        encoded_settings = zlib.compress(pickle.dumps(settings, protocol=pickle.HIGHEST_PROTOCOL))
+    except (pickle.PicklingError, AttributeError, TypeError) as err:
+        raise SnapshotError(f'Failed to save simulation state: {err}') from err
+    encoded_header = json.dumps(header).encode()
+    with open(file, 'wb') as fd:
+        fd.write(MAGIC)
+        fd.write(struct.pack(HEADER_FORMAT, VERSION, len(encoded_header)))
+        fd.write(encoded_header)
+        fd.write(struct.pack('>I', len(encoded_settings)))
+        fd.write(encoded_settings)
+        fd.write(zlib.compress(buffer.getvalue()))
+
+
+def read(file) -> Tuple[dict, dict, bytes]:
+    """Returns the header, the settings and the compressed state of a snapshot file."""
+    with open(file, 'rb') as fd:
+        data = fd.read()
+    if not data.startswith(MAGIC):
+        raise SnapshotError(f'{file} is not a simulation snapshot')
+    offset = len(MAGIC)
+    version, header_size = struct.unpack_from(HEADER_FORMAT, data, offset)
+    if version != VERSION:
+        raise SnapshotError(f'Snapshot version {version} is not supported (expected {VERSION})')
+    offset += struct.calcsize(HEADER_FORMAT)
+    header = json.loads(data[offset:offset + header_size])
+    offset += header_size
+    (settings_size,) = struct.unpack_from('>I', data, offset)
+    offset += 4
+    settings = pickle.loads(zlib.decompress(data[offset:offset + settings_size]))
+    return header, settings, data[offset + settings_size:]
+
+
+def load_state(compressed: bytes, shared: Dict[str, Any]) -> Any:
+    return SnapshotUnpickler(io.BytesIO(zlib.decompress(compressed)), shared).load()
@@ -0,0 +1,56 @@
+"""Timers of DES systems that are resumed in restored simulations.
+
+Generator processes can't be saved in snapshots, so a restored DES system starts over.
+Systems that sleep with a named timer (see `timeout_function`) get their first timeout of the
+restored simulation ending when the pending one would have: snapshots save the time left on
+every pending timer, and the timer with the same name continues from it.
+
+Names are made unique in the order systems start, so the same systems should be added,
+in the same order, after a restore.
+"""
+from typing import Callable, Dict, Optional, Tuple
+
+import simpy
+
+from simulator.typehints.dict_types import SystemArgs
+
+
+class Timers:
+    """Named timers of a simulation, and the time left on the timers of a snapshot."""
+
+    def __init__(self, env: simpy.Environment, resume: Optional[Dict[str, float]] = None):
+        self.env = env
+        self.resume: Dict[str, float] = dict(resume or {})
+        self.pending: Dict[str, Tuple[simpy.Timeout, float]] = {}
+        self.names: Dict[str, int] = {}
+
+    def register(self, name: str) -> str:
+        """Unique name of a new timer. The second timer named `clock` is `clock#1`, and so on."""
+        count = self.names.get(name, 0)
+        self.names[name] = count + 1
+        return name if count == 0 else f'{name}#{count}'
+
+    def timeout(self, name: str, delay: float) -> simpy.Timeout:
+        """env.timeout of the timer. If the timer was pending in the snapshot, the first one ends when it would have."""
+        if name in self.resume:
+            delay = self.resume.pop(name)
+        timeout = self.env.timeout(delay)
+        self.pending[name] = (timeout, self.env.now + delay)
+        return timeout
+
+    def state(self) -> Dict[str, float]:
+        """Time left on the pending timers."""
+        return {
+            name: wake - self.env.now for name, (timeout, wake) in self.pending.items() if not timeout.processed
+        }
+
+
+def timeout_function(kwargs: SystemArgs, name: str) -> Callable[[float], simpy.Event]:
+    """Timeout function for a DES system, like env.timeout, of a new timer named `name`.
+    Systems run without the simulator's TIMERS (e.g. in tests) get env.timeout.
+    """
+    timers: Optional[Timers] = kwargs.get('TIMERS', None)
+    if timers is None:
+        return kwargs['ENV'].timeout
+    key = timers.register(name)
+    return lambda delay: timers.timeout(key, delay)
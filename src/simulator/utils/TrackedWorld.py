@@ -0,0 +1,144 @@
+"""esper World that notifies subscribers about entity changes.
+
+Systems that only care about what changed since their last run (e.g. the Seer)
+subscribe a ChangeTracker with `world.track()`, instead of scanning every entity.
+The world marks an entity as dirty when it's created or its components are added or removed,
+and as deleted when it's deleted. TrackedComponents also mark their entity as dirty
+when their `changed` flag is set.
+
+The world also counts changes to its processors (`processors_version`),
+so the simulation loop knows when to schedule them again.
+"""
+import copy
+import esper
+
+from typing import Iterable, List, Set, Tuple
+from simulator.typehints.component_types import TrackedComponent
+
+
+class ChangeTracker:
+    """Entities that were modified or deleted since the last call to `drain`."""
+
+    def __init__(self):
+        self.dirty: Set[int] = set()
+        self.deleted: Set[int] = set()
+
+    def drain(self) -> Tuple[Set[int], Set[int]]:
+        """Returns (dirty, deleted) and resets the tracker. Dirty entities are never deleted ones."""
+        dirty = self.dirty - self.deleted
+        deleted = self.deleted
+        self.dirty = set()
+        self.deleted = set()
+        return dirty, deleted
+
+
+class ChangeDispatcher:
+    """Fans out dirty notifications to the trackers of a world.
+
+    TrackedComponents hold a reference to it. Deep copies of the dispatcher are the dispatcher itself,
+    so deep copying an object that references it doesn't copy the world.
+    """
+
+    def __init__(self):
+        self.trackers: List[ChangeTracker] = []
+
+    def mark(self, entity: int):
+        for tracker in self.trackers:
+            tracker.dirty.add(entity)
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class TrackedWorld(esper.World):
+
+    def __init__(self, timed=False):
+        super().__init__(timed)
+        self.dispatcher = ChangeDispatcher()
+        self.processors_version = 0
+
+    def __deepcopy__(self, memo):
+        """The copy gets its own dispatcher, without trackers. Copied components notify the copy."""
+        world = type(self).__new__(type(self))
+        memo[id(self)] = world
+        memo[id(self.dispatcher)] = ChangeDispatcher()
+        for key, value in vars(self).items():
+            setattr(world, key, copy.deepcopy(value, memo))
+        for entity, components in world._entities.items():
+            for component in components.values():
+                if isinstance(component, TrackedComponent):
+                    component._tracking = (world.dispatcher, entity)
+        return world
+
+    @property
+    def processors(self) -> List[esper.Processor]:
+        """The processors, in priority order."""
+        return list(self._processors)
+
+    def add_processor(self, processor_instance: esper.Processor, priority=0) -> None:
+        super().add_processor(processor_instance, priority)
+        self.processors_version += 1
+
+    def remove_processor(self, processor_type) -> None:
+        super().remove_processor(processor_type)
+        self.processors_version += 1
+
+    def clear_dead_entities(self) -> None:
+        """Deletes the entities marked for deletion, as World.process does before running the processors."""
+        self._clear_dead_entities()
+
+    def track(self) -> ChangeTracker:
+        """Subscribes a new ChangeTracker. Only changes after the subscription are tracked."""
+        tracker = ChangeTracker()
+        self.dispatcher.trackers.append(tracker)
+        return tracker
+
+    def untrack(self, tracker: ChangeTracker):
+        self.dispatcher.trackers.remove(tracker)
+
+    def create_entities(self, entities: Iterable[Iterable]) -> List[int]:
+        """Creates an entity for each list of components, in order. Returns the new entities.
+        Same as calling create_entity for each one, but the world's cache is cleared once.
+        """
+        created = []
+        for components in entities:
+            self._next_entity_id += 1
+            entity = self._next_entity_id
+            created.append(entity)
+            entity_components = None
+            for component in components:
+                if entity_components is None:
+                    entity_components = self._entities.setdefault(entity, {})
+                component_type = type(component)
+                self._components.setdefault(component_type, set()).add(entity)
+                entity_components[component_type] = component
+                if isinstance(component, TrackedComponent):
+                    component._tracking = (self.dispatcher, entity)
+            if entity_components is not None:
+                self.dispatcher.mark(entity)
+        self.clear_cache()
+        return created
+
+    def add_component(self, entity: int, component_instance) -> None:
+        super().add_component(entity, component_instance)
+        if isinstance(component_instance, TrackedComponent):
+            component_instance._tracking = (self.dispatcher, entity)
+        self.dispatcher.mark(entity)
+
+    def remove_component(self, entity: int, component_type) -> int:
+        component = self._entities[entity][component_type]
+        super().remove_component(entity, component_type)
+        if isinstance(component, TrackedComponent):
+            del component._tracking
+        self.dispatcher.mark(entity)
+        return entity
+
+    def delete_entity(self, entity: int, immediate=False) -> None:
+        super().delete_entity(entity, immediate)
+        for tracker in self.dispatcher.trackers:
+            tracker.deleted.add(entity)
+
+    def clear_database(self) -> None:
+        for tracker in self.dispatcher.trackers:
+            tracker.deleted.update(self._entities.keys())
+        super().clear_database()
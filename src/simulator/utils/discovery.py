@@ -0,0 +1,158 @@
+"""Discovery of the components, builders and models available in folders.
+
+Folders are scanned with os.scandir and the metadata of each module (its mtime and its TYPE or MODEL tag)
+is cached for the process, so simulators built one after the other (e.g. in batches) don't read every module again.
+Tags are read from the module source with ast, without executing it. Only files whose mtime changed are read again.
+Modules are imported the first time their tag (or component name) is used, and are reused while the file is unchanged.
+"""
+import os
+import ast
+import logging
+import importlib
+import importlib.util
+
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, Dict, Iterator, Mapping, NamedTuple, Optional, Tuple
+
+
+class ModuleInfo(NamedTuple):
+    name: str
+    path: Path
+    mtime: int
+    # Value of the tag attribute (e.g. TYPE), None if it isn't a literal string
+    tag: Optional[str]
+
+
+# Scanned files by folder and tag attribute, with the mtime of the folder
+_folders: Dict[Tuple[Path, Optional[str]], Tuple[int, Dict[str, ModuleInfo]]] = {}
+# Modules executed from files, by path, with the mtime of the file
+_modules: Dict[Path, Tuple[int, ModuleType]] = {}
+
+
+def read_tag(path: Path, attribute: str) -> Optional[str]:
+    """The string assigned to `attribute` at the top level of the module, found without executing it."""
+    try:
+        with open(path, 'rb') as fd:
+            tree = ast.parse(fd.read(), str(path))
+    except (SyntaxError, ValueError):
+        return None
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets, value = node.targets, node.value
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets, value = [node.target], node.value
+        else:
+            continue
+        if any(isinstance(t, ast.Name) and t.id == attribute for t in targets) \
+                and isinstance(value, ast.Constant) and isinstance(value.value, str):
+            return value.value
+    return None
+
+
+def scan_folder(path: Path, attribute: Optional[str] = None) -> Dict[str, ModuleInfo]:
+    """Python modules in the folder, by file name. The tag attribute is read if given."""
+    logger = logging.getLogger(__name__)
+    path = Path(path).absolute()
+    try:
+        folder_mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        logger.log(5, f'[scan_folder] Path {path} not found')
+        return {}
+    key = (path, attribute)
+    cached_mtime, cached = _folders.get(key, (None, {}))
+    if cached_mtime == folder_mtime and all(info.path.stat().st_mtime_ns == info.mtime for info in cached.values()):
+        return cached
+    modules = {}
+    for entry in sorted(os.scandir(path), key=lambda e: e.name):
+        file_name, extension = os.path.splitext(entry.name)
+        if extension != '.py' or (file_name.startswith('__') and file_name.endswith('__')):
+            continue
+        mtime = entry.stat().st_mtime_ns
+        info = cached.get(file_name, None)
+        if info is None or info.mtime != mtime:
+            tag = read_tag(Path(entry.path), attribute) if attribute is not None else None
+            info = ModuleInfo(file_name, Path(entry.path), mtime, tag)
+        modules[file_name] = info
+    _folders[key] = (folder_mtime, modules)
+    return modules
+
+
+def load_module(info: ModuleInfo) -> ModuleType:
+    """Executes the module file. The module is reused while the file doesn't change."""
+    cached = _modules.get(info.path, None)
+    if cached is not None and cached[0] == info.mtime:
+        return cached[1]
+    spec = importlib.util.spec_from_file_location(info.name, info.path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    _modules[info.path] = (info.mtime, module)
+    return module
+
+
+class LazyModules(Mapping):
+    """Modules by key (tag or name), imported on first access."""
+
+    def __init__(self):
+        self.loaders: Dict[str, Callable[[], ModuleType]] = {}
+        self.loaded: Dict[str, ModuleType] = {}
+
+    def register(self, key: str, loader: Callable[[], ModuleType]):
+        self.loaders[key] = loader
+        self.loaded.pop(key, None)
+
+    def update(self, other: 'LazyModules'):
+        for key, loader in other.loaders.items():
+            self.register(key, loader)
+
+    def __getitem__(self, key: str) -> ModuleType:
+        if key not in self.loaded:
+            self.loaded[key] = self.loaders[key]()
+        return self.loaded[key]
+
+    def __contains__(self, key) -> bool:
+        # Mapping's default gets the item, which would import the module
+        return key in self.loaders
+
+    def get(self, key: str, default=None) -> Optional[ModuleType]:
+        return self[key] if key in self.loaders else default
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.loaders)
+
+    def __len__(self) -> int:
+        return len(self.loaders)
+
+    def __repr__(self) -> str:
+        return f'LazyModules({list(self.loaders)})'
+
+
+def tagged_modules(path: Path, attribute: str, modules: Optional[LazyModules] = None) -> LazyModules:
+    """Modules of the folder by the value of their tag attribute (e.g. TYPE for builders).
+    Modules whose tag isn't a literal string are executed to find it.
+    """
+    logger = logging.getLogger(__name__)
+    modules = modules if modules is not None else LazyModules()
+    for info in scan_folder(path, attribute).values():
+        if info.tag is not None:
+            modules.register(info.tag, lambda info=info: load_module(info))
+            continue
+        try:
+            module = load_module(info)
+        except AttributeError:
+            logger.error(f'Failed to load module {info.path}')
+            continue
+        tag = getattr(module, attribute, None)
+        if tag is None:
+            logger.error(f'Module {info.path} has no {attribute}')
+            continue
+        modules.register(tag, lambda module=module: module)
+    return modules
+
+
+def package_modules(path: Path, prefix: str, modules: Optional[LazyModules] = None) -> LazyModules:
+    """Modules of the folder by file name, imported as `prefix.name`."""
+    modules = modules if modules is not None else LazyModules()
+    for name in scan_folder(path):
+        modules.register(name, lambda name=name: importlib.import_module(prefix + '.' + name))
+    return modules
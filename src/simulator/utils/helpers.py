@@ -1,19 +1,31 @@
 import math
-import os
-import importlib.util
-import importlib
+import random
+import functools
 from simulator import primitives
 from collision import Vector
 from simulator.typehints.component_types import ShapeDefinition, Point
-from typing import Tuple, Union, List, Dict
-from pathlib import Path
+from types import MappingProxyType
+from typing import Tuple, Union, List, Mapping
 import logging
 
 logger = logging.getLogger(__name__)
 ShapeType = Union[primitives.Rectangle, primitives.Ellipse]
+# Distinct style strings kept parsed. Maps repeat few styles many times.
+STYLE_CACHE_SIZE = 4096
 
 
 def parse_style(style):
+    """Parses a drawio style string. Returns a new dict, that callers can change."""
+    return dict(style_mapping(style))
+
+
+@functools.lru_cache(maxsize=STYLE_CACHE_SIZE)
+def style_mapping(style: str) -> Mapping[str, Union[str, bool]]:
+    """Parsed style, shared by every cell with the same style string. It's read-only."""
+    return MappingProxyType(_parse_style(style))
+
+
+def _parse_style(style):
     s = {}
     items = style.split(';')
     for item in items:
@@ -28,7 +40,8 @@ def parse_style(style):
 
 
 def get_rel_points(center: Point, points: List[Point]) -> List[Vector]:
-    return list(map(lambda x: Vector(x[0] - center[0], x[1] - center[1]), points))
+    cx, cy = center
+    return [Vector(x - cx, y - cy) for x, y in points]
 
 
 def tuple2vector(x: Point) -> Vector:
@@ -55,6 +68,18 @@ def rotate_around_point(xy, radians, origin=(0, 0)):
     return qx, qy
 
 
+def rotate_points(points: List[Point], radians: float, origin: Point = (0, 0)) -> List[Point]:
+    """rotate_around_point for many points, computing the sine and cosine once."""
+    offset_x, offset_y = origin
+    cos_rad = math.cos(radians)
+    sin_rad = math.sin(radians)
+    return [
+        (offset_x + cos_rad * (x - offset_x) + sin_rad * (y - offset_y),
+         offset_y + -sin_rad * (x - offset_x) + cos_rad * (y - offset_y))
+        for x, y in points
+    ]
+
+
 def rotate_shape_definition(definition: ShapeDefinition, angle: float, center: Point) -> ShapeDefinition:
     if angle < 0:
         angle = 360 + angle
@@ -76,46 +101,12 @@ def mirror_shape_definition_vertically(definition: ShapeDefinition, shape_center
     new_points = list(map(lambda p: (p[0], (shape_center[1] - p[1]) + shape_center[1]), definition[1]))
     return new_def_center, new_points
 
-def list_folder(path: Path) -> Dict:
-    available = {}
-    if not path.exists():
-        logger.log(5, f'[list_folder] Path {path} not found')
-        return {}
-    try:
-        for component in os.listdir(path):
-            file_name, extension = os.path.splitext(component)
-            if not extension == '.py':
-                continue
-            if file_name.startswith('__') and file_name.endswith('__'):
-                continue
-            try:
-                spec = importlib.util.spec_from_file_location(file_name, path / component)
-                module = importlib.util.module_from_spec(spec)
-                available[file_name] = module
-                spec.loader.exec_module(module)
-            except AttributeError:
-                logger.error(f'Failed to load module {path / file_name}')
-    except FileNotFoundError:
-        return {}
-    return available
-
-def import_components_from_folder(path: Path, prefix: str):
-    available = {}
-    if not path.exists():
-        logger.log(5, f'[list_folder] Path {path} not found')
-        return {}
+
+def seed_generators(seed: int):
+    """Seeds the python and numpy (if installed) random generators."""
+    random.seed(seed)
     try:
-        for component in os.listdir(path):
-            file_name, extension = os.path.splitext(component)
-            if not extension == '.py':
-                continue
-            if file_name.startswith('__') and file_name.endswith('__'):
-                continue
-            try:
-                module = importlib.import_module(prefix + '.' + file_name)
-                available[file_name] = module
-            except AttributeError:
-                logger.error(f'Failed to load module {path / file_name}')
-    except FileNotFoundError:
-        return {}
-    return available
\ No newline at end of file
+        import numpy
+        numpy.random.seed(seed)
+    except ImportError:
+        pass
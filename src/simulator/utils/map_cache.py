@@ -0,0 +1,133 @@
+"""Compiled cache of parsed maps.
+
+Parsing a drawio map (XML, inflate, cell decoding and builders) is done once.
+The result of `map_parser.build_simulation_from_map` is saved in the cache directory,
+and loaded directly while the map and the code that built it don't change.
+
+Cache files are named after the map and a key, the hash of the map contents and the build options.
+They start with a json header that lists the source files the result depends on
+(map parser, cell decoder, builders, models and the modules of the components in the world) with their hashes.
+A cache file is only used if all of them are unchanged.
+"""
+import io
+import os
+import sys
+import json
+import zlib
+import struct
+import hashlib
+import logging
+import pathlib
+import tempfile
+
+from typing import Dict, List, Optional
+
+from simulator.utils import Snapshot
+
+MAGIC = b'HMRMAP'
+VERSION = 1
+HEADER_FORMAT = '>BI'
+DEFAULT_CACHE_DIR = '.map_cache'
+
+SIMULATOR_DIR = pathlib.Path(__file__).parent.parent
+
+
+def file_hash(file: pathlib.Path) -> str:
+    with open(file, 'rb') as fd:
+        return hashlib.sha256(fd.read()).hexdigest()
+
+
+def cache_key(map_file: pathlib.Path, simulation_components, line_width: int) -> str:
+    digest = hashlib.sha256()
+    digest.update(json.dumps([VERSION, simulation_components, line_width], sort_keys=True, default=str).encode())
+    with open(map_file, 'rb') as fd:
+        digest.update(fd.read())
+    return digest.hexdigest()
+
+
+def cache_file(cache_dir: pathlib.Path, map_file: pathlib.Path, key: str) -> pathlib.Path:
+    return cache_dir / f'{map_file.stem}-{key[:16]}.map'
+
+
+def source_files(map_file: pathlib.Path, simulation: dict) -> List[pathlib.Path]:
+    """Source files the simulation built from a map depends on."""
+    files = [SIMULATOR_DIR / 'map_parser.py', SIMULATOR_DIR / 'mxCellDecoder.py']
+    for folder in [SIMULATOR_DIR / 'builders', SIMULATOR_DIR / 'models', map_file.parent / 'builders']:
+        if folder.is_dir():
+            files += sorted(f for f in folder.glob('*.py') if f.name != '__init__.py')
+    modules = set()
+    for components in simulation['world']._entities.values():
+        for component_type in components:
+            modules.add(component_type.__module__)
+    for module_name in sorted(modules):
+        module_file = getattr(sys.modules.get(module_name, None), '__file__', None)
+        if module_file is not None:
+            files.append(pathlib.Path(module_file))
+    return files
+
+
+def load(cache_dir: pathlib.Path, map_file: pathlib.Path, simulation_components, line_width: int) -> Optional[dict]:
+    """The cached simulation of a map, or None if there is no valid cache file."""
+    logger = logging.getLogger(__name__)
+    file = cache_file(cache_dir, map_file, cache_key(map_file, simulation_components, line_width))
+    if not file.exists():
+        return None
+    try:
+        with open(file, 'rb') as fd:
+            data = fd.read()
+        if not data.startswith(MAGIC):
+            return None
+        offset = len(MAGIC)
+        version, header_size = struct.unpack_from(HEADER_FORMAT, data, offset)
+        if version != VERSION:
+            return None
+        offset += struct.calcsize(HEADER_FORMAT)
+        sources: Dict[str, str] = json.loads(data[offset:offset + header_size])
+        for source, digest in sources.items():
+            if not pathlib.Path(source).exists() or file_hash(pathlib.Path(source)) != digest:
+                logger.info(f'Map cache {file} is outdated ({source} changed)')
+                return None
+        simulation = Snapshot.load_state(data[offset + header_size:], {})
+    except Exception as err:
+        logger.warning(f'Failed to load map cache {file} - {err}')
+        return None
+    simulation['world'] = Snapshot.build_world(simulation['world'])
+    logger.info(f'Loaded map {map_file} from cache {file}')
+    return simulation
+
+
+def store(cache_dir: pathlib.Path, map_file: pathlib.Path, simulation_components, line_width: int, simulation: dict):
+    """Saves the simulation built from a map. Older cache files of the same map are removed."""
+    logger = logging.getLogger(__name__)
+    file = cache_file(cache_dir, map_file, cache_key(map_file, simulation_components, line_width))
+    sources = {str(f.absolute()): file_hash(f) for f in source_files(map_file, simulation)}
+    buffer = io.BytesIO()
+    try:
+        Snapshot.SnapshotPickler(buffer, {}).dump({**simulation, 'world': Snapshot.world_state(simulation['world'])})
+    except Exception as err:
+        logger.warning(f'Map {map_file} can not be cached - {err}')
+        return
+    header = json.dumps(sources).encode()
+    # Builds of the same map can run in parallel (e.g. batch runs). Cache files are written to a temporary file
+    # and moved into place, so they are never read half written. Failing to store the cache isn't an error.
+    temp_file = None
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        temp = tempfile.NamedTemporaryFile('wb', dir=cache_dir, prefix=f'.{file.stem}-', suffix='.tmp', delete=False)
+        with temp as fd:
+            temp_file = pathlib.Path(fd.name)
+            fd.write(MAGIC)
+            fd.write(struct.pack(HEADER_FORMAT, VERSION, len(header)))
+            fd.write(header)
+            fd.write(zlib.compress(buffer.getvalue()))
+        os.replace(temp_file, file)
+        temp_file = None
+        for old_file in cache_dir.glob(f'{map_file.stem}-*.map'):
+            if old_file != file:
+                old_file.unlink(missing_ok=True)
+    except OSError as err:
+        logger.warning(f'Map {map_file} could not be cached in {file} - {err}')
+        if temp_file is not None:
+            temp_file.unlink(missing_ok=True)
+        return
+    logger.info(f'Map {map_file} cached in {file}')
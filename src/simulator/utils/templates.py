@@ -0,0 +1,104 @@
+"""Entity templates.
+
+Configs with many similar entities (e.g. a swarm of drones) can define them once, in `templates`,
+and list `instances` of the templates with only what changes:
+
+    "templates": {
+        "drone": {"type": "drone", "isObject": true, "isInteractive": false, "components": {
+            "Position": [0, 0, 0, 5, 5],
+            "Collidable": [[[[2.5, 2.5], [[0, 0], [5, 0], [5, 5], [0, 5]]]]],
+            "Skeleton": ["drone", "rounded=0;html=1;fillColor=#000000;"],
+            "ProximitySensor": [8, "drone_sensor"]
+        }}
+    },
+    "instances": [
+        {"template": "drone", "entId": "drone_0", "components": {"Position": [20, 20]}}
+    ]
+
+Instance keys replace the template's. Instance component args replace the template's args from the start,
+and the remaining args come from the template: drone_0 is at (20, 20), with size 5x5.
+Instances without entId are named <template>_<index in instances>.
+
+The components of a template are built once. Components an instance doesn't override are copies of them:
+    Collidable -- Shapes are moved with the instance's Position and share their geometry (see Collidable.translated).
+    Skeleton -- Gets the instance's entId.
+    Others -- Deep copies. Immutable attributes (e.g. style strings) are shared.
+"""
+import copy
+
+from typing import Any, Callable, Dict, List, Tuple
+
+from simulator.components.Collidable import Collidable
+from simulator.components.Position import Position
+from simulator.components.Skeleton import Skeleton
+from simulator.typehints.dict_types import EntityDefinition, EntityInstance, EntityTemplate
+
+ComponentConstructor = Callable[[str], Callable]
+
+
+def instance_id(instance: EntityInstance, idx: int) -> str:
+    return instance.get('entId', f'{instance["template"]}_{idx}')
+
+
+def merge_args(template_args: List[Any], instance_args: List[Any]) -> List[Any]:
+    return list(instance_args) + list(template_args[len(instance_args):])
+
+
+def instance_definition(template: EntityTemplate, instance: EntityInstance, ent_id: str) -> EntityDefinition:
+    """The entity definition of an instance of the template."""
+    definition = {key: value for key, value in template.items() if key != 'components'}
+    definition.update((key, value) for key, value in instance.items() if key not in ('template', 'components'))
+    definition['entId'] = ent_id
+    components = dict(template.get('components', {}))
+    for name, args in instance.get('components', {}).items():
+        components[name] = merge_args(components.get(name, []), args)
+    definition['components'] = components
+    return definition
+
+
+def copy_component(prototype: Any, offset: Tuple[float, float], ent_id: str) -> Any:
+    if isinstance(prototype, Collidable):
+        return prototype.translated(offset)
+    component = copy.deepcopy(prototype)
+    if isinstance(component, Skeleton):
+        component.id = ent_id
+    return component
+
+
+class TemplateBuilder:
+    """Builds the components of template instances. The components of each template are built once."""
+
+    def __init__(self, templates: Dict[str, EntityTemplate], constructor: ComponentConstructor):
+        self.templates = templates
+        self.constructor = constructor
+        self.constructors: Dict[str, Callable] = {}
+        self.prototypes: Dict[str, Dict[str, Any]] = {}
+
+    def component(self, name: str, args: List[Any]) -> Any:
+        if name not in self.constructors:
+            self.constructors[name] = self.constructor(name)
+        return self.constructors[name](*args)
+
+    def prototype(self, template_name: str) -> Dict[str, Any]:
+        if template_name not in self.prototypes:
+            components = self.templates[template_name].get('components', {})
+            self.prototypes[template_name] = {name: self.component(name, args) for name, args in components.items()}
+        return self.prototypes[template_name]
+
+    def build(self, instance: EntityInstance, ent_id: str) -> Tuple[EntityDefinition, List[Any]]:
+        """The entity definition and the components of an instance."""
+        template_name = instance['template']
+        if template_name not in self.templates:
+            raise KeyError(f'Template {template_name} of instance {ent_id} is not defined')
+        definition = instance_definition(self.templates[template_name], instance, ent_id)
+        prototypes = self.prototype(template_name)
+        overrides = instance.get('components', {})
+        components = {name: self.component(name, definition['components'][name]) for name in overrides}
+        offset = (0, 0)
+        template_position, position = prototypes.get('Position', None), components.get('Position', None)
+        if isinstance(template_position, Position) and isinstance(position, Position):
+            offset = (position.x - template_position.x, position.y - template_position.y)
+        for name, prototype in prototypes.items():
+            if name not in components:
+                components[name] = copy_component(prototype, offset, ent_id)
+        return definition, [components[name] for name in definition['components']]
@@ -1,9 +1,20 @@
+"""Validation of simulation configs.
+
+`compile_config` validates a config in a single pass, applies the defaults and returns a SimulationConfig,
+an immutable object with the options as attributes. The Simulator, `hmrsim configtest` and the batch runner use it.
+The checks of each part of the config (options, entity definitions, templates) are built once, on import.
+Errors start with the JSON path of the value, like `extraEntities[12].isObject`.
+
+The structure of the config is frozen: dicts are FrozenDicts and lists are tuples.
+Component args are given to the components as they are, so they aren't copied.
+"""
 import json
 import pathlib
 
-from typing import Dict, List, Union
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
 from simulator.typehints.build_types import ConfigParseError
-from simulator.typehints.dict_types import LogLevel
+from simulator.typehints.dict_types import EntityDefinition, EntityInstance, EntityTemplate, LogLevel
 
 VALIDATE_TYPES = [
     ('context', [str]),
@@ -12,14 +23,168 @@ VALIDATE_TYPES = [
     ('DLW', [int, float]),
     ('duration', [int, float]),
     ('verbose', [LogLevel, int]),
-    ('verbose', [LogLevel, int]),
     ('simulationComponents', [dict]),
     ('extraEntities', [list]),
+    ('templates', [dict]),
+    ('instances', [list]),
     ('simulatorConfigOptions', [dict])
 ]
+ENTITY_TYPES = [
+    ('entId', str),
+    ('components', dict),
+    ('isObject', bool),
+    ('isInteractive', bool),
+    ('name', str),
+    ('type', str)
+]
+ENTITY_REQUIRED = [('entId', int), ('isObject', bool), ('isInteractive', bool)]
+# simulatorConfigOptions, with their types and defaults (see typehints.dict_types.SimulatorOptions)
+OPTION_TYPES = [
+    ('loggerConfig', (str,)),
+    ('fastForward', (bool,)),
+    ('realTime', (bool, dict)),
+    ('profile', (bool, dict)),
+    ('mapCache', (bool, str)),
+]
+OPTION_DEFAULTS = {'fastForward': False, 'realTime': False, 'profile': False, 'mapCache': False}
 
-def validate_config(config: Union[str, Dict]) -> List[str]:
-    """ Validates a config object, passed as a dict or a string to json file"""
+# Problems found by a check, as (JSON path relative to the checked value, message)
+Problems = Optional[List[Tuple[str, str]]]
+ARGS_TYPES = (list, tuple)
+
+
+class FrozenDict(dict):
+    """dict that can't be changed. It copies and pickles like a dict."""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f'{type(self).__name__} is read-only')
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+
+@dataclass(frozen=True)
+class SimulationConfig:
+    """Validated simulation config, with the defaults applied. See typehints.dict_types.Config"""
+    context: str = '.'
+    map: Optional[str] = None
+    FPS: Union[int, float] = 0
+    DLW: Union[int, float] = 10
+    duration: Union[int, float] = -1
+    verbose: Union[LogLevel, int] = LogLevel.ERROR
+    simulationComponents: Optional[Mapping[str, list]] = None
+    extraEntities: Optional[Tuple[EntityDefinition, ...]] = None
+    templates: Mapping[str, EntityTemplate] = field(default_factory=FrozenDict)
+    instances: Optional[Tuple[EntityInstance, ...]] = None
+    simulatorConfigOptions: Mapping[str, Any] = field(default_factory=lambda: FrozenDict(OPTION_DEFAULTS))
+
+
+def join_path(path: str, relative: str) -> str:
+    if not relative:
+        return path
+    return f'{path}.{relative}' if path else relative
+
+
+def report(problems: Problems, path: str, errors: List[str]):
+    """Adds the problems found in the value at path to the errors."""
+    for relative, message in problems:
+        errors.append(f'{join_path(path, relative) or "Entity definition"}{message}')
+
+
+def freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(v)) for key, v in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def args_problems(components: dict, what: str, prefix: str = '') -> Problems:
+    problems = None
+    for name, args in components.items():
+        if not isinstance(args, ARGS_TYPES):
+            problems = problems or []
+            problems.append((f'{prefix}{name}', f': You should pass a list to initialize {what} {name}. '
+                                                f'{type(args)} found.'))
+    return problems
+
+
+def entity_check(required: List[Tuple[str, type]]) -> Callable[[Any], Tuple[Any, Problems]]:
+    """Check of entity definitions (of templates if nothing is required).
+    The check returns the frozen definition and the problems found (None if there are none).
+    """
+    types = tuple(ENTITY_TYPES)
+    required = tuple(required)
+    required_keys = frozenset(key for key, _ in required)
+
+    def check(definition: Any) -> Tuple[Any, Problems]:
+        if not isinstance(definition, dict):
+            return definition, [('', f' should be {dict}. {type(definition)} found.')]
+        problems = None
+        get = definition.get
+        for key, expected_type in types:
+            value = get(key)
+            if value is not None and not isinstance(value, expected_type):
+                problems = problems or []
+                problems.append((key, f' should be {expected_type}. {type(value)} found.'))
+        if not required_keys <= definition.keys():
+            for key, required_type in required:
+                if key not in definition:
+                    problems = problems or []
+                    problems.append((key, f' (type {required_type}) is required for entityDefiniton'))
+        frozen = FrozenDict(definition)
+        components = get('components')
+        if isinstance(components, dict):
+            for name, args in components.items():
+                if not isinstance(args, ARGS_TYPES):
+                    problems = (problems or []) + args_problems({name: args}, 'component', 'components.')
+            dict.__setitem__(frozen, 'components', FrozenDict(components))
+        return frozen, problems
+    return check
+
+
+check_entity = entity_check(ENTITY_REQUIRED)
+check_template = entity_check([])
+# entId of instances is generated if missing
+INSTANCE_REQUIRED = [(key, required_type) for key, required_type in ENTITY_REQUIRED if key != 'entId']
+
+
+def check_options(options: dict, path: str, errors: List[str]) -> FrozenDict:
+    for key, expected_types in OPTION_TYPES:
+        value = options.get(key, None)
+        if value is not None and not isinstance(value, expected_types):
+            errors.append(f'{join_path(path, key)} should be {list(expected_types)}. {type(value)} found.')
+    return freeze({**OPTION_DEFAULTS, **options})
+
+
+def check_instances(instances: list, templates: dict, path: str, errors: List[str], templates_valid=True) -> tuple:
+    """Checks the instances of the templates. The definitions of instances (with the template's keys) are only
+    checked if the templates are valid. Instance keys replace the template's, so they are checked like templates.
+    """
+    frozen = []
+    for i, instance in enumerate(instances):
+        template = instance.get('template', None) if isinstance(instance, dict) else None
+        if not isinstance(template, str) or template not in templates:
+            errors.append(f'{path}[{i}].template should be the name of a template. {template} found.')
+            frozen.append(instance)
+            continue
+        instance, problems = check_template(instance)
+        if templates_valid:
+            for key, required_type in INSTANCE_REQUIRED:
+                if key not in instance and key not in templates[template]:
+                    problems = problems or []
+                    problems.append((key, f' (type {required_type}) is required for entityDefiniton'))
+        if problems:
+            report(problems, f'{path}[{i}]', errors)
+        frozen.append(instance)
+    return tuple(frozen)
+
+
+def load_config(config: Union[str, Dict]) -> Dict:
+    """The config object, passed as a dict or a path to a json file"""
     if isinstance(config, str):
         path = pathlib.Path(config)
         if not path.exists():
@@ -28,50 +193,79 @@ def validate_config(config: Union[str, Dict]) -> List[str]:
             raise ConfigParseError(f'File {path.absolute()} is not a JSON file. Only JSON is supported.')
         with open(path, 'r') as fd:
             config = json.loads(fd.read())
-    # Parse config
-    errors_found = []
-    # Type checking
+    return config
+
+
+def check_config(config: Dict) -> Tuple[Optional[SimulationConfig], List[str]]:
+    """Validates a config object. Returns the SimulationConfig (None if the config has errors) and the errors."""
+    errors = []
+    values = {}
     for key, expected_types in VALIDATE_TYPES:
         value = config.get(key, None)
-        if value is not None and not (type(value) in expected_types):
-            errors_found.append(f'{key} should be {expected_types}. {type(value)} found.')
-    # Check extra types
-    if 'simulationComponents' in config:
-        simulator_components = config['simulationComponents']
-        for key, value in simulator_components.items():
-            if not isinstance(value, list):
-                errors_found.append(f'You should pass a list to initialize simulation component {key}. {type(value)} found.')
-    if 'extraEntities' in config:
-        extra_entities = config['extraEntities']
-        for i, v in enumerate(extra_entities):
-            errors_in_entity = validate_entity_definition(v)
-            if len(errors_in_entity):
-                errors_found.append(f'Errors in extra entity definition (entity {i}):')
-                errors_found += list(map(lambda x: f'\t* {x}', errors_in_entity))
-    if 'map' in config:
-        map_file = pathlib.Path(config.get('context', '.')) / config['map']
+        if value is None:
+            continue
+        if type(value) not in expected_types:
+            errors.append(f'{key} should be {expected_types}. {type(value)} found.')
+            continue
+        values[key] = value
+    if 'simulationComponents' in values:
+        problems = args_problems(values['simulationComponents'], 'simulation component')
+        if problems:
+            report(problems, 'simulationComponents', errors)
+        values['simulationComponents'] = FrozenDict(values['simulationComponents'])
+    if 'extraEntities' in values:
+        entities = []
+        for i, definition in enumerate(values['extraEntities']):
+            definition, problems = check_entity(definition)
+            if problems:
+                report(problems, f'extraEntities[{i}]', errors)
+            entities.append(definition)
+        values['extraEntities'] = tuple(entities)
+    templates_valid = True
+    if 'templates' in values:
+        templates = {}
+        for name, template in values['templates'].items():
+            templates[name], problems = check_template(template)
+            if problems:
+                report(problems, f'templates.{name}', errors)
+                templates_valid = False
+        values['templates'] = FrozenDict(templates)
+    if 'instances' in values:
+        values['instances'] = check_instances(
+            values['instances'], values.get('templates', {}), 'instances', errors, templates_valid
+        )
+    if 'simulatorConfigOptions' in values:
+        values['simulatorConfigOptions'] = check_options(
+            values['simulatorConfigOptions'], 'simulatorConfigOptions', errors
+        )
+    if 'map' in values:
+        map_file = pathlib.Path(values.get('context', '.')) / values['map']
         if not map_file.exists():
-            errors_found.append(f'Map file {map_file.absolute()} not found')
-    return errors_found
+            errors.append(f'Map file {map_file.absolute()} not found')
+    if errors:
+        return None, errors
+    return SimulationConfig(**values), errors
+
+
+def compile_config(config: Union[str, Dict, SimulationConfig]) -> SimulationConfig:
+    """Validates a config object, passed as a dict or a path to a json file. Raises ConfigParseError with the errors."""
+    if isinstance(config, SimulationConfig):
+        return config
+    compiled, errors = check_config(load_config(config))
+    if errors:
+        raise ConfigParseError(f'{len(errors)} errors found in config', errors=errors)
+    return compiled
+
+
+def validate_config(config: Union[str, Dict]) -> List[str]:
+    """ Validates a config object, passed as a dict or a string to json file"""
+    return check_config(load_config(config))[1]
 
 
 def validate_entity_definition(definition: Dict) -> List[str]:
     """ Validates an entityDefinition object"""
     errors = []
-    types = [
-        ('entId', str),
-        ('components', dict),
-        ('isObject', bool),
-        ('isInteractive', bool),
-        ('name', str),
-        ('type', str)
-    ]
-    for key, expected_type in types:
-        value = definition.get(key, None)
-        if value is not None and not isinstance(value, expected_type):
-            errors.append(f'{key} should be {expected_type}. {type(value)} found.')
-    required = [('entId', int), ('isObject', bool), ('isInteractive', bool)]
-    for key, required_type in required:
-        if not (key in definition):
-            errors.append(f'{key} (type {required_type}) is required for entityDefiniton')
+    _, problems = check_entity(definition)
+    if problems:
+        report(problems, '', errors)
     return errors
@@ -197,7 +197,7 @@ def test_get_state_change():
     obs._get_components_change.assert_called()
 
 
-def test_process():
+def test_process(monkeypatch):
     env = simpy.Environment()
     event_store = simpy.FilterStore(env)
 
@@ -230,7 +230,7 @@ def test_process():
     # Case 2: Two entities added
     obs._get_state_change = MagicMock(return_value={0: [], 1: []})
     obs._get_ents = MagicMock(return_value={})
-    type(env).now = PropertyMock(return_value=42)
+    monkeypatch.setattr(type(env), "now", PropertyMock(return_value=42))
 
     obs.process(kwargs)
 
@@ -247,7 +247,7 @@ def test_process():
     # Case 3: Two entities added
     obs._get_state_change = MagicMock(return_value={0: [1, 2, 3], 1: [1]})
     obs._get_ents = MagicMock(return_value={})
-    type(env).now = PropertyMock(return_value=42)
+    monkeypatch.setattr(type(env), "now", PropertyMock(return_value=42))
 
     obs.process(kwargs)
 
@@ -0,0 +1,195 @@
+import threading
+
+import esper
+import pytest
+import simpy
+
+import simulator.systems.SeerPlugin as Seer
+from simulator.systems.SeerPlugin import (
+    BackpressurePolicy,
+    MessageBuffer,
+    SeerConsumer,
+    merge_frames,
+)
+from simulator.components.Position import Position
+from simulator.components.Skeleton import Skeleton
+from simulator.utils.TrackedWorld import TrackedWorld
+
+
+def frame(msg_idx, timestamp, **entities):
+    return {"timestamp": timestamp, **entities}, msg_idx
+
+
+def test_merge_frames():
+    older = {"timestamp": 0.1, "robot": {"x": 1}, "box": {"x": 2}, "deleted": ["cup"]}
+    newer = {"timestamp": 0.2, "robot": {"x": 5}, "cup": {"x": 3}, "deleted": ["box"]}
+    assert merge_frames(older, newer) == {
+        "timestamp": 0.2,
+        "robot": {"x": 5},
+        "cup": {"x": 3},
+        "deleted": ["box"],
+    }
+    # Inputs are not modified
+    assert older["deleted"] == ["cup"]
+
+
+def test_merge_frames_drops_entities_created_and_deleted():
+    older = {"timestamp": 0.1, "robot": {"x": 1}, "box": {"x": 2}}
+    newer = {"timestamp": 0.2, "robot": {"x": 5}, "deleted": ["box"]}
+    # The consumer never saw the box
+    assert merge_frames(older, newer, known={"robot"}) == {"timestamp": 0.2, "robot": {"x": 5}}
+    # The box was reported before the older frame
+    assert merge_frames(older, newer, known={"robot", "box"}) == {
+        "timestamp": 0.2, "robot": {"x": 5}, "deleted": ["box"]
+    }
+
+
+def test_buffer_coalesce_drops_entities_never_delivered():
+    buffer = MessageBuffer(2, BackpressurePolicy.COALESCE)
+    buffer.put(frame(0, -1))
+    buffer.put(frame(1, 0.0, robot={"x": 0}))
+    assert [idx for _, idx in buffer.get_batch(2)] == [0, 1]
+    buffer.put(frame(2, 0.1, cup={"x": 1}))
+    buffer.put(frame(3, 0.2, box={"x": 2}, robot={"x": 1}))
+    buffer.put(frame(4, 0.3, deleted=["box", "cup", "robot"]))
+    # The cup is queued in an older frame and the robot was delivered, so they are still deleted
+    assert buffer.get_batch(10) == [
+        frame(2, 0.1, cup={"x": 1}),
+        ({"timestamp": 0.3, "deleted": ["cup", "robot"]}, 4),
+    ]
+
+
+def test_buffer_drop_oldest_keeps_pinned_messages():
+    buffer = MessageBuffer(3, BackpressurePolicy.DROP_OLDEST)
+    for idx in range(6):
+        buffer.put(frame(idx, idx / 10))
+    assert [idx for _, idx in buffer.items] == [0, 1, 5]
+    assert buffer.dropped == 3
+    # The end message always fits
+    buffer.put(({"theEnd": True}, -1))
+    assert [idx for _, idx in buffer.get_batch(10)] == [0, 1, 5, -1]
+
+
+def test_buffer_coalesce():
+    buffer = MessageBuffer(3, BackpressurePolicy.COALESCE)
+    buffer.put(frame(0, -1))
+    buffer.put(frame(1, 0.0, robot={"x": 0}, wall={"x": 9}))
+    buffer.put(frame(2, 0.1, robot={"x": 1}))
+    buffer.put(frame(3, 0.2, robot={"x": 2}))
+    buffer.put(frame(4, 0.3, box={"x": 4}))
+    batch = buffer.get_batch(2)
+    assert [idx for _, idx in batch] == [0, 1]
+    assert buffer.get_batch(2) == [({"timestamp": 0.3, "robot": {"x": 2}, "box": {"x": 4}}, 4)]
+    assert buffer.coalesced == 2
+
+
+def test_buffer_coalesces_backlog_over_threshold():
+    buffer = MessageBuffer(10, BackpressurePolicy.BLOCK, coalesce_threshold=3)
+    buffer.put(frame(0, -1))
+    buffer.put(frame(1, 0.0, robot={"x": 0}))
+    buffer.put(frame(2, 0.1, robot={"x": 1}))
+    buffer.put(frame(3, 0.2, robot={"x": 2}, deleted=["box"]))
+    buffer.put(frame(4, 0.3, cup={"x": 3}))
+    buffer.put(({"theEnd": True}, -1))
+    assert buffer.get_batch(10) == [
+        frame(0, -1),
+        frame(1, 0.0, robot={"x": 0}),
+        ({"timestamp": 0.3, "robot": {"x": 2}, "cup": {"x": 3}, "deleted": ["box"]}, 4),
+        ({"theEnd": True}, -1),
+    ]
+    assert buffer.coalesced == 2
+    # Under the threshold every frame is delivered
+    buffer.put(frame(5, 0.4))
+    buffer.put(frame(6, 0.5))
+    assert [idx for _, idx in buffer.get_batch(10)] == [5, 6]
+
+
+def test_lossless_consumer_rejects_lossy_options():
+    threads = threading.active_count()
+    with pytest.raises(ValueError):
+        Seer.init([print, SeerConsumer(print, lossless=True, policy=BackpressurePolicy.DROP_OLDEST)], 0.1)
+    # No worker was started for the valid consumer
+    assert threading.active_count() == threads
+
+
+def test_failing_consumer_keeps_draining():
+    buffer = MessageBuffer(2, BackpressurePolicy.BLOCK)
+    delivered = []
+
+    def callback(message, msg_idx):
+        if msg_idx == 1:
+            raise ConnectionError('sink is down')
+        delivered.append(msg_idx)
+
+    worker = threading.Thread(target=Seer.consumer_worker, args=[SeerConsumer(callback, max_batch=1), buffer])
+    worker.start()
+    for idx in range(5):
+        buffer.put(frame(idx, idx / 10))
+    buffer.put(({"theEnd": True}, -1))
+    worker.join(timeout=1)
+    assert not worker.is_alive()
+    assert delivered == [0, 2, 3, 4, -1]
+
+
+def test_seer_plugin_delivery():
+    world = esper.World()
+    world.create_entity(Skeleton("window", '{"width": 100, "height": 100}', model=True))
+    robot = Position(x=1.0, y=2.0, w=10.0, h=10.0)
+    world.create_entity(Skeleton("robot", "ellipse;"), robot)
+    env = simpy.Environment()
+    kwargs = {"ENV": env, "WORLD": world, "EVENT_STORE": simpy.FilterStore(env)}
+
+    single = []
+    batches = []
+    process, clean = Seer.init(
+        [
+            SeerConsumer(lambda message, idx: single.append((message, idx)), lossless=True),
+            SeerConsumer(batches.append, batch=True)
+        ],
+        0.1,
+        coalesce_threshold=100
+    )
+    env.process(process(kwargs))
+    try:
+        env.run(until=0.35)
+    finally:
+        clean()
+
+    assert [idx for _, idx in single] == [0, 1, 2, 3, 4, -1]
+    assert single[1][0]["robot"]["x"] == 1.0
+    assert "robot" not in single[2][0]
+    assert [item for batch in batches for item in batch] == single
+
+
+def test_seer_plugin_reports_tracked_changes():
+    world = TrackedWorld()
+    world.create_entity(Skeleton("window", '{"width": 100, "height": 100}', model=True))
+    robot = world.create_entity(Skeleton("robot", "ellipse;"), Position(x=1.0))
+    wall = world.create_entity(Skeleton("wall", "rect;"), Position(x=50.0))
+    env = simpy.Environment()
+    kwargs = {"ENV": env, "WORLD": world, "EVENT_STORE": simpy.FilterStore(env)}
+
+    def script():
+        yield env.timeout(0.15)
+        world.component_for_entity(robot, Position).x = 2.0
+        world.component_for_entity(robot, Position).changed = True
+        yield env.timeout(0.1)
+        world.delete_entity(wall)
+        world.create_entity(Skeleton("box", "rect;"), Position(x=9.0))
+
+    messages = []
+    process, clean = Seer.init([SeerConsumer(lambda message, idx: messages.append(message), lossless=True)], 0.1)
+    env.process(process(kwargs))
+    env.process(script())
+    try:
+        env.run(until=0.35)
+    finally:
+        clean()
+
+    assert set(messages[1].keys()) == {"timestamp", "robot", "wall"}
+    assert messages[2] == {"timestamp": 0.1}
+    assert messages[3]["robot"]["x"] == 2.0 and "wall" not in messages[3]
+    assert messages[4]["deleted"] == ["wall"] and messages[4]["box"]["x"] == 9.0
+    # Reported changes are cleared, as in untracked worlds, and the tracker is unsubscribed on cleanup
+    assert world.component_for_entity(robot, Position).changed is False
+    assert world.dispatcher.trackers == []
@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from simulator.batch import BatchRun, expand_grid, plan_batch, run_batch
+from simulator.typehints.build_types import ConfigParseError
+
+
+def setup(simulator, run: BatchRun):
+    samples = [random.random() for _ in range(run.params.get("params.samples", 1))]
+
+    def collect():
+        return {"samples": samples, "fps": simulator.FPS}
+
+    return collect
+
+
+def test_plan_batch():
+    base = {"context": "tests/bdd/data", "FPS": 8, "simulatorConfigOptions": {"loggerConfig": "x.yml"}}
+    assert expand_grid({"a": [1, 2], "b": ["x"]}) == [{"a": 1, "b": "x"}, {"a": 2, "b": "x"}]
+    runs = plan_batch(base, {"FPS": [8, 16], "simulatorConfigOptions.fastForward": [True]}, replications=2)
+    assert len(runs) == 4
+    assert [(r.index, r.replication) for r in runs] == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    assert runs[2].config["FPS"] == 16
+    assert runs[2].config["simulatorConfigOptions"] == {"loggerConfig": "x.yml", "fastForward": True}
+    assert base["FPS"] == 8
+    # Seeds depend on the parameters, not on the grid order
+    assert len(set(r.seed for r in runs)) == 4
+    reordered = plan_batch(base, {"FPS": [16, 8], "simulatorConfigOptions.fastForward": [True]}, replications=2)
+    assert reordered[0].seed == runs[2].seed
+
+
+def test_run_batch():
+    base = {"context": "tests/bdd/data", "FPS": 8, "duration": 1}
+    grid = {"FPS": [8, 16], "params.samples": [2]}
+    results = run_batch(base, grid, replications=2, workers=2, base_seed=7, setup="test_batch:setup")
+    runs = results["runs"]
+    assert [r["error"] for r in runs] == [None] * 4
+    assert [r["metrics"]["fps"] for r in runs] == [8, 8, 16, 16]
+    assert runs[0]["metrics"]["sim_time"] == 1
+    # Replications of a config share its build, and report how long it took
+    build_times = [r["metrics"]["build_time"] for r in runs]
+    assert build_times[0] == build_times[1] > 0 and build_times[2] == build_times[3] > 0
+    # Replications are deterministic, with or without reusing the build
+    again = run_batch(base, grid, replications=2, workers=1, base_seed=7, setup="test_batch:setup", reuse_build=False)
+    assert [r["metrics"]["samples"] for r in again["runs"]] == [r["metrics"]["samples"] for r in runs]
+    assert runs[0]["metrics"]["samples"] != runs[1]["metrics"]["samples"]
+
+
+def test_invalid_config_stops_the_batch():
+    base = {"context": "tests/bdd/data", "FPS": 8, "duration": 1}
+    with pytest.raises(ConfigParseError) as err:
+        run_batch(base, {"FPS": [8, "fast"]}, workers=1)
+    assert err.value.errors == ["FPS should be [<class 'int'>, <class 'float'>]. <class 'str'> found."]
@@ -0,0 +1,54 @@
+import os
+
+from simulator.dynamic_builders import export_available_builders
+from simulator.utils import discovery
+
+
+def write_module(path, source, mtime):
+    path.write_text(source)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_tags_are_read_without_executing_modules(tmp_path):
+    write_module(tmp_path / 'Door.py', "TYPE = 'door'\nraise RuntimeError('executed')\n", 1_000_000_000)
+    write_module(tmp_path / 'Computed.py', "TYPE = 'comp' + 'uted'\n", 1_000_000_000)
+    write_module(tmp_path / 'Untagged.py', "VALUE = 1\n", 1_000_000_000)
+    modules = discovery.tagged_modules(tmp_path, 'TYPE')
+    assert set(modules) == {'door', 'computed'}
+    assert discovery.scan_folder(tmp_path, 'TYPE')['Door'].tag == 'door'
+    assert modules['computed'].TYPE == 'computed'
+
+
+def test_membership_checks_import_nothing(tmp_path):
+    write_module(tmp_path / 'Door.py', "TYPE = 'door'\nraise RuntimeError('executed')\n", 1_000_000_000)
+    modules = discovery.tagged_modules(tmp_path, 'TYPE')
+    assert 'door' in modules and 'gate' not in modules
+    assert modules.get('gate') is None
+    assert modules.loaded == {}
+
+
+def test_modules_are_reused_until_they_change(tmp_path):
+    module_file = tmp_path / 'Door.py'
+    write_module(module_file, "TYPE = 'door'\nVALUE = 1\n", 1_000_000_000)
+    first = discovery.tagged_modules(tmp_path, 'TYPE')['door']
+    assert discovery.tagged_modules(tmp_path, 'TYPE')['door'] is first
+
+    write_module(module_file, "TYPE = 'gate'\nVALUE = 2\n", 2_000_000_000)
+    modules = discovery.tagged_modules(tmp_path, 'TYPE')
+    assert set(modules) == {'gate'}
+    assert modules['gate'] is not first and modules['gate'].VALUE == 2
+
+
+def test_export_available_builders():
+    default_builders = export_available_builders()
+    assert set(export_available_builders()) == set(default_builders)
+    assert {'robot', 'POI', 'path'} <= set(default_builders)
+    assert callable(default_builders['robot'].build_object)
+
+
+def test_simulator_builders_replace_extra_builders(tmp_path):
+    write_module(tmp_path / 'MyRobot.py', "TYPE = 'robot'\n", 1_000_000_000)
+    write_module(tmp_path / 'Door.py', "TYPE = 'door'\n", 1_000_000_000)
+    builders = export_available_builders([tmp_path])
+    assert 'door' in builders
+    assert builders['robot'].__file__ != str(tmp_path / 'MyRobot.py')
@@ -0,0 +1,70 @@
+import os
+import json
+import time
+import threading
+
+from simulator.systems.SeerPlugin import MessageBuffer, BackpressurePolicy, consumer_worker
+from simulator.utils.Firebase import Firebase_conn, FirebaseBatchWriter, LocalFirebaseDB
+
+working_dir = os.path.dirname(os.path.realpath(__file__))
+data_dir = os.path.join(working_dir, '..', 'bdd', 'data')
+
+
+def seer_messages():
+    with open(os.path.join(data_dir, 'seer_report.txt')) as fd:
+        messages = [(json.loads(line), idx) for idx, line in enumerate(fd)]
+    return messages + [({"theEnd": True}, -1)]
+
+
+def test_batch_writer_matches_seer_consumer(tmp_path):
+    messages = seer_messages()
+    single_db = LocalFirebaseDB()
+    firebase = Firebase_conn('sim', database=single_db)
+    for message, idx in messages:
+        firebase.seer_consumer(message, idx)
+
+    batch_db = LocalFirebaseDB(tmp_path / 'firebase.log')
+    writer = Firebase_conn('sim', database=batch_db).batch_writer(flush_interval=60, flush_size=16)
+    for start in range(0, len(messages), 4):
+        writer.seer_consumer(messages[start:start + 4])
+    batch_db.close()
+
+    assert batch_db.data == single_db.data
+    assert batch_db.requests == writer.requests < single_db.requests / 10
+    assert LocalFirebaseDB.load(tmp_path / 'firebase.log').data == single_db.data
+
+
+def test_local_references_keep_their_own_path():
+    db = LocalFirebaseDB()
+    live_report = db.child('sim').child('live_report')
+    logs = db.child('sim', 'logs')
+    live_report.child(2).set({"timestamp": 0.1})
+    logs.set(["started"])
+    live_report.child(3).set({"timestamp": 0.2})
+    assert db.get() == {"sim": {"live_report": {"2": {"timestamp": 0.1}, "3": {"timestamp": 0.2}}, "logs": ["started"]}}
+    assert live_report.child('2').get() == {"timestamp": 0.1}
+
+
+def test_batch_writer_flush_interval():
+    db = LocalFirebaseDB()
+    writer = FirebaseBatchWriter(db, 'sim', flush_interval=0, flush_size=100)
+    writer.seer_consumer([({"timestamp": 0.1}, 2)])
+    assert db.child('sim/live_report/2').get() == {"timestamp": 0.1}
+    assert writer.pending == {}
+
+
+def test_batch_writer_flushes_when_idle():
+    db = LocalFirebaseDB()
+    writer = FirebaseBatchWriter(db, 'sim', flush_interval=0.05, flush_size=100)
+    buffer = MessageBuffer(8, BackpressurePolicy.BLOCK)
+    worker = threading.Thread(target=consumer_worker, args=[writer.as_consumer(), buffer])
+    worker.start()
+    try:
+        buffer.put(({"timestamp": 0.1}, 2))
+        deadline = time.monotonic() + 2
+        while db.child('sim/live_report/2').get() is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert db.child('sim/live_report/2').get() == {"timestamp": 0.1}
+    finally:
+        buffer.put(({"theEnd": True}, -1))
+        worker.join(timeout=1)
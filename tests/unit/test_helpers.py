@@ -0,0 +1,30 @@
+import math
+
+import pytest
+
+from simulator.mxCellDecoder import available_models, model_for_style
+from simulator.utils.helpers import parse_style, rotate_around_point, rotate_points, style_mapping
+
+
+def test_rotate_points_matches_rotate_around_point():
+    points = [(0, 0), (10, 0), (10, 5), (0, 5)]
+    for angle in [0, 33, -90, 270.5]:
+        radians = math.radians(angle)
+        assert rotate_points(points, radians, (5, 2)) == [rotate_around_point(p, radians, (5, 2)) for p in points]
+
+
+def test_parse_style_is_cached_and_copied():
+    style = "shape=mxgraph.floorplan.wall;fillColor=#000000;rounded"
+    first = parse_style(style)
+    assert first == {"shape": "mxgraph.floorplan.wall", "fillColor": "#000000", "rounded": True}
+    first["parent"] = "1"
+    assert parse_style(style) == {"shape": "mxgraph.floorplan.wall", "fillColor": "#000000", "rounded": True}
+    assert style_mapping(style) is style_mapping(style)
+    with pytest.raises(TypeError):
+        style_mapping(style)["shape"] = "other"
+
+
+def test_model_for_style():
+    wall = model_for_style("shape=mxgraph.floorplan.wall;fillColor=#000000;")
+    assert wall is available_models["mxgraph.floorplan.wall"].from_mxCell
+    assert model_for_style("rounded=0;whiteSpace=wrap;") is available_models["default"].from_mxCell
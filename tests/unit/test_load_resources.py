@@ -0,0 +1,40 @@
+import base64
+import zlib
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from urllib.parse import quote
+from simulator.resources.load_resources import map_from_drawio, stream_drawio
+
+
+def cell_strings(cells):
+    return [ET.tostring(cell).strip() for cell in cells]
+
+
+@pytest.mark.parametrize("map_file", [
+    "tests/bdd/data/three_room_map.drawio",  # Uncompressed
+    "tests/bdd/data/room.drawio",  # Compressed
+])
+@pytest.mark.parametrize("chunk_size", [7, 1 << 16])
+def test_stream_drawio_matches_map_from_drawio(map_file, chunk_size):
+    window_name, content = map_from_drawio(map_file)
+    stream_name, attributes, cells = stream_drawio(map_file, chunk_size)
+    assert stream_name == window_name
+    assert attributes == dict(content.attrib)
+    assert cell_strings(cells) == cell_strings(content[0])
+
+
+def test_stream_drawio_compressed_escapes(tmp_path):
+    cells = ''.join(f'<mxCell id="c{i}" value="caf&#233; {i} %" style="a=1;"/>' for i in range(200))
+    xml = f'<mxGraphModel pageWidth="800"><root>{cells}</root></mxGraphModel>'
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+    data = compressor.compress(quote(xml).encode()) + compressor.flush()
+    map_file = tmp_path / "map.drawio"
+    map_file.write_text(f'<mxfile><diagram name="Escaped">{base64.b64encode(data).decode()}</diagram></mxfile>')
+    # Small chunks split the percent escapes
+    window_name, attributes, cells = stream_drawio(map_file, chunk_size=5)
+    cells = list(cells)
+    assert window_name == "Escaped" and attributes == {"pageWidth": "800"}
+    assert len(cells) == 200
+    assert cells[199].attrib["value"] == "café 199 %"
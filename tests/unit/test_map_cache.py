@@ -0,0 +1,65 @@
+import shutil
+import pathlib
+
+from simulator import map_parser
+from simulator.main import Simulator
+from simulator.components.Position import Position
+from simulator.utils import map_cache
+from simulator.utils.TrackedWorld import TrackedWorld
+
+MAP = pathlib.Path("tests/bdd/data/three_room_map.drawio")
+
+
+def positions(simulation):
+    world = simulation["world"]
+    return {ent: vars(pos) for ent, pos in world.get_component(Position)}
+
+
+def test_cached_map_is_equal_to_parsed(tmp_path):
+    parsed = map_parser.build_simulation_from_map(MAP)
+    assert map_cache.load(tmp_path, MAP, None, 10) is None
+    map_parser.build_simulation_from_map(MAP, cache_dir=tmp_path)
+    cached = map_cache.load(tmp_path, MAP, None, 10)
+    assert cached is not None
+    assert isinstance(cached["world"], TrackedWorld)
+    assert positions(cached) == positions(parsed)
+    assert cached["draw_map"] == parsed["draw_map"]
+    assert cached["window_props"] == parsed["window_props"]
+    # Components notify the loaded world
+    tracker = cached["world"].track()
+    ent, position = next(iter(cached["world"].get_component(Position)))
+    position.changed = True
+    assert tracker.drain() == ({ent}, set())
+
+
+def test_changed_map_is_parsed_again(tmp_path):
+    map_file = tmp_path / "map.drawio"
+    shutil.copy(MAP, map_file)
+    cache_dir = tmp_path / "cache"
+    map_parser.build_simulation_from_map(map_file, cache_dir=cache_dir)
+    assert map_cache.load(cache_dir, map_file, None, 10) is not None
+    assert map_cache.load(cache_dir, map_file, {"ClockComponent": []}, 10) is None
+    with open(map_file, "a") as fd:
+        fd.write("\n")
+    assert map_cache.load(cache_dir, map_file, None, 10) is None
+    map_parser.build_simulation_from_map(map_file, cache_dir=cache_dir)
+    # Older cache files of the map are replaced
+    assert len(list(cache_dir.iterdir())) == 1
+
+
+def test_simulator_map_cache_option(tmp_path):
+    shutil.copy(MAP, tmp_path / "map.drawio")
+    config = {"context": str(tmp_path), "map": "map.drawio", "simulatorConfigOptions": {"mapCache": True}}
+    first = Simulator(config, cleanup=lambda: None)
+    assert len(list((tmp_path / ".map_cache").iterdir())) == 1
+    second = Simulator(config, cleanup=lambda: None)
+    assert second.draw2ent == first.draw2ent
+    assert len(second.world._entities) == len(first.world._entities)
+
+
+def test_failing_to_store_is_a_cache_miss(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.write_text("not a directory")
+    simulation = map_parser.build_simulation_from_map(MAP, cache_dir=cache_dir)
+    assert positions(simulation) == positions(map_parser.build_simulation_from_map(MAP))
+    assert map_cache.load(cache_dir, MAP, None, 10) is None
@@ -0,0 +1,60 @@
+import logging
+import xml.etree.ElementTree as ET
+
+from types import SimpleNamespace
+
+from simulator.map_parser import build_simulation_objects
+from simulator.typehints.build_types import DependencyNotFound
+from simulator.utils.TrackedWorld import TrackedWorld
+
+
+def chain_builder(calls):
+    def build_object(cell, world, window_options, draw2entity):
+        calls.append(cell.attrib['id'])
+        source = cell[0].attrib.get('source', None)
+        if source is not None and source not in draw2entity:
+            raise DependencyNotFound(f'{source} not found')
+        # Dependencies that aren't references are only found by the builder
+        needs = cell.attrib.get('needs', None)
+        if needs is not None and needs not in draw2entity:
+            raise DependencyNotFound(f'{needs} not found')
+        ent = world.create_entity()
+        return {cell.attrib['id']: [ent, {'type': 'node'}]}, [(ent, cell.attrib['id'])], {}
+    return SimpleNamespace(build_object=build_object)
+
+
+def node(cell_id, source=None, needs=None):
+    source_attribute = f' source="{source}"' if source is not None else ''
+    needs_attribute = f' needs="{needs}"' if needs is not None else ''
+    return f'<object id="{cell_id}" type="node"{needs_attribute}><mxCell parent="1"{source_attribute}/></object>'
+
+
+def build(cells, calls):
+    root = ET.fromstring(f'<root><mxCell id="0"/><mxCell id="1" parent="0"/>{"".join(cells)}</root>')
+    return build_simulation_objects(root, TrackedWorld(), ((500, 500), 10), {'node': chain_builder(calls)})
+
+
+def test_cells_are_built_after_their_dependencies():
+    calls = []
+    draw2entity, objects, _ = build([node('d', 'c'), node('c', 'b'), node('b', 'a'), node('a')], calls)
+    # Each cell is built once, even with a chain of forward references
+    assert calls == ['a', 'b', 'c', 'd']
+    assert set(draw2entity.keys()) == {'a', 'b', 'c', 'd'}
+    assert [name for _, name in objects] == ['a', 'b', 'c', 'd']
+
+
+def test_deferred_cells_release_their_dependents_once_built():
+    calls = []
+    draw2entity, _, _ = build([node('a', needs='z'), node('b', 'a'), node('z')], calls)
+    # b waits for a, which is deferred until z is built
+    assert calls == ['a', 'z', 'a', 'b']
+    assert set(draw2entity.keys()) == {'a', 'b', 'z'}
+
+
+def test_dependency_cycle_is_reported(caplog):
+    calls = []
+    with caplog.at_level(logging.WARNING):
+        draw2entity, _, _ = build([node('x', 'y'), node('y', 'x'), node('z')], calls)
+    assert 'Dependency cycle between cells x -> y -> x' in caplog.text
+    assert set(draw2entity.keys()) == {'z'}
+    assert sorted(calls) == ['x', 'y', 'z']
@@ -0,0 +1,41 @@
+import simpy
+
+from simulator.utils.Profiler import Profiler, system_name
+
+
+def test_profile_process_forwards_values_and_interrupts():
+    env = simpy.Environment()
+    profiler = Profiler()
+    received = []
+
+    def worker():
+        try:
+            value = yield env.timeout(1, value='done')
+            received.append(value)
+            yield env.timeout(10)
+        except simpy.Interrupt as interrupt:
+            received.append(interrupt.cause)
+        return 'finished'
+
+    def interrupter(process):
+        yield env.timeout(2)
+        process.interrupt('stop')
+
+    process = env.process(profiler.profile_process('worker', worker()))
+    env.process(interrupter(process))
+    env.run()
+    assert received == ['done', 'stop']
+    assert process.value == 'finished'
+    assert profiler.stats['worker'].calls == 3
+    assert sum(profiler.stats['worker'].histogram) == 3
+
+
+def test_profiler_report():
+    profiler = Profiler()
+    double = profiler.profile_function('double', lambda x: x * 2)
+    assert double(2) == 4
+    profiler.profile_function('double', lambda x: x)
+    assert list(profiler.stats.keys()) == ['double', 'double#2']
+    assert profiler.to_dict()['double']['calls'] == 1
+    assert 'double#2' in profiler.table()
+    assert system_name(test_profiler_report) == 'test_profiler.test_profiler_report'
@@ -0,0 +1,93 @@
+import random
+
+from simulator.main import Simulator
+from simulator.components.Position import Position
+from simulator.components.Velocity import Velocity
+from simulator.systems.BridgePlugin import BridgeProcessor
+from simulator.systems.MovementProcessor import MovementProcessor
+from simulator.utils.Recorder import Recorder, Replayer, replay_frames, world_digest
+
+
+def build(feed):
+    config = {
+        "context": "tests/bdd/data",
+        "FPS": 8,
+        "duration": 6,
+        "extraEntities": [{
+            "entId": "robot", "type": "robot", "isObject": True, "isInteractive": False,
+            "components": {"Position": [0, 0, 0, 10, 10], "Velocity": [0, 0]}
+        }],
+    }
+    simulator = Simulator(config, cleanup=lambda: None)
+    ent = simulator.draw2ent["robot"][0]
+    bridge = BridgeProcessor(feed=feed)
+    # The API server isn't needed, events are put in the queue directly
+    bridge.started = True
+    simulator.add_system(bridge)
+    simulator.add_system(MovementProcessor(minx=0, miny=0, maxx=1000, maxy=1000))
+
+    def mover(kwargs):
+        store = kwargs["EVENT_STORE"]
+        velocity = kwargs["WORLD"].component_for_entity(ent, Velocity)
+        while True:
+            event = yield store.get(lambda e: e.type == "Move")
+            velocity.x = event.payload.speed + random.random()
+
+    simulator.add_des_system((mover,))
+    return simulator, bridge, ent
+
+
+def test_record_and_replay(tmp_path):
+    recorder = Recorder(tmp_path, seed=3, digest_interval=1)
+    simulator, bridge, ent = build(recorder.feed("bridge"))
+
+    def api_client(kwargs):
+        # External input, at times the simulation doesn't control
+        env = kwargs["ENV"]
+        for wait, speed in [(0.3, 1), (1.1, 4), (2.05, 2)]:
+            yield env.timeout(wait)
+            bridge.event_queue.put({"type": "Move", "payloadName": "MovePayload", "payload": {"speed": speed}})
+
+    simulator.add_des_system((api_client,))
+    recorder.attach(simulator)
+    recorded_state = []
+    simulator.cleanups.append(
+        lambda: recorded_state.append(world_digest(simulator.world, [Position, Velocity]))
+    )
+    simulator.run()
+
+    replayer = Replayer(tmp_path)
+    assert replayer.seed == 3 and len(replayer.inputs["bridge"]) == 3
+    replay, _, _ = build(replayer.feed("bridge"))
+    replayer.attach(replay)
+    replay.run()
+    assert len(replayer.digests) == 6
+    assert replayer.divergences == []
+    assert world_digest(replay.world, [Position, Velocity]) == recorded_state[0]
+    assert replay.world.component_for_entity(ent, Position).x > 0
+
+
+def test_replay_detects_divergence(tmp_path):
+    recorder = Recorder(tmp_path, seed=3, digest_interval=1)
+    simulator, bridge, _ = build(recorder.feed("bridge"))
+    bridge.event_queue.put({"type": "Move", "payloadName": "MovePayload", "payload": {"speed": 1}})
+    recorder.attach(simulator)
+    simulator.run()
+
+    replayer = Replayer(tmp_path)
+    replay, _, _ = build(replayer.feed("bridge"))
+    replayer.seed = 4
+    replayer.attach(replay)
+    replay.run()
+    assert replayer.divergences and replayer.divergences[0][0] == 1
+
+
+def test_replay_frames(tmp_path):
+    recorder = Recorder(tmp_path)
+    recorder.seer_consumer({"timestamp": -1, "window_name": "w", "dimensions": [10, 10]}, 0)
+    recorder.seer_consumer({"timestamp": 0.5, "a": {"value": "", "x": 1, "y": 2, "width": 3, "height": 4, "style": ""}}, 1)
+    recorder.seer_consumer({"theEnd": True}, -1)
+    recorder.close()
+    received = []
+    assert replay_frames(tmp_path, [lambda message, msg_idx: received.append((message, msg_idx))]) == 3
+    assert received[1] == ({"timestamp": 0.5, "a": {"value": "", "x": 1.0, "y": 2.0, "width": 3.0, "height": 4.0, "style": ""}}, 1)
@@ -0,0 +1,56 @@
+import json
+import time
+
+from simulator.utils.ROS2 import ROS2_conn, MockNode
+
+
+def test_publisher_packs_frames():
+    node = MockNode('seer_publisher')
+    ros2 = ROS2_conn(publish_rate=1000, frames_per_message=3, qos_depth=50, node=node)
+    ros2.seer_consumer({"timestamp": -1, "window_name": "w", "dimensions": {}}, 0)
+    ros2.seer_consumer({"timestamp": 0.0, "robot": {"x": 1}}, 1)
+    for idx in range(2, 6):
+        ros2.seer_consumer({"timestamp": idx / 10}, idx)
+    ros2.seer_consumer({"theEnd": True}, -1)
+    ros2.close()
+
+    publisher = node.publishers[0]
+    assert publisher.topic == 'live_report' and publisher.qos_depth == 50
+    frames = [frame for data in publisher.published for frame in json.loads(data)["frames"]]
+    assert frames[1] == {"scenario": [{"timestamp": 0.0}, {"robot": {"x": 1}}]}
+    assert [f["timestamp"] for f in frames[2:6]] == [0.2, 0.3, 0.4, 0.5]
+    assert frames[-1] == {"theEnd": True}
+    assert len(publisher.published) < len(frames)
+
+
+def test_single_frame_messages():
+    node = MockNode('seer_publisher')
+    ros2 = ROS2_conn(node=node)
+    ros2.seer_consumer({"timestamp": 0.1}, 2)
+    ros2.seer_consumer({"theEnd": True}, -1)
+    assert node.publishers[0].published == ['{"timestamp": 0.1}', '{"theEnd": true}']
+
+
+def test_one_message_per_period():
+    node = MockNode('seer_publisher')
+    ros2 = ROS2_conn(publish_rate=20, frames_per_message=2, node=node)
+    for idx in range(2, 42):
+        ros2.seer_consumer({"timestamp": idx / 10}, idx)
+    time.sleep(0.12)
+    # 40 frames need 20 messages, but only one is published every 0.05s
+    assert 1 <= len(node.publishers[0].published) <= 3
+    ros2.seer_consumer({"theEnd": True}, -1)
+    frames = [frame for data in node.publishers[0].published for frame in json.loads(data)["frames"]]
+    assert len(frames) == 41 and frames[-1] == {"theEnd": True}
+
+
+def test_full_queue_blocks_the_consumer():
+    node = MockNode('seer_publisher')
+    ros2 = ROS2_conn(publish_rate=100, frames_per_message=1, qos_depth=2, node=node)
+    start = time.monotonic()
+    for idx in range(2, 8):
+        ros2.seer_consumer({"timestamp": idx / 10}, idx)
+    # 6 frames with room for 2: the consumer waits for 4 publishes
+    assert time.monotonic() - start >= 0.03
+    ros2.seer_consumer({"theEnd": True}, -1)
+    assert len(node.publishers[0].published) == 7
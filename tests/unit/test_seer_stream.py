@@ -0,0 +1,77 @@
+import io
+import os
+import json
+import pytest
+
+from simulator.utils.SeerStream import (
+    SeerStreamEncoder,
+    SeerStreamDecoder,
+    SeerStreamWriter,
+    SeerStreamError,
+    read_stream,
+)
+
+working_dir = os.path.dirname(os.path.realpath(__file__))
+data_dir = os.path.join(working_dir, '..', 'bdd', 'data')
+
+ROBOT_STYLE = "ellipse;whiteSpace=wrap;html=1;aspect=fixed;"
+
+
+def robot(x, y, value='robot'):
+    return {'value': value, 'x': x, 'y': y, 'width': 30.0, 'height': 30.0, 'style': ROBOT_STYLE}
+
+
+def test_roundtrip_seer_report():
+    with open(os.path.join(data_dir, 'seer_report.txt')) as fd:
+        messages = [json.loads(line) for line in fd]
+
+    fd = io.BytesIO()
+    writer = SeerStreamWriter(fd)
+    for idx, message in enumerate(messages):
+        writer.seer_consumer(message, idx)
+
+    decoded = list(read_stream(io.BytesIO(fd.getvalue())))
+    assert [m for m, _ in decoded] == messages
+    assert [idx for _, idx in decoded] == list(range(len(messages)))
+    # Style strings are sent once, so the stream is much smaller than the json lines
+    json_size = sum(len(json.dumps(m)) for m in messages)
+    assert len(fd.getvalue()) < json_size / 2
+
+
+def test_only_changed_fields_are_sent():
+    encoder = SeerStreamEncoder()
+    encoder.encode({'timestamp': -1, 'window_name': 'w', 'dimensions': {}}, 0)
+    first = encoder.encode({'timestamp': 0.0, 'robot': robot(10.0, 10.0)}, 1)
+    moved = encoder.encode({'timestamp': 0.1, 'robot': robot(15.0, 10.0)}, 2)
+    # The second frame has no entity record and a single float field
+    assert ROBOT_STYLE.encode() in first
+    assert ROBOT_STYLE.encode() not in moved
+    assert len(moved) < len(first) - 4 * 8
+
+
+def test_deleted_and_recreated_entities():
+    messages = [
+        {'timestamp': 0.0, 'robot': robot(1.0, 2.0), 'box': robot(5.0, 5.0, value='box')},
+        {'timestamp': 0.5, 'deleted': ['box']},
+        {'timestamp': 1.0, 'box': robot(5.0, 5.0, value='box'), 'robot': robot(1.0, 2.0, value='r2')},
+    ]
+    encoder = SeerStreamEncoder()
+    data = b''.join(encoder.encode(m, i) for i, m in enumerate(messages))
+    assert [m for m, _ in read_stream(io.BytesIO(data))] == messages
+
+
+def test_decoder_accepts_partial_chunks():
+    encoder = SeerStreamEncoder()
+    data = encoder.encode({'timestamp': 0.0, 'robot': robot(1.0, 2.0)}, 1)
+    data += encoder.encode({"theEnd": True}, -1)
+
+    decoder = SeerStreamDecoder()
+    decoded = []
+    for i in range(len(data)):
+        decoded += decoder.feed(data[i:i + 1])
+    assert decoded == [({'timestamp': 0.0, 'robot': robot(1.0, 2.0)}, 1), ({"theEnd": True}, -1)]
+
+
+def test_invalid_stream():
+    with pytest.raises(SeerStreamError):
+        SeerStreamDecoder().feed(b'{"timestamp": 0}')
@@ -0,0 +1,322 @@
+import os
+import sys
+import json
+import time
+import subprocess
+import esper
+
+from simulator.main import Simulator
+from simulator.systems.MovementProcessor import MovementProcessor
+from simulator.systems.PathProcessor import PathProcessor
+import simulator.systems.ScriptEventsDES as ScriptSystem
+import simulator.systems.GotoDESProcessor as GotoSystem
+import simulator.systems.ClockSystem as ClockSystem
+import simulator.systems.EnergyConsumptionDESProcessor as EnergySystem
+from simulator.components.BatteryComponent import Battery
+from simulator.components.Path import Path
+from simulator.components.Position import Position
+from simulator.components.Script import Script
+from simulator.components.Velocity import Velocity
+from simulator.typehints.component_types import EVENT
+
+
+class TickCounter(esper.Processor):
+    def __init__(self):
+        self.ticks = 0
+
+    def process(self, kwargs):
+        self.ticks += 1
+        for _, (position, velocity) in self.world.get_components(Position, Velocity):
+            position.x += velocity.x
+
+
+class IdleObserver(esper.Processor):
+    def process(self, kwargs):
+        pass
+
+
+def build_idle_scenario(fast_forward: bool):
+    config = {
+        "context": "tests/bdd/data",
+        "FPS": 10,
+        "duration": 20,
+        "simulatorConfigOptions": {"fastForward": fast_forward},
+        "extraEntities": [{
+            "entId": "robot", "type": "robot", "isObject": True, "isInteractive": False,
+            "components": {"Position": [0, 0, 0, 10, 10], "Velocity": [0, 0]}
+        }],
+    }
+    simulator = Simulator(config, cleanup=lambda: None)
+    return simulator, simulator.draw2ent["robot"][0]
+
+
+def run_idle_scenario(fast_forward: bool):
+    simulator, ent = build_idle_scenario(fast_forward)
+    counter = TickCounter()
+    simulator.add_system(counter)
+    # Systems at the same rate skip the same ticks
+    simulator.add_system(IdleObserver())
+
+    def script(kwargs):
+        env = kwargs["ENV"]
+        velocity = kwargs["WORLD"].component_for_entity(ent, Velocity)
+        yield env.timeout(12.05)
+        velocity.x = 1
+        yield env.timeout(0.5)
+        velocity.x = 0
+
+    simulator.add_des_system((script,))
+    simulator.run()
+    return counter.ticks, simulator.world.component_for_entity(ent, Position).x, simulator.skipped_ticks
+
+
+def test_fast_forward_skips_idle_ticks():
+    ticks, x, _ = run_idle_scenario(False)
+    fast_ticks, fast_x, skipped = run_idle_scenario(True)
+    assert fast_x == x == 5
+    assert ticks == 200
+    assert fast_ticks < 20
+    assert skipped == ticks - fast_ticks
+
+
+def test_systems_run_at_their_own_rate():
+    simulator = Simulator({"context": "tests/bdd/data", "FPS": 32, "duration": 5}, cleanup=lambda: None)
+    movement = TickCounter()
+    observer = TickCounter()
+    fast = TickCounter()
+    simulator.add_system(movement)
+    simulator.add_system(observer, hz=2)
+    simulator.add_system(fast, hz=64)
+    simulator.run()
+    assert movement.ticks == 160
+    assert observer.ticks == 10
+    assert fast.ticks == 320
+
+
+class OtherCounter(TickCounter):
+    pass
+
+
+def test_systems_added_while_running():
+    simulator = Simulator({"context": "tests/bdd/data", "FPS": 10, "duration": 5}, cleanup=lambda: None)
+    counter = TickCounter()
+    added = OtherCounter()
+    simulator.add_system(counter)
+
+    def change_systems(kwargs):
+        env = kwargs["ENV"]
+        yield env.timeout(1.05)
+        simulator.add_system(added, hz=20)
+        yield env.timeout(2)
+        simulator.world.remove_processor(TickCounter)
+
+    simulator.add_des_system((change_systems,))
+    simulator.run()
+    assert counter.ticks == 31
+    assert added.ticks == 79
+
+
+class SlowProcessor(esper.Processor):
+    def process(self, kwargs):
+        time.sleep(0.05)
+
+
+def test_real_time_pacing_and_lag():
+    config = {
+        "context": "tests/bdd/data", "FPS": 10, "duration": 0.5,
+        "simulatorConfigOptions": {"realTime": {"factor": 0.5, "lagCheckInterval": 0.1}}
+    }
+    simulator = Simulator(config, cleanup=lambda: None)
+    start = time.monotonic()
+    simulator.run()
+    assert time.monotonic() - start >= 0.25
+    assert simulator.lagging_checks == 0
+
+    config["simulatorConfigOptions"]["realTime"]["factor"] = 0.01
+    slow = Simulator(config, cleanup=lambda: None)
+    slow.add_system(SlowProcessor())
+    slow.run()
+    assert slow.lagging_checks > 0
+    assert slow.max_lag > 0.1
+
+
+def test_profile_report(tmp_path):
+    config = {
+        "context": str(tmp_path), "FPS": 8, "duration": 1,
+        "simulatorConfigOptions": {"profile": {"output": "profile.json"}}
+    }
+    simulator = Simulator(config, cleanup=lambda: None)
+    simulator.add_system(TickCounter())
+
+    def idle(kwargs):
+        while True:
+            yield kwargs["ENV"].timeout(0.5)
+
+    simulator.add_des_system((idle,))
+    simulator.run()
+    with open(tmp_path / "profile.json") as fd:
+        profile = json.load(fd)
+    assert profile["TickCounter"]["calls"] == 8
+    assert profile["test_simulator.test_profile_report.idle"]["calls"] == 2
+
+
+def test_clone():
+    simulator, _ = build_idle_scenario(False)
+    clone = simulator.clone()
+    ent = clone.draw2ent["robot"][0]
+    clone.world.component_for_entity(ent, Velocity).x = 1
+    clone.add_system(TickCounter())
+    clone.run()
+    assert clone.world.component_for_entity(ent, Position).x == 200
+    assert simulator.world.component_for_entity(ent, Position).x == 0
+    assert clone.ENV is not simulator.ENV and clone.ENV.now == 20 and simulator.ENV.now == 0
+
+
+def test_snapshot_and_restore(tmp_path):
+    snapshot_file = tmp_path / "simulation.snapshot"
+    simulator, ent = build_idle_scenario(False)
+    simulator.FPS = 8
+    simulator.world.component_for_entity(ent, Velocity).x = 1
+    simulator.add_system(TickCounter())
+
+    def snapshot_at_half_time(kwargs):
+        yield kwargs["ENV"].timeout(10)
+        kwargs["EVENT_STORE"].put(EVENT("Pending", {"ent": ent}))
+        simulator.snapshot(snapshot_file)
+
+    simulator.add_des_system((snapshot_at_half_time,))
+    simulator.run()
+
+    restored = Simulator.restore(snapshot_file, cleanup=lambda: None)
+    assert restored.ENV.now == 10
+    assert restored.world.component_for_entity(ent, Position).x == 80
+    assert restored.draw2ent["robot"][0] == ent
+    assert restored.KWARGS["EVENT_STORE"].items == [EVENT("Pending", {"ent": ent})]
+    counter = TickCounter()
+    restored.add_system(counter)
+    restored.run()
+    assert counter.ticks == 80
+    assert restored.world.component_for_entity(ent, Position).x == simulator.world.component_for_entity(ent, Position).x == 160
+
+
+def add_script_systems(simulator):
+    width, height = simulator.window_dimensions
+    simulator.add_system(MovementProcessor(minx=0, miny=0, maxx=width, maxy=height))
+    simulator.add_system(PathProcessor())
+    straight_line = GotoSystem.GotoDESProcessor(lambda world_map, source, target: Path([target], 2))
+    simulator.add_des_system((straight_line.process,))
+    simulator.add_des_system((ScriptSystem.init([(GotoSystem.GotoInstructionId, GotoSystem.go_instruction)], []),))
+
+
+def test_restored_scripts_resume_exactly(tmp_path):
+    # ScriptEventsDES, GotoDESProcessor and Paths only depend on events and components, which are saved
+    snapshot_file = tmp_path / "simulation.snapshot"
+    config = {
+        "context": "tests/bdd/data", "FPS": 10, "duration": 20, "simulationComponents": {"Map": []},
+        "extraEntities": [{
+            "entId": "robot", "type": "robot", "isObject": True, "isInteractive": False,
+            "components": {"Position": [50, 50, 0, 10, 10], "Velocity": [0, 0], "Script": [["Go 200 100", "Go 100 200"]]}
+        }],
+    }
+    simulator = Simulator(config, cleanup=lambda: None)
+    add_script_systems(simulator)
+
+    def snapshot_on_the_way(kwargs):
+        yield kwargs["ENV"].timeout(3)
+        simulator.snapshot(snapshot_file)
+
+    simulator.add_des_system((snapshot_on_the_way,))
+    simulator.run()
+
+    restored = Simulator.restore(snapshot_file, cleanup=lambda: None)
+    ent = restored.draw2ent["robot"][0]
+    assert restored.world.has_component(ent, Path)
+    add_script_systems(restored)
+    restored.run()
+    # Instructions execute at the same times: the first Path was followed from where it was
+    logs = restored.world.component_for_entity(ent, Script).logs
+    assert logs == simulator.world.component_for_entity(ent, Script).logs
+    assert len(logs) == 3 and "Go ['100', '200']" in logs[1]
+
+
+class ChargeRecorder(esper.Processor):
+    def __init__(self, env):
+        self.env = env
+        self.charges = []
+
+    def process(self, kwargs):
+        for _, battery in self.world.get_component(Battery):
+            self.charges.append((round(self.env.now, 6), battery.charge))
+
+
+def add_timed_systems(simulator) -> ChargeRecorder:
+    recorder = ChargeRecorder(simulator.ENV)
+    simulator.add_system(recorder)
+    simulator.add_des_system((ClockSystem.process,))
+    simulator.add_des_system((EnergySystem.process,))
+    return recorder
+
+
+def test_restored_timers_resume_exactly(tmp_path):
+    # ClockSystem and EnergyConsumptionDESProcessor wake up when they would have, not 1s after the restore
+    snapshot_file = tmp_path / "simulation.snapshot"
+    config = {
+        "context": "tests/bdd/data", "FPS": 10, "duration": 6,
+        "extraEntities": [{
+            "entId": "robot", "type": "robot", "isObject": True, "isInteractive": False,
+            "components": {"Position": [0, 0]}
+        }],
+    }
+    ClockSystem.traces.clear()
+    simulator = Simulator(config, cleanup=lambda: None)
+    simulator.world.add_component(simulator.draw2ent["robot"][0], Battery(100, {"default": 1, "still": 2}))
+    recorder = add_timed_systems(simulator)
+
+    def snapshot_between_timers(kwargs):
+        yield kwargs["ENV"].timeout(2.5)
+        simulator.snapshot(snapshot_file)
+
+    simulator.add_des_system((snapshot_between_timers,))
+    simulator.run()
+    clock_times = [float(trace.split(",")[0]) for trace in ClockSystem.traces[1:]]
+
+    ClockSystem.traces.clear()
+    restored = Simulator.restore(snapshot_file, cleanup=lambda: None)
+    restored_recorder = add_timed_systems(restored)
+    restored.run()
+    assert [float(trace.split(",")[0]) for trace in ClockSystem.traces[1:]] == clock_times[2:]
+    assert restored_recorder.charges == [entry for entry in recorder.charges if entry[0] >= 2.5]
+    assert restored_recorder.charges[-1][1] == 90
+    ClockSystem.traces.clear()
+
+
+def test_import_does_not_load_optional_dependencies():
+    # Rendering, the HTTP bridge and the config loader's yaml are only imported when used
+    code = (
+        'import sys, simulator.main, simulator.systems.CollisionProcessor, simulator.systems.BridgePlugin; '
+        'print(",".join(m for m in ("pyglet", "fastapi", "uvicorn", "colorama", "yaml") if m in sys.modules))'
+    )
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}
+    proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env)
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip() == ''
+
+
+def test_add_entities():
+    entities = [
+        {"type": "robot", "isObject": True, "components": {"Position": [0, 0], "Velocity": [1, 0]}},
+        {"entId": "box", "type": "box", "isInteractive": True, "name": "crate", "components": {"Position": [5, 5]}},
+        {"type": "robot", "isObject": True, "components": {"Position": [9, 0], "Velocity": [0, 1]}},
+    ]
+    bulk = Simulator({"context": "tests/bdd/data", "FPS": 10}, cleanup=lambda: None)
+    single = Simulator({"context": "tests/bdd/data", "FPS": 10}, cleanup=lambda: None)
+    ents = bulk.add_entities(entities)
+    for idx, entity in enumerate(entities):
+        single.add_entity(entity, entity.get("entId", f"extraEntity_{idx}"))
+
+    assert bulk.draw2ent == single.draw2ent
+    assert bulk.objects == single.objects == [(ents[0], "extraEntity_0"), (ents[2], "extraEntity_2")]
+    assert bulk.interactive["crate"] == ents[1]
+    assert [(ent, pos.x) for ent, pos in bulk.world.get_component(Position)] == \
+        [(ent, pos.x) for ent, pos in single.world.get_component(Position)]
+    assert bulk.world.component_for_entity(ents[2], Velocity).y == 1
@@ -0,0 +1,84 @@
+from simulator.main import Simulator
+from simulator.components.Collidable import Collidable
+from simulator.components.Position import Position
+from simulator.components.ProximitySensor import ProximitySensor
+from simulator.components.Skeleton import Skeleton
+from simulator.systems.CollisionProcessor import CollisionProcessor
+from simulator.utils.validators import validate_config
+
+STYLE = "rounded=0;html=1;fillColor=#000000;"
+TEMPLATES = {
+    "drone": {
+        "type": "drone", "isObject": True, "isInteractive": False,
+        "components": {
+            "Position": [0, 0, 0, 5, 5],
+            "Collidable": [[[[2.5, 2.5], [[0, 0], [5, 0], [5, 5], [0, 5]]]]],
+            "Skeleton": ["drone", STYLE],
+            "ProximitySensor": [8, "drone_sensor"],
+        }
+    }
+}
+
+
+def build(instances):
+    config = {"context": "tests/bdd/data", "FPS": 10, "templates": TEMPLATES, "instances": instances}
+    return Simulator(config, cleanup=lambda: None)
+
+
+def test_instances_override_template():
+    simulator = build([
+        {"template": "drone", "components": {"Position": [20, 20]}},
+        {"template": "drone", "entId": "leader", "isInteractive": True, "name": "leader",
+         "components": {"Position": [40, 10], "ProximitySensor": [16]}},
+    ])
+    first, _ = simulator.draw2ent["drone_0"]
+    leader, _ = simulator.draw2ent["leader"]
+    assert simulator.objects == [(first, "drone_0"), (leader, "leader")]
+    assert simulator.interactive["leader"] == leader
+
+    position = simulator.world.component_for_entity(first, Position)
+    assert (position.x, position.y, position.w, position.h) == (20, 20, 5, 5)
+    sensor = simulator.world.component_for_entity(leader, ProximitySensor)
+    assert (sensor.range, sensor.type) == (16, "drone_sensor")
+    skeleton = simulator.world.component_for_entity(leader, Skeleton)
+    assert skeleton.id == "leader" and skeleton.style == STYLE
+
+
+def test_instances_share_geometry():
+    simulator = build([{"template": "drone", "components": {"Position": [10 * i, 0]}} for i in range(3)])
+    ents = [simulator.draw2ent[f"drone_{i}"][0] for i in range(3)]
+    shapes = [simulator.world.component_for_entity(ent, Collidable).shapes[0] for ent in ents]
+    assert [(s.pos.x, s.pos.y) for s in shapes] == [(2.5, 2.5), (12.5, 2.5), (22.5, 2.5)]
+    assert shapes[0].rel_points is shapes[1].rel_points
+    styles = [simulator.world.component_for_entity(ent, Skeleton).style for ent in ents]
+    assert styles[0] is styles[1]
+
+    shapes[0].angle = 45
+    assert shapes[0].rel_points is not shapes[1].rel_points
+    assert [(p.x, p.y) for p in shapes[1].rel_points] == [(-2.5, -2.5), (2.5, -2.5), (2.5, 2.5), (-2.5, 2.5)]
+    assert (shapes[1].rel_points[0].x, shapes[1].rel_points[0].y) != \
+        (shapes[0].rel_points[0].x, shapes[0].rel_points[0].y)
+
+
+def test_geometry_shared_after_collision_tick():
+    simulator = build([
+        {"template": "drone", "components": {"Position": [10 * i, 0], "Velocity": [0, 0]}} for i in range(2)
+    ])
+    ents = [simulator.draw2ent[f"drone_{i}"][0] for i in range(2)]
+    for ent in ents:
+        position = simulator.world.component_for_entity(ent, Position)
+        position.sector, position.adjacent_sectors = 0, [0]
+    processor = CollisionProcessor()
+    processor.world = simulator.world
+    processor.process({})
+    shapes = [simulator.world.component_for_entity(ent, Collidable).shapes[0] for ent in ents]
+    assert [(s.pos.x, s.pos.y) for s in shapes] == [(2, 2), (12, 2)]
+    assert shapes[0].rel_points is shapes[1].rel_points
+
+
+def test_validate_instances():
+    config = {"templates": TEMPLATES, "instances": [{"template": "drone"}, {"template": "truck"}]}
+    errors = validate_config(config)
+    assert len(errors) == 1 and "truck" in errors[0]
+    config["templates"] = {"drone": {"components": {}}}
+    assert len(validate_config(config)) > 1
@@ -0,0 +1,66 @@
+import copy
+
+from simulator.components.Position import Position
+from simulator.components.Skeleton import Skeleton
+from simulator.components.Velocity import Velocity
+from simulator.utils.TrackedWorld import TrackedWorld
+
+
+def test_tracker_collects_dirty_and_deleted_entities():
+    world = TrackedWorld()
+    static = world.create_entity(Skeleton("wall"), Position())
+    tracker = world.track()
+    robot = world.create_entity(Skeleton("robot"), Position())
+    assert tracker.drain() == ({robot}, set())
+
+    world.component_for_entity(robot, Position).changed = True
+    world.component_for_entity(static, Position).changed = False
+    assert tracker.drain() == ({robot}, set())
+
+    world.add_component(static, Velocity())
+    world.delete_entity(robot)
+    world.component_for_entity(robot, Position).changed = True
+    assert tracker.drain() == ({static}, {robot})
+    assert tracker.drain() == (set(), set())
+
+
+def test_tracked_components_compare_and_copy_like_components():
+    world = TrackedWorld()
+    tracker = world.track()
+    position = Position(x=1.0, y=2.0)
+    ent = world.create_entity(position)
+    tracker.drain()
+    assert position == Position(x=1.0, y=2.0)
+    assert "changed" in vars(position)
+
+    # Copies aren't in the world, so they don't mark the entity
+    for copied in (copy.copy(position), copy.deepcopy(position)):
+        assert copied == position
+        copied.changed = True
+        assert tracker.drain() == (set(), set())
+    # Copies of the world track their own components
+    world_copy = copy.deepcopy(world)
+    copy_tracker = world_copy.track()
+    world_copy.component_for_entity(ent, Position).changed = True
+    assert tracker.drain() == (set(), set())
+    assert copy_tracker.drain() == ({ent}, set())
+
+    world.remove_component(ent, Position)
+    tracker.drain()
+    position.changed = True
+    assert tracker.drain() == (set(), set())
+
+
+def test_create_entities():
+    world = TrackedWorld()
+    first = world.create_entity(Position())
+    tracker = world.track()
+    position = Position(x=5)
+    created = world.create_entities([[Skeleton("a"), position], [], [Velocity(1, 0)]])
+    assert created == [first + 1, first + 2, first + 3]
+    assert world.create_entity() == first + 4
+    assert tracker.drain() == ({first + 1, first + 3}, set())
+    assert [ent for ent, _ in world.get_component(Position)] == [first, first + 1]
+
+    position.changed = True
+    assert tracker.drain() == ({first + 1}, set())
@@ -1,4 +1,6 @@
 import os
+import copy
+import pickle
 import pytest
 from simulator.typehints.build_types import ConfigParseError
 import simulator.utils.validators as validators
@@ -27,3 +29,43 @@ def test_validate_config():
     assert len(resp) == 0
     with pytest.raises(ConfigParseError):
         validators.validate_config('missing_file.txt')
+
+
+def test_errors_have_json_paths():
+    config = {
+        'FPS': 'fast',
+        'extraEntities': [
+            {'entId': 'a', 'isObject': True, 'isInteractive': False},
+            {'entId': 'b', 'isObject': 'yes', 'components': {'Position': 3}},
+        ],
+        'simulatorConfigOptions': {'fastForward': 1},
+    }
+    errors = validators.validate_config(config)
+    assert errors[0].startswith('FPS should be')
+    assert any(e.startswith('extraEntities[1].isObject should be') for e in errors)
+    assert any(e.startswith('extraEntities[1].isInteractive (type') for e in errors)
+    assert any(e.startswith('extraEntities[1].components.Position: You should pass a list') for e in errors)
+    assert any(e.startswith('simulatorConfigOptions.fastForward should be') for e in errors)
+    assert not any(e.startswith('extraEntities[0]') for e in errors)
+    with pytest.raises(ConfigParseError) as err:
+        validators.compile_config(config)
+    assert err.value.errors == errors
+
+
+def test_compile_config():
+    entity = {'entId': 'a', 'isObject': True, 'isInteractive': False, 'components': {'Position': [1, 2]}}
+    config = validators.compile_config({'FPS': 30, 'extraEntities': [entity],
+                                        'simulatorConfigOptions': {'fastForward': True}})
+    assert (config.context, config.FPS, config.DLW, config.duration, config.map) == ('.', 30, 10, -1, None)
+    assert config.simulatorConfigOptions == {'fastForward': True, 'realTime': False, 'profile': False,
+                                             'mapCache': False}
+    assert config.extraEntities == (entity,)
+    assert validators.compile_config(config) is config
+    with pytest.raises(TypeError):
+        config.extraEntities[0]['entId'] = 'b'
+    with pytest.raises(TypeError):
+        config.extraEntities[0]['components']['Velocity'] = [0, 0]
+    with pytest.raises(AttributeError):
+        config.FPS = 10
+    assert pickle.loads(pickle.dumps(config)) == config
+    assert copy.deepcopy(config) == config